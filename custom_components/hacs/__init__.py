@@ -30,7 +30,8 @@ from .enums import ConfigurationType, HacsDisabledReason, HacsStage, LovelaceMod
 from .frontend import async_register_frontend
 from .utils.configuration_schema import hacs_config_combined
 from .utils.data import HacsData
-from .utils.queue_manager import QueueManager
+from .utils.github_cache import HacsGitHubSession
+from .utils.queue_manager import QueueManager, QueueRateLimiter
 from .utils.version import version_left_higher_or_equal_then_right
 from .websocket import async_register_websocket_commands
 
@@ -86,14 +87,17 @@ async def async_initialize_integration(
     hacs.version = integration.version
     hacs.configuration.dev = integration.version == "0.0.0"
     hacs.hass = hass
-    hacs.queue = QueueManager(hass=hass)
+    hacs.queue = QueueManager(hass=hass, rate_limiter=QueueRateLimiter())
     hacs.data = HacsData(hacs=hacs)
+    hacs.repositories.hydrator = hacs.data.async_hydrate_repository
+    hacs.repositories.record_loader = hacs.data.async_load_repository_record
     hacs.data_client = HacsDataClient(
         session=clientsession,
         client_name=f"HACS/{integration.version}",
     )
     hacs.system.running = True
     hacs.session = clientsession
+    hacs.github_session = HacsGitHubSession(hass, clientsession)
 
     hacs.core.lovelace_mode = LovelaceMode.YAML
     try:
@@ -111,7 +115,7 @@ async def async_initialize_integration(
     ## Legacy GitHub client
     hacs.github = GitHub(
         hacs.configuration.token,
-        clientsession,
+        hacs.github_session,
         headers={
             "User-Agent": f"HACS/{hacs.version}",
             "Accept": ACCEPT_HEADERS["preview"],
@@ -121,7 +125,7 @@ async def async_initialize_integration(
     ## New GitHub client
     hacs.githubapi = GitHubAPI(
         token=hacs.configuration.token,
-        session=clientsession,
+        session=hacs.github_session,
         **{"client_name": f"HACS/{hacs.version}"},
     )
 
@@ -154,6 +158,8 @@ async def async_initialize_integration(
             hacs.disable_hacs(HacsDisabledReason.CONSTRAINS)
             return False
 
+        await hacs.github_session.async_load()
+
         if not await hacs.data.restore():
             hacs.disable_hacs(HacsDisabledReason.RESTORE)
             return False
@@ -5,12 +5,14 @@ import asyncio
 from dataclasses import asdict, dataclass, field
 from datetime import timedelta
 import gzip
+import hashlib
 import logging
 import math
 import os
 import pathlib
 import shutil
-from typing import TYPE_CHECKING, Any, Awaitable, Callable
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable
+import uuid
 
 from aiogithubapi import (
     AIOGitHubAPIException,
@@ -22,7 +24,8 @@ from aiogithubapi import (
     GitHubRatelimitException,
 )
 from aiogithubapi.objects.repository import AIOGitHubAPIRepository
-from aiohttp.client import ClientSession, ClientTimeout
+from aiohttp import hdrs
+from aiohttp.client import ClientResponse, ClientSession, ClientTimeout
 from awesomeversion import AwesomeVersion
 from homeassistant.config_entries import ConfigEntry, ConfigEntryState
 from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE, Platform
@@ -35,9 +38,18 @@ from homeassistant.util import dt
 from custom_components.hacs.repositories.base import (
     HACS_MANIFEST_KEYS_TO_EXPORT,
     REPOSITORY_KEYS_TO_EXPORT,
+    RepositoryData,
 )
 
-from .const import DOMAIN, TV, URL_BASE
+from .const import (
+    DOMAIN,
+    DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_WRITE_BUFFER_SIZE,
+    QUEUE_RATE_LIMIT_RESERVE,
+    QUEUE_RATE_LIMIT_TASK_COST,
+    TV,
+    URL_BASE,
+)
 from .data_client import HacsDataClient
 from .enums import (
     ConfigurationType,
@@ -45,6 +57,7 @@ from .enums import (
     HacsDisabledReason,
     HacsDispatchEvent,
     HacsGitHubRepo,
+    HacsQueuePriority,
     HacsStage,
     LovelaceMode,
 )
@@ -58,6 +71,7 @@ from .exceptions import (
     HacsRepositoryExistException,
     HomeAssistantCoreRepositoryException,
 )
+from .frontend import HacsStaticView
 from .repositories import RERPOSITORY_CLASSES
 from .utils.decode import decode_content
 from .utils.json import json_loads
@@ -68,6 +82,7 @@ from .utils.store import async_load_from_store, async_save_to_store
 if TYPE_CHECKING:
     from .repositories.base import HacsRepository
     from .utils.data import HacsData
+    from .utils.github_cache import HacsGitHubSession
     from .validate.manager import ValidationManager
 
 
@@ -192,20 +207,73 @@ class HacsSystem:
         return self.disabled_reason is not None
 
 
+class HacsRepositoryRecord:
+    """Catalogue entry for a repository that has not been loaded as a repository object."""
+
+    __slots__ = ("id", "full_name", "category", "data", "cached_list_entry")
+
+    def __init__(
+        self,
+        repository_id: str,
+        full_name: str,
+        category: str,
+        data: dict[str, Any],
+    ) -> None:
+        self.id = repository_id  # pylint: disable=invalid-name
+        self.full_name = full_name
+        self.category = category
+        self.data = data
+        self.cached_list_entry: tuple[int | None, dict[str, Any]] | None = None
+
+    @property
+    def full_name_lower(self) -> str:
+        """Return the lowercase full name."""
+        return self.full_name.lower()
+
+
 @dataclass
 class HacsRepositories:
     """HACS Repositories."""
 
     _default_repositories: set[str] = field(default_factory=set)
-    _repositories: list[HacsRepository] = field(default_factory=list)
     _repositories_by_full_name: dict[str, HacsRepository] = field(default_factory=dict)
     _repositories_by_id: dict[str, HacsRepository] = field(default_factory=dict)
+    _repositories_by_category: dict[str, dict[str, HacsRepository]] = field(default_factory=dict)
+    _downloaded_repositories: dict[str, HacsRepository] = field(default_factory=dict)
+    _pending_update_repositories: dict[str, HacsRepository] = field(default_factory=dict)
+    _pending_update_stale: set[str] = field(default_factory=set)
     _removed_repositories: list[RemovedRepository] = field(default_factory=list)
+    _records_by_full_name: dict[str, HacsRepositoryRecord] = field(default_factory=dict)
+    _records_by_id: dict[str, HacsRepositoryRecord] = field(default_factory=dict)
+    _records_by_category: dict[str, dict[str, HacsRepositoryRecord]] = field(default_factory=dict)
+    _revisions: dict[str, int] = field(default_factory=dict)
+    _unregistered_revisions: dict[str, int] = field(default_factory=dict)
+    hydrator: Callable[[HacsRepositoryRecord], HacsRepository | None] | None = None
+    record_loader: Callable[[HacsRepositoryRecord], HacsRepository | None] | None = None
+    epoch: str = field(default_factory=lambda: uuid.uuid4().hex)
+    revision: int = 0
 
     @property
     def list_all(self) -> list[HacsRepository]:
-        """Return a list of repositories."""
-        return self._repositories
+        """Return a list of repositories, loading all catalogue records."""
+        for record in list(self._records_by_id.values()):
+            self.hydrate(record)
+        return list(self._repositories_by_id.values())
+
+    @property
+    def list_loaded(self) -> list[HacsRepository]:
+        """Return a list of repositories that are loaded as repository objects."""
+        return list(self._repositories_by_id.values())
+
+    @property
+    def list_records(self) -> list[HacsRepositoryRecord]:
+        """Return a list of catalogue records that are not loaded yet."""
+        return list(self._records_by_id.values())
+
+    @property
+    def count(self) -> int:
+        """Return the number of known repositories."""
+        return len(self._repositories_by_id) + len(self._records_by_id)
 
     @property
     def list_removed(self) -> list[RemovedRepository]:
@@ -215,7 +283,86 @@ class HacsRepositories:
     @property
     def list_downloaded(self) -> list[HacsRepository]:
         """Return a list of downloaded repositories."""
-        return [repo for repo in self._repositories if repo.data.installed]
+        return list(self._downloaded_repositories.values())
+
+    @property
+    def list_pending_update(self) -> list[HacsRepository]:
+        """Return a list of downloaded repositories with a pending update."""
+        while self._pending_update_stale:
+            repo_id = self._pending_update_stale.pop()
+            repository = self._downloaded_repositories.get(repo_id)
+            if repository is not None and repository.pending_update:
+                self._pending_update_repositories[repo_id] = repository
+            else:
+                self._pending_update_repositories.pop(repo_id, None)
+        return list(self._pending_update_repositories.values())
+
+    def list_by_category(self, categories: Iterable[str]) -> list[HacsRepository]:
+        """Return a list of repositories in the categories, loading their catalogue records."""
+        for record in self.list_records_by_category(categories):
+            self.hydrate(record)
+        return self.list_loaded_by_category(categories)
+
+    def list_loaded_by_category(self, categories: Iterable[str]) -> list[HacsRepository]:
+        """Return a list of loaded repositories in the categories."""
+        return [
+            repository
+            for category in set(categories)
+            for repository in self._repositories_by_category.get(category, {}).values()
+        ]
+
+    def list_records_by_category(self, categories: Iterable[str]) -> list[HacsRepositoryRecord]:
+        """Return a list of catalogue records in the categories."""
+        return [
+            record
+            for category in set(categories)
+            for record in self._records_by_category.get(category, {}).values()
+        ]
+
+    def list_changed(self, revision: int) -> list[HacsRepository | HacsRepositoryRecord]:
+        """Return a list of repositories and catalogue records that changed after the revision."""
+        changed = []
+        for repo_id in reversed(self._revisions):
+            if self._revisions[repo_id] <= revision:
+                break
+            changed.append(self._repositories_by_id.get(repo_id) or self._records_by_id[repo_id])
+        return changed[::-1]
+
+    def list_unregistered(self, revision: int) -> list[str]:
+        """Return a list of repository ids that were unregistered after the revision."""
+        unregistered = []
+        for repo_id in reversed(self._unregistered_revisions):
+            if self._unregistered_revisions[repo_id] <= revision:
+                break
+            unregistered.append(repo_id)
+        return unregistered[::-1]
+
+    def get_revision(self, repository_id: str) -> int | None:
+        """Return the revision of the last change to a repository or catalogue record."""
+        return self._revisions.get(repository_id)
+
+    def bump_revision(self, repository_id: str) -> None:
+        """Record a change to a loaded repository."""
+        if repository_id not in self._repositories_by_id:
+            return
+        self._bump_revision(repository_id)
+
+    def record_list_entry(self, record: HacsRepositoryRecord) -> dict[str, Any] | None:
+        """Return the list entry for a catalogue record without registering the repository."""
+        revision = self._revisions.get(record.id)
+        if record.cached_list_entry is not None and record.cached_list_entry[0] == revision:
+            return record.cached_list_entry[1]
+        if self.record_loader is None or (repository := self.record_loader(record)) is None:
+            return None
+        # The repository object is only used to build the entry and is not kept
+        record.cached_list_entry = (revision, repository.list_entry())
+        return record.cached_list_entry[1]
+
+    def set_record_data(self, record: HacsRepositoryRecord, data: dict[str, Any]) -> None:
+        """Replace the data of a catalogue record."""
+        record.data = data
+        if self._records_by_id.get(record.id) is record:
+            self._bump_revision(record.id)
 
     def register(self, repository: HacsRepository, default: bool = False) -> None:
         """Register a repository."""
@@ -224,6 +371,9 @@ class HacsRepositories:
         if repo_id == "0":
             return
 
+        if record := self._records_by_id.get(repo_id):
+            self._drop_record(record)
+
         if registered_repo := self._repositories_by_id.get(repo_id):
             if registered_repo.data.full_name == repository.data.full_name:
                 return
@@ -234,15 +384,52 @@ class HacsRepositories:
             registered_repo.data.new = False
             repository = registered_repo
 
-        if repository not in self._repositories:
-            self._repositories.append(repository)
-
         self._repositories_by_id[repo_id] = repository
         self._repositories_by_full_name[repository.data.full_name_lower] = repository
+        self._repositories_by_category.setdefault(repository.data.category, {})[
+            repo_id
+        ] = repository
+        self._index_downloaded(repo_id, repository)
+        # pylint: disable-next=protected-access
+        repository.data._on_change = self._repository_data_changed
+        self._unregistered_revisions.pop(repo_id, None)
+        self.bump_revision(repo_id)
 
         if default:
             self.mark_default(repository)
 
+    def register_record(self, record: HacsRepositoryRecord, default: bool = False) -> None:
+        """Register a catalogue record without loading the repository object."""
+        if record.id == "0" or self.is_registered(repository_id=record.id):
+            return
+
+        self._records_by_id[record.id] = record
+        self._records_by_full_name[record.full_name_lower] = record
+        self._records_by_category.setdefault(record.category, {})[record.id] = record
+        self._unregistered_revisions.pop(record.id, None)
+
+        if default:
+            self._default_repositories.add(record.id)
+        self._bump_revision(record.id)
+
+    def unregister_record(self, record: HacsRepositoryRecord) -> None:
+        """Unregister a catalogue record."""
+        if self._records_by_id.get(record.id) is not record:
+            return
+        self._drop_record(record)
+        self._default_repositories.discard(record.id)
+        self._revisions.pop(record.id, None)
+        self.revision += 1
+        self._unregistered_revisions.pop(record.id, None)
+        self._unregistered_revisions[record.id] = self.revision
+
+    def hydrate(self, record: HacsRepositoryRecord) -> HacsRepository | None:
+        """Load the repository object for a catalogue record."""
+        if self.hydrator is None or self._records_by_id.get(record.id) is not record:
+            return self._repositories_by_id.get(record.id)
+        self._drop_record(record)
+        return self.hydrator(record)
+
     def unregister(self, repository: HacsRepository) -> None:
         """Unregister a repository."""
         repo_id = str(repository.data.id)
@@ -253,26 +440,38 @@ class HacsRepositories:
         if not self.is_registered(repository_id=repo_id):
             return
 
-        if self.is_default(repo_id):
-            self._default_repositories.remove(repo_id)
-
-        if repository in self._repositories:
-            self._repositories.remove(repository)
-
-        self._repositories_by_id.pop(repo_id, None)
-        self._repositories_by_full_name.pop(repository.data.full_name_lower, None)
-
-    def mark_default(self, repository: HacsRepository) -> None:
+        self._default_repositories.discard(repo_id)
+
+        if self._repositories_by_id.get(repo_id) is repository:
+            self._repositories_by_id.pop(repo_id)
+            self._repositories_by_full_name.pop(repository.data.full_name_lower, None)
+            for repositories in self._repositories_by_category.values():
+                repositories.pop(repo_id, None)
+            self._downloaded_repositories.pop(repo_id, None)
+            self._pending_update_repositories.pop(repo_id, None)
+            self._pending_update_stale.discard(repo_id)
+            # pylint: disable-next=protected-access
+            repository.data._on_change = None
+            self._revisions.pop(repo_id, None)
+            self.revision += 1
+            self._unregistered_revisions.pop(repo_id, None)
+            self._unregistered_revisions[repo_id] = self.revision
+
+    def mark_default(self, repository: HacsRepository | HacsRepositoryRecord) -> None:
         """Mark a repository as default."""
-        repo_id = str(repository.data.id)
+        if isinstance(repository, HacsRepositoryRecord):
+            repo_id = repository.id
+        else:
+            repo_id = str(repository.data.id)
 
         if repo_id == "0":
             return
 
-        if not self.is_registered(repository_id=repo_id):
+        if not self.is_registered(repository_id=repo_id) or repo_id in self._default_repositories:
             return
 
         self._default_repositories.add(repo_id)
+        self._bump_revision(repo_id)
 
     def set_repository_id(self, repository: HacsRepository, repo_id: str):
         """Update a repository id."""
@@ -300,9 +499,14 @@ class HacsRepositories:
     ) -> bool:
         """Check if a repository is registered."""
         if repository_id is not None:
-            return repository_id in self._repositories_by_id
+            return (
+                repository_id in self._repositories_by_id or repository_id in self._records_by_id
+            )
         if repository_full_name is not None:
-            return repository_full_name in self._repositories_by_full_name
+            return (
+                repository_full_name in self._repositories_by_full_name
+                or repository_full_name in self._records_by_full_name
+            )
         return False
 
     def is_downloaded(
@@ -311,6 +515,9 @@ class HacsRepositories:
         repository_full_name: str | None = None,
     ) -> bool:
         """Check if a repository is registered."""
+        if self.get_record(repository_id) or self.get_record_by_full_name(repository_full_name):
+            # Catalogue records are never downloaded
+            return False
         if repository_id is not None:
             repo = self.get_by_id(repository_id)
         if repository_full_name is not None:
@@ -323,14 +530,32 @@ class HacsRepositories:
         """Get repository by id."""
         if not repository_id:
             return None
+        if record := self._records_by_id.get(str(repository_id)):
+            return self.hydrate(record)
         return self._repositories_by_id.get(str(repository_id))
 
     def get_by_full_name(self, repository_full_name: str | None) -> HacsRepository | None:
         """Get repository by full name."""
         if not repository_full_name:
             return None
+        if record := self._records_by_full_name.get(repository_full_name.lower()):
+            return self.hydrate(record)
         return self._repositories_by_full_name.get(repository_full_name.lower())
 
+    def get_record(self, repository_id: str | None) -> HacsRepositoryRecord | None:
+        """Get a catalogue record by id without loading it."""
+        if not repository_id:
+            return None
+        return self._records_by_id.get(str(repository_id))
+
+    def get_record_by_full_name(
+        self, repository_full_name: str | None
+    ) -> HacsRepositoryRecord | None:
+        """Get a catalogue record by full name without loading it."""
+        if not repository_full_name:
+            return None
+        return self._records_by_full_name.get(repository_full_name.lower())
+
     def is_removed(self, repository_full_name: str) -> bool:
         """Check if a repository is removed."""
         return repository_full_name in (
@@ -351,6 +576,43 @@ class HacsRepositories:
         self._removed_repositories.append(removed)
         return removed
 
+    def _bump_revision(self, repository_id: str) -> None:
+        self.revision += 1
+        # Keep the dict ordered by revision, so changes can be read from the end
+        self._revisions.pop(repository_id, None)
+        self._revisions[repository_id] = self.revision
+
+    def _drop_record(self, record: HacsRepositoryRecord) -> None:
+        self._records_by_id.pop(record.id, None)
+        self._records_by_full_name.pop(record.full_name_lower, None)
+        self._records_by_category.get(record.category, {}).pop(record.id, None)
+
+    def _index_downloaded(self, repo_id: str, repository: HacsRepository) -> None:
+        if repository.data.installed:
+            self._downloaded_repositories[repo_id] = repository
+            self._pending_update_stale.add(repo_id)
+        else:
+            self._downloaded_repositories.pop(repo_id, None)
+            self._pending_update_repositories.pop(repo_id, None)
+            self._pending_update_stale.discard(repo_id)
+
+    def _repository_data_changed(self, data: RepositoryData, name: str) -> None:
+        repo_id = str(data.id)
+        repository = self._repositories_by_id.get(repo_id)
+        if repository is None or repository.data is not data:
+            return
+        if name == "category":
+            for category, repositories in self._repositories_by_category.items():
+                if category != data.category:
+                    repositories.pop(repo_id, None)
+            self._repositories_by_category.setdefault(data.category, {})[repo_id] = repository
+        if name == "installed":
+            self._index_downloaded(repo_id, repository)
+        elif data.installed:
+            # Any change to an installed repository can change pending_update
+            self._pending_update_stale.add(repo_id)
+        self.bump_revision(repo_id)
+
 
 class HacsBase:
     """Base HACS class."""
@@ -363,6 +625,7 @@ class HacsBase:
     frontend_version: str | None = None
     github: GitHub | None = None
     githubapi: GitHubAPI | None = None
+    github_session: HacsGitHubSession | None = None
     hass: HomeAssistant | None = None
     integration: Integration | None = None
     log: logging.Logger = LOGGER
@@ -467,8 +730,12 @@ class HacsBase:
         """Helper to calculate the number of repositories we can fetch data for."""
         try:
             response = await self.async_github_api_method(self.githubapi.rate_limit)
-            if ((limit := response.data.resources.core.remaining or 0) - 1000) >= 10:
-                return math.floor((limit - 1000) / 10)
+            core = response.data.resources.core
+            if self.queue.rate_limiter is not None:
+                self.queue.rate_limiter.update(core.remaining or 0, core.limit or 0, core.reset)
+            budget = (core.remaining or 0) - QUEUE_RATE_LIMIT_RESERVE
+            if budget >= QUEUE_RATE_LIMIT_TASK_COST:
+                return math.floor(budget / QUEUE_RATE_LIMIT_TASK_COST)
             reset = dt.as_local(dt.utc_from_timestamp(response.data.resources.core.reset))
             self.log.info(
                 "GitHub API ratelimited - %s remaining (%s)",
@@ -504,11 +771,16 @@ class HacsBase:
         _exception = None
 
         try:
-            return await method(*args, **kwargs)
+            response = await method(*args, **kwargs)
+            if self.queue is not None and self.queue.rate_limiter is not None:
+                self.queue.rate_limiter.update_from_headers(getattr(response, "headers", None))
+            return response
         except GitHubAuthenticationException as exception:
             self.disable_hacs(HacsDisabledReason.INVALID_TOKEN)
             _exception = exception
         except GitHubRatelimitException as exception:
+            if self.queue is not None and self.queue.rate_limiter is not None:
+                self.queue.rate_limiter.exhaust()
             self.disable_hacs(HacsDisabledReason.RATE_LIMIT)
             _exception = exception
         except GitHubNotModifiedException as exception:
@@ -690,6 +962,32 @@ class HacsBase:
         if url is None:
             return None
 
+        return await self._async_download(url, headers, ClientResponse.read)
+
+    async def async_download_file_to_path(
+        self,
+        url: str,
+        file_path: str,
+        *,
+        headers: dict | None = None,
+        expected_size: int | None = None,
+    ) -> str | None:
+        """Stream a download to file_path, and return the sha256 digest of the content."""
+        if url is None:
+            return None
+
+        async def _async_write(request: ClientResponse) -> str:
+            return await self._async_write_response(request, file_path, expected_size)
+
+        return await self._async_download(url, headers, _async_write)
+
+    async def _async_download(
+        self,
+        url: str,
+        headers: dict | None,
+        handler: Callable[[ClientResponse], Awaitable[Any]],
+    ) -> Any | None:
+        """Download url, retrying on timeouts, and return what handler made of the response."""
         if "tags/" in url:
             url = url.replace("tags/", "")
 
@@ -698,19 +996,17 @@ class HacsBase:
 
         while timeouts < 5:
             try:
-                request = await self.session.get(
+                async with self.session.get(
                     url=url,
                     timeout=ClientTimeout(total=60),
                     headers=headers,
-                )
-
-                # Make sure that we got a valid result
-                if request.status == 200:
-                    return await request.read()
-
-                raise HacsException(
-                    f"Got status code {request.status} when trying to download {url}"
-                )
+                ) as request:
+                    # Make sure that we got a valid result
+                    if request.status != 200:
+                        raise HacsException(
+                            f"Got status code {request.status} when trying to download {url}"
+                        )
+                    return await handler(request)
             except asyncio.TimeoutError:
                 self.log.warning(
                     "A timeout of 60! seconds was encountered while downloading %s, "
@@ -731,6 +1027,43 @@ class HacsBase:
 
             return None
 
+    async def _async_write_response(
+        self,
+        request: ClientResponse,
+        file_path: str,
+        expected_size: int | None,
+    ) -> str:
+        """Write the body of a response to disk as it arrives."""
+        # Content-Length is the size on the wire, which differs for encoded bodies
+        if expected_size is None and hdrs.CONTENT_ENCODING not in request.headers:
+            expected_size = request.content_length
+        digest = hashlib.sha256()
+        size = 0
+        buffer = bytearray()
+        file_handler = await self.hass.async_add_executor_job(open, file_path, "wb")
+        try:
+            async for chunk in request.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if expected_size is not None and size > expected_size:
+                    raise HacsException(
+                        f"Download of {request.url} exceeds the expected {expected_size} bytes"
+                    )
+                digest.update(chunk)
+                buffer += chunk
+                if len(buffer) >= DOWNLOAD_WRITE_BUFFER_SIZE:
+                    await self.hass.async_add_executor_job(file_handler.write, buffer)
+                    buffer.clear()
+            if buffer:
+                await self.hass.async_add_executor_job(file_handler.write, buffer)
+        finally:
+            await self.hass.async_add_executor_job(file_handler.close)
+
+        if expected_size is not None and size != expected_size:
+            raise HacsException(
+                f"Download of {request.url} is {size} bytes, expected {expected_size} bytes"
+            )
+        return digest.hexdigest()
+
     async def async_recreate_entities(self) -> None:
         """Recreate entities."""
         if self.configuration == ConfigurationType.YAML or not self.configuration.experimental:
@@ -782,7 +1115,7 @@ class HacsBase:
                 repository = self.repositories.get_by_full_name(HacsGitHubRepo.INTEGRATION)
             elif self.configuration.experimental and not self.status.startup:
                 self.log.error("Scheduling update of hacs/integration")
-                self.queue.add(repository.common_update())
+                self.queue.add(repository.common_update(), HacsQueuePriority.DOWNLOADED)
             if repository is None:
                 raise HacsException("Unknown error")
 
@@ -838,6 +1171,18 @@ class HacsBase:
                 continue
             if repo in self.common.archived_repositories:
                 continue
+            if record := self.repositories.get_record_by_full_name(repo):
+                self.repositories.mark_default(record)
+                if (record.data.get("last_fetched") or 0) < repo_data["last_fetched"]:
+                    self.repositories.set_record_data(
+                        record,
+                        {
+                            **record.data,
+                            **dict(REPOSITORY_KEYS_TO_EXPORT),
+                            **repo_data,
+                        },
+                    )
+                continue
             if repository := self.repositories.get_by_full_name(repo):
                 self.repositories.set_repository_id(repository, repo_id)
                 self.repositories.mark_default(repository)
@@ -854,16 +1199,20 @@ class HacsBase:
             self.status.inital_fetch_done = True
 
         if self.stage == HacsStage.STARTUP:
-            for repository in self.repositories.list_all:
-                if (
-                    repository.data.category == category
-                    and not repository.data.installed
-                    and not self.repositories.is_default(repository.data.id)
+            for record in self.repositories.list_records_by_category([category]):
+                if not self.repositories.is_default(record.id):
+                    self.log.debug("%s Unregister stale custom repository", record.full_name)
+                    self.repositories.unregister_record(record)
+                    self.github_session.async_prune_repository(record.full_name)
+            for repository in self.repositories.list_loaded_by_category([category]):
+                if not repository.data.installed and not self.repositories.is_default(
+                    repository.data.id
                 ):
                     repository.logger.debug(
                         "%s Unregister stale custom repository", repository.string
                     )
                     self.repositories.unregister(repository)
+                    self.github_session.async_prune_repository(repository.data.full_name)
 
     async def async_get_category_repositories(self, category: HacsCategory) -> None:
         """Get repositories from category."""
@@ -881,6 +1230,10 @@ class HacsBase:
                 continue
             if repo in self.common.archived_repositories:
                 continue
+            if (record := self.repositories.get_record_by_full_name(repo)) is not None:
+                self.repositories.mark_default(record)
+                if not (self.status.new and self.configuration.dev):
+                    continue
             repository = self.repositories.get_by_full_name(repo)
             if repository is not None:
                 self.repositories.mark_default(repository)
@@ -903,9 +1256,13 @@ class HacsBase:
             return
         self.log.debug("Starting recurring background task for all repositories")
 
-        for repository in self.repositories.list_all:
-            if repository.data.category in self.common.categories:
-                self.queue.add(repository.common_update())
+        for repository in self.repositories.list_by_category(self.common.categories):
+            self.queue.add(
+                repository.common_update(),
+                HacsQueuePriority.DOWNLOADED
+                if repository.data.installed
+                else HacsQueuePriority.DEFAULT,
+            )
 
         self.async_dispatch(HacsDispatchEvent.REPOSITORY, {"action": "reload"})
         self.log.debug("Recurring background task for all repositories done")
@@ -934,25 +1291,23 @@ class HacsBase:
             self.log.debug("Queue is already running")
             return
 
-        async def _handle_queue():
-            if not self.queue.has_pending_tasks:
-                await self.data.async_write()
-                return
-            can_update = await self.async_can_update()
-            self.log.debug(
-                "Can update %s repositories, items in queue %s",
-                can_update,
-                self.queue.pending_tasks,
-            )
-            if can_update != 0:
-                try:
-                    await self.queue.execute(can_update)
-                except HacsExecutionStillInProgress:
-                    return
+        can_update = await self.async_can_update()
+        self.log.debug(
+            "Can update %s repositories, items in queue %s",
+            can_update,
+            self.queue.pending_tasks,
+        )
+        if can_update == 0:
+            return
 
-                await _handle_queue()
+        try:
+            await self.queue.execute()
+        except HacsExecutionStillInProgress:
+            return
 
-        await _handle_queue()
+        self.log.debug("Queue metrics %s", self.queue.metrics)
+        if not self.queue.has_pending_tasks:
+            await self.data.async_write()
 
     async def async_handle_removed_repositories(self, _=None) -> None:
         """Handle removed repositories."""
@@ -1019,7 +1374,10 @@ class HacsBase:
 
         for repository in self.repositories.list_downloaded:
             if repository.data.category in self.common.categories:
-                self.queue.add(repository.update_repository(ignore_issues=True))
+                self.queue.add(
+                    repository.update_repository(ignore_issues=True),
+                    HacsQueuePriority.DOWNLOADED,
+                )
 
         self.log.debug("Recurring background task for downloaded repositories done")
 
@@ -1034,7 +1392,10 @@ class HacsBase:
                 repository.data.category in self.common.categories
                 and not self.repositories.is_default(repository.data.id)
             ):
-                self.queue.add(repository.update_repository(ignore_issues=True))
+                self.queue.add(
+                    repository.update_repository(ignore_issues=True),
+                    HacsQueuePriority.DOWNLOADED,
+                )
 
         self.log.debug("Recurring background task for downloaded custom repositories done")
 
@@ -1119,10 +1480,13 @@ class HacsBase:
             use_cache,
         )
 
-        self.hass.http.register_static_path(
-            URL_BASE,
-            self.hass.config.path("www/community"),
-            cache_headers=use_cache,
+        self.hass.http.register_view(
+            HacsStaticView(
+                URL_BASE,
+                self.hass.config.path("www/community"),
+                "community",
+                cache_headers=use_cache,
+            )
         )
 
         self.status.active_frontend_endpoint_plugin = True
@@ -15,7 +15,15 @@ TV = TypeVar("TV")
 PACKAGE_NAME = "custom_components.hacs"
 
 DEFAULT_CONCURRENT_TASKS = 15
-DEFAULT_CONCURRENT_BACKOFF_TIME = 1
+
+QUEUE_RATE_LIMIT_BURST = 100
+QUEUE_RATE_LIMIT_MAX_WAIT = 60
+QUEUE_RATE_LIMIT_RESERVE = 1000
+QUEUE_RATE_LIMIT_TASK_COST = 10
+QUEUE_RATE_LIMIT_WINDOW = 3600
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_WRITE_BUFFER_SIZE = 1024 * 1024
 
 HACS_REPOSITORY_ID = "172733314"
 
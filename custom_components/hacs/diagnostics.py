@@ -33,12 +33,19 @@ async def async_get_config_entry_diagnostics(
             "archived_repositories": hacs.common.archived_repositories,
             "ignored_repositories": hacs.common.ignored_repositories,
             "lovelace_mode": hacs.core.lovelace_mode,
+            "queue": hacs.queue.metrics,
+            "github_cache": hacs.github_session.stats,
             "configuration": {},
         },
         "custom_repositories": [
             repo.data.full_name
-            for repo in hacs.repositories.list_all
+            for repo in hacs.repositories.list_loaded
             if not hacs.repositories.is_default(str(repo.data.id))
+        ]
+        + [
+            record.full_name
+            for record in hacs.repositories.list_records
+            if not hacs.repositories.is_default(record.id)
         ],
         "repositories": [],
     }
@@ -1,5 +1,6 @@
 """Helper constants."""
 # pylint: disable=missing-class-docstring
+from enum import IntEnum
 import sys
 
 if sys.version_info.minor >= 11:
@@ -80,6 +81,13 @@ class HacsStage(StrEnum):
     BACKGROUND = "background"
 
 
+class HacsQueuePriority(IntEnum):
+    """Queue lanes, lower values are executed first."""
+
+    DOWNLOADED = 0
+    DEFAULT = 1
+
+
 class HacsDisabledReason(StrEnum):
     RATE_LIMIT = "rate_limit"
     REMOVED = "removed"
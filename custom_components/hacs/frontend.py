@@ -1,9 +1,11 @@
 """"Starting setup task: Frontend"."""
 from __future__ import annotations
 
+import pathlib
+import re
 from typing import TYPE_CHECKING
 
-from aiohttp import web
+from aiohttp import hdrs, web
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.core import HomeAssistant, callback
 
@@ -17,6 +19,12 @@ from .hacs_frontend_experimental import (
 if TYPE_CHECKING:
     from .base import HacsBase
 
+# Bundles with a content hash in the name never change, like main-ad130be7.js and c.004a7b01.js
+HASHED_FILE = re.compile(r"[.-][0-9a-f]{8,}\.js$")
+CACHE_CONTROL_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_CONTROL_CACHE = "public, max-age=2678400"
+CACHE_CONTROL_REVALIDATE = "no-cache"
+
 
 @callback
 def async_register_frontend(hass: HomeAssistant, hacs: HacsBase) -> None:
@@ -33,12 +41,15 @@ def async_register_frontend(hass: HomeAssistant, hacs: HacsBase) -> None:
         hass.http.register_view(HacsFrontendDev())
     elif hacs.configuration.experimental:
         hacs.log.info("<HacsFrontend> Using experimental frontend")
-        hass.http.register_static_path(
-            f"{URL_BASE}/frontend", experimental_locate_dir(), cache_headers=False
+        hass.http.register_view(
+            HacsStaticView(
+                f"{URL_BASE}/frontend", experimental_locate_dir(), "frontend", immutable=True
+            )
         )
     else:
-        #
-        hass.http.register_static_path(f"{URL_BASE}/frontend", locate_dir(), cache_headers=False)
+        hass.http.register_view(
+            HacsStaticView(f"{URL_BASE}/frontend", locate_dir(), "frontend", immutable=True)
+        )
 
     # Custom iconset
     hass.http.register_static_path(
@@ -92,3 +103,65 @@ class HacsFrontendDev(HomeAssistantView):
             response.headers["Content-Type"] = "application/javascript"
 
             return response
+
+
+class HacsStaticView(HomeAssistantView):
+    """Static files view for HACS.
+
+    The .gz variant is served to clients that accept it, hashed bundles of the HACS
+    frontend are cached as immutable and everything else is revalidated against the ETag
+    and Last-Modified headers that FileResponse sets.
+    """
+
+    requires_auth = False
+
+    def __init__(
+        self,
+        url: str,
+        directory: str,
+        name: str,
+        cache_headers: bool = False,
+        immutable: bool = False,
+    ) -> None:
+        """Initialize the view.
+
+        cache_headers allows caching of files without a hash, immutable caches hashed
+        bundles for good and is only safe for the HACS frontend, as a plugin file name
+        can look like a hashed bundle.
+        """
+        self.url = f"{url}/{{requested_file:.+}}"
+        self.name = f"hacs_files:{name}"
+        self.directory = pathlib.Path(directory).resolve()
+        self.cache_headers = cache_headers
+        self.immutable = immutable
+
+    async def get(self, request: web.Request, requested_file: str) -> web.StreamResponse:
+        """Handle HACS static file requests."""
+        path = await request.app["hass"].async_add_executor_job(self._resolve, requested_file)
+        if path is None:
+            raise web.HTTPNotFound()
+
+        # FileResponse picks the .gz sibling itself, answers conditional requests
+        # and sends the file with sendfile
+        return web.FileResponse(
+            path,
+            headers={
+                hdrs.CACHE_CONTROL: self._cache_control(path),
+                hdrs.VARY: hdrs.ACCEPT_ENCODING,
+            },
+        )
+
+    def _resolve(self, requested_file: str) -> pathlib.Path | None:
+        """Return the path of the file that will be served."""
+        path = (self.directory / requested_file).resolve()
+        if self.directory not in path.parents or not path.is_file():
+            return None
+        return path
+
+    def _cache_control(self, path: pathlib.Path) -> str:
+        """Return the Cache-Control header for a file."""
+        if self.immutable and HASHED_FILE.search(path.name):
+            return CACHE_CONTROL_IMMUTABLE
+        if self.cache_headers:
+            return CACHE_CONTROL_CACHE
+        return CACHE_CONTROL_REVALIDATE
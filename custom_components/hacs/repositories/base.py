@@ -7,7 +7,7 @@ import os
 import pathlib
 import shutil
 import tempfile
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Callable
 import zipfile
 
 from aiogithubapi import (
@@ -28,10 +28,10 @@ from ..exceptions import (
     HacsRepositoryArchivedException,
     HacsRepositoryExistException,
 )
-from ..utils.backup import Backup, BackupNetDaemon
+from ..utils.backup import PERSISTENT_BACKUP_PREFIX, Backup, BackupNetDaemon
 from ..utils.decode import decode_content
 from ..utils.decorator import concurrent
-from ..utils.filters import filter_content_return_one_of_type
+from ..utils.filters import filter_content_return_one_of_type, ignored_by_country
 from ..utils.json import json_loads
 from ..utils.logger import LOGGER
 from ..utils.path import is_safe
@@ -120,6 +120,14 @@ HACS_MANIFEST_KEYS_TO_EXPORT = (
     ("name", None),
 )
 
+# Repository attributes outside of RepositoryData that are part of the list entry
+LIST_ENTRY_ATTRIBUTES = (
+    "integration_manifest",
+    "pending_restart",
+    "repository_manifest",
+    "state",
+)
+
 
 class FileInformation:
     """FileInformation."""
@@ -166,6 +174,14 @@ class RepositoryData:
     stargazers_count: int = 0
     topics: list[str] = []
 
+    # Set by HacsRepositories to keep its indexes in sync, not exported
+    _on_change = None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if self._on_change is not None and name != "_on_change":
+            self._on_change(self, name)
+
     @property
     def name(self):
         """Return the name."""
@@ -311,6 +327,12 @@ class HacsRepository:
         self.treefiles = []
         self.ref = None
         self.logger = LOGGER
+        self._list_entry: tuple[int, str | None, dict[str, Any]] | None = None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if name in LIST_ENTRY_ATTRIBUTES:
+            self.hacs.repositories.bump_revision(str(self.data.id))
 
     def __str__(self) -> str:
         """Return a string representation of the repository."""
@@ -335,19 +357,55 @@ class HacsRepository:
 
         return self.data.full_name.split("/")[-1].replace("-", " ").replace("_", " ").title()
 
+    def list_entry(self) -> dict[str, Any]:
+        """Return the entry for the repository list, cached until the repository changes."""
+        revision = self.hacs.repositories.get_revision(str(self.data.id))
+        # content.path.local is assigned in place and does not bump the revision
+        local_path = self.content.path.local
+        if revision is not None and self._list_entry and self._list_entry[:2] == (
+            revision,
+            local_path,
+        ):
+            return self._list_entry[2]
+
+        entry = {
+            "authors": self.data.authors,
+            "available_version": self.display_available_version,
+            "installed_version": self.display_installed_version,
+            "config_flow": self.data.config_flow,
+            "can_download": self.can_download,
+            "category": self.data.category,
+            "country": self.repository_manifest.country,
+            "custom": not self.hacs.repositories.is_default(str(self.data.id)),
+            "description": self.data.description,
+            "domain": self.data.domain,
+            "downloads": self.data.downloads,
+            "file_name": self.data.file_name,
+            "full_name": self.data.full_name,
+            "hide": self.data.hide,
+            "homeassistant": self.repository_manifest.homeassistant,
+            "id": self.data.id,
+            "installed": self.data.installed,
+            "last_updated": self.data.last_updated,
+            "local_path": local_path,
+            "name": self.display_name,
+            "new": self.data.new,
+            "pending_upgrade": self.pending_update,
+            "stars": self.data.stargazers_count,
+            "state": self.state,
+            "status": self.display_status,
+            "topics": self.data.topics,
+        }
+        if revision is not None:
+            self._list_entry = (revision, local_path, entry)
+        return entry
+
     @property
     def ignored_by_country_configuration(self) -> bool:
         """Return True if hidden by country."""
         if self.data.installed:
             return False
-        configuration = self.hacs.configuration.country.lower()
-        if configuration == "all":
-            return False
-
-        manifest = [entry.lower() for entry in self.repository_manifest.country or []]
-        if not manifest:
-            return False
-        return configuration not in manifest
+        return ignored_by_country(self.hacs.configuration.country, self.repository_manifest.country)
 
     @property
     def display_status(self) -> str:
@@ -456,7 +514,7 @@ class HacsRepository:
     async def validate_repository(self) -> None:
         """Validate."""
 
-    @concurrent(concurrenttasks=10, backoff_time=5)
+    @concurrent(concurrenttasks=10, rate_limited=True)
     async def update_repository(self, ignore_issues=False, force=False) -> None:
         """Update the repository"""
 
@@ -504,7 +562,7 @@ class HacsRepository:
         # Set description
         self.data.description = self.data.description
 
-    @concurrent(concurrenttasks=10, backoff_time=5)
+    @concurrent(concurrenttasks=10, rate_limited=True)
     async def common_update(self, ignore_issues=False, force=False) -> bool:
         """Common information update steps of the repository."""
         self.logger.debug("%s Getting repository information", self.string)
@@ -580,34 +638,58 @@ class HacsRepository:
     async def async_download_zip_file(self, content, validate) -> None:
         """Download ZIP archive from repository release."""
         try:
-            filecontent = await self.hacs.async_download_file(content.browser_download_url)
-
-            if filecontent is None:
-                validate.errors.append(f"[{content.name}] was not downloaded")
-                return
-
-            temp_dir = await self.hacs.hass.async_add_executor_job(tempfile.mkdtemp)
-            temp_file = f"{temp_dir}/{self.repository_manifest.filename}"
-
-            result = await self.hacs.async_save_file(temp_file, filecontent)
-            with zipfile.ZipFile(temp_file, "r") as zip_file:
-                zip_file.extractall(self.content.path.local)
-
-            def cleanup_temp_dir():
-                """Cleanup temp_dir."""
-                if os.path.exists(temp_dir):
-                    self.logger.debug("%s Cleaning up %s", self.string, temp_dir)
-                    shutil.rmtree(temp_dir)
-
-            if result:
+            if await self.async_download_and_extract_zip(
+                content.browser_download_url,
+                expected_size=getattr(content, "size", None),
+            ):
                 self.logger.info("%s Download of %s completed", self.string, content.name)
-                await self.hacs.hass.async_add_executor_job(cleanup_temp_dir)
                 return
 
             validate.errors.append(f"[{content.name}] was not downloaded")
         except BaseException:  # lgtm [py/catch-base-exception] pylint: disable=broad-except
             validate.errors.append("Download was not completed")
 
+    async def async_download_and_extract_zip(
+        self,
+        url: str,
+        *,
+        headers: dict | None = None,
+        expected_size: int | None = None,
+        members: Callable[[zipfile.ZipFile], list[zipfile.ZipInfo]] | None = None,
+    ) -> bool:
+        """Stream a ZIP archive to a temporary file and extract it in the executor."""
+        temp_dir = await self.hacs.hass.async_add_executor_job(tempfile.mkdtemp)
+        temp_file = f"{temp_dir}/{self.repository_manifest.filename or 'archive.zip'}"
+
+        def extract_zip_file():
+            """Extract the archive, one member at a time."""
+            with zipfile.ZipFile(temp_file, "r") as zip_file:
+                zip_file.extractall(
+                    self.content.path.local,
+                    members(zip_file) if members is not None else None,
+                )
+
+        def cleanup_temp_dir():
+            """Cleanup temp_dir."""
+            if os.path.exists(temp_dir):
+                self.logger.debug("%s Cleaning up %s", self.string, temp_dir)
+                shutil.rmtree(temp_dir)
+
+        try:
+            digest = await self.hacs.async_download_file_to_path(
+                url,
+                temp_file,
+                headers=headers,
+                expected_size=expected_size,
+            )
+            if digest is None:
+                return False
+            self.logger.debug("%s Downloaded %s (sha256 %s)", self.string, url, digest)
+            await self.hacs.hass.async_add_executor_job(extract_zip_file)
+            return True
+        finally:
+            await self.hacs.hass.async_add_executor_job(cleanup_temp_dir)
+
     async def download_content(self) -> None:
         """Download the content of a directory."""
         if self.hacs.configuration.experimental:
@@ -648,23 +730,8 @@ class HacsRepository:
 
         url = f"{BASE_API_URL}/repos/{self.data.full_name}/zipball/{ref}"
 
-        filecontent = await self.hacs.async_download_file(
-            url,
-            headers={
-                "Authorization": f"token {self.hacs.configuration.token}",
-                "User-Agent": f"HACS/{self.hacs.version}",
-            },
-        )
-        if filecontent is None:
-            raise HacsException(f"[{self}] Failed to download zipball")
-
-        temp_dir = await self.hacs.hass.async_add_executor_job(tempfile.mkdtemp)
-        temp_file = f"{temp_dir}/{self.repository_manifest.filename}"
-        result = await self.hacs.async_save_file(temp_file, filecontent)
-        if not result:
-            raise HacsException("Could not save ZIP file")
-
-        with zipfile.ZipFile(temp_file, "r") as zip_file:
+        def extractable_members(zip_file: zipfile.ZipFile) -> list[zipfile.ZipInfo]:
+            """Return the members below the remote path, relative to it."""
             extractable = []
             for path in zip_file.filelist:
                 filename = "/".join(path.filename.split("/")[1:])
@@ -674,16 +741,18 @@ class HacsRepository:
                 ):
                     path.filename = filename.replace(self.content.path.remote, "")
                     extractable.append(path)
+            return extractable
 
-            zip_file.extractall(self.content.path.local, extractable)
-
-        def cleanup_temp_dir():
-            """Cleanup temp_dir."""
-            if os.path.exists(temp_dir):
-                self.logger.debug("%s Cleaning up %s", self.string, temp_dir)
-                shutil.rmtree(temp_dir)
+        if not await self.async_download_and_extract_zip(
+            url,
+            headers={
+                "Authorization": f"token {self.hacs.configuration.token}",
+                "User-Agent": f"HACS/{self.hacs.version}",
+            },
+            members=extractable_members,
+        ):
+            raise HacsException(f"[{self}] Failed to download zipball")
 
-        await self.hacs.hass.async_add_executor_job(cleanup_temp_dir)
         self.logger.info("%s Content was extracted to %s", self.string, self.content.path.local)
 
     async def async_get_hacs_json(self, ref: str = None) -> dict[str, Any] | None:
@@ -750,6 +819,8 @@ class HacsRepository:
 
         if self.hacs.repositories.is_registered(repository_id=str(self.data.id)):
             self.hacs.repositories.unregister(self)
+        if self.hacs.github_session is not None:
+            self.hacs.github_session.async_prune_repository(self.data.full_name)
 
     async def uninstall(self) -> None:
         """Run uninstall tasks."""
@@ -838,7 +909,7 @@ class HacsRepository:
     async def async_pre_registration(self) -> None:
         """Run pre registration steps."""
 
-    @concurrent(concurrenttasks=10)
+    @concurrent(concurrenttasks=10, rate_limited=True)
     async def async_registration(self, ref=None) -> None:
         """Run registration steps."""
         await self.async_pre_registration()
@@ -944,10 +1015,14 @@ class HacsRepository:
             if os.path.exists(
                 f"{self.content.path.local}/{self.repository_manifest.persistent_directory}"
             ):
+                # Kept next to the local path, it is replaced while the content is downloaded
                 persistent_directory = Backup(
                     hacs=self.hacs,
                     local_path=f"{self.content.path.local}/{self.repository_manifest.persistent_directory}",
-                    backup_path=tempfile.gettempdir() + "/hacs_persistent_directory/",
+                    backup_path=(
+                        f"{os.path.dirname(self.content.path.local)}/"
+                        f"{PERSISTENT_BACKUP_PREFIX}{os.path.basename(self.content.path.local)}/"
+                    ),
                 )
                 await self.hacs.hass.async_add_executor_job(persistent_directory.create)
 
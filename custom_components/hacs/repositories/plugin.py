@@ -57,7 +57,7 @@ class HacsPluginRepository(HacsRepository):
         """Run post installation steps."""
         self.hacs.async_setup_frontend_endpoint_plugin()
 
-    @concurrent(concurrenttasks=10, backoff_time=5)
+    @concurrent(concurrenttasks=10, rate_limited=True)
     async def update_repository(self, ignore_issues=False, force=False):
         """Update."""
         if not await self.common_update(ignore_issues, force) and not force:
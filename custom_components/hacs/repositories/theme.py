@@ -74,7 +74,7 @@ class HacsThemeRepository(HacsRepository):
         if self.hacs.system.action:
             await self.hacs.validation.async_run_repository_checks(self)
 
-    @concurrent(concurrenttasks=10, backoff_time=5)
+    @concurrent(concurrenttasks=10, rate_limited=True)
     async def update_repository(self, ignore_issues=False, force=False):
         """Update."""
         if not await self.common_update(ignore_issues, force) and not force:
@@ -33,7 +33,7 @@ async def system_health_info(hass):
         "GitHub API Calls Remaining": response.data.resources.core.remaining,
         "Installed Version": hacs.version,
         "Stage": hacs.stage,
-        "Available Repositories": len(hacs.repositories.list_all),
+        "Available Repositories": hacs.repositories.count,
         "Downloaded Repositories": len(hacs.repositories.list_downloaded),
     }
 
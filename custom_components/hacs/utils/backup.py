@@ -3,8 +3,6 @@ from __future__ import annotations
 
 import os
 import shutil
-import tempfile
-from time import sleep
 from typing import TYPE_CHECKING
 
 from .path import is_safe
@@ -14,7 +12,42 @@ if TYPE_CHECKING:
     from ..repositories.base import HacsRepository
 
 
-DEFAULT_BACKUP_PATH = f"{tempfile.gettempdir()}/hacs_backup/"
+DEFAULT_BACKUP_PREFIX = ".hacs_backup_"
+PERSISTENT_BACKUP_PREFIX = ".hacs_persistent_"
+
+
+def _link_or_copy(source: str, destination: str) -> str:
+    """Hardlink a file, and copy it if that is not possible."""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+    return destination
+
+
+def _move(source: str, destination: str) -> None:
+    """Move a file or directory without copying the content when possible."""
+    try:
+        # Atomic on the same filesystem
+        os.replace(source, destination)
+        return
+    except OSError:
+        pass
+
+    if os.path.isfile(source):
+        _link_or_copy(source, destination)
+        os.remove(source)
+    else:
+        shutil.copytree(source, destination, copy_function=_link_or_copy)
+        shutil.rmtree(source)
+
+
+def _remove(path: str) -> None:
+    """Remove a file or directory."""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
 
 
 class Backup:
@@ -24,20 +57,21 @@ class Backup:
         self,
         hacs: HacsBase,
         local_path: str | None = None,
-        backup_path: str = DEFAULT_BACKUP_PATH,
+        backup_path: str | None = None,
         repository: HacsRepository | None = None,
     ) -> None:
         """initialize."""
         self.hacs = hacs
         self.repository = repository
-        self.local_path = local_path or repository.content.path.local
-        self.backup_path = backup_path
-        if repository:
-            self.backup_path = (
-                tempfile.gettempdir()
-                + f"/hacs_persistent_{repository.data.category}/"
-                + repository.data.name
-            )
+        self.local_path = (local_path or repository.content.path.local).rstrip("/")
+        # A hidden sibling is on the same filesystem, so the backup is a rename.
+        # Repository backups keep files that survive an upgrade, and use their own
+        # sibling so the backup of the whole local path does not clear them.
+        self.backup_path = backup_path or (
+            f"{os.path.dirname(self.local_path)}/"
+            f"{PERSISTENT_BACKUP_PREFIX if repository else DEFAULT_BACKUP_PREFIX}"
+            f"{os.path.basename(self.local_path)}/"
+        )
         self.backup_path_full = f"{self.backup_path}{self.local_path.split('/')[-1]}"
 
     def _init_backup_dir(self) -> bool:
@@ -48,27 +82,16 @@ class Backup:
             return False
         if os.path.exists(self.backup_path):
             shutil.rmtree(self.backup_path)
-
-            # Wait for the folder to be removed
-            while os.path.exists(self.backup_path):
-                sleep(0.1)
         os.makedirs(self.backup_path, exist_ok=True)
         return True
 
     def create(self) -> None:
-        """Create a backup in /tmp"""
+        """Move the local path to the backup path."""
         if not self._init_backup_dir():
             return
 
         try:
-            if os.path.isfile(self.local_path):
-                shutil.copyfile(self.local_path, self.backup_path_full)
-                os.remove(self.local_path)
-            else:
-                shutil.copytree(self.local_path, self.backup_path_full)
-                shutil.rmtree(self.local_path)
-                while os.path.exists(self.local_path):
-                    sleep(0.1)
+            _move(self.local_path, self.backup_path_full)
             self.hacs.log.debug(
                 "Backup for %s, created in %s",
                 self.local_path,
@@ -78,20 +101,13 @@ class Backup:
             self.hacs.log.warning("Could not create backup: %s", exception)
 
     def restore(self) -> None:
-        """Restore from backup."""
+        """Move the backup back in place of the local path."""
         if not os.path.exists(self.backup_path_full):
             return
 
-        if os.path.isfile(self.backup_path_full):
-            if os.path.exists(self.local_path):
-                os.remove(self.local_path)
-            shutil.copyfile(self.backup_path_full, self.local_path)
-        else:
-            if os.path.exists(self.local_path):
-                shutil.rmtree(self.local_path)
-                while os.path.exists(self.local_path):
-                    sleep(0.1)
-            shutil.copytree(self.backup_path_full, self.local_path)
+        if os.path.lexists(self.local_path):
+            _remove(self.local_path)
+        _move(self.backup_path_full, self.local_path)
         self.hacs.log.debug("Restored %s, from backup %s", self.local_path, self.backup_path_full)
 
     def cleanup(self) -> None:
@@ -100,10 +116,6 @@ class Backup:
             return
 
         shutil.rmtree(self.backup_path)
-
-        # Wait for the folder to be removed
-        while os.path.exists(self.backup_path):
-            sleep(0.1)
         self.hacs.log.debug("Backup dir %s cleared", self.backup_path)
 
 
@@ -111,7 +123,7 @@ class BackupNetDaemon(Backup):
     """BackupNetDaemon."""
 
     def create(self) -> None:
-        """Create a backup in /tmp"""
+        """Copy the yaml files to the backup path."""
         if not self._init_backup_dir():
             return
 
@@ -124,7 +136,7 @@ class BackupNetDaemon(Backup):
             shutil.copyfile(source_file_name, target_file_name)
 
     def restore(self) -> None:
-        """Create a backup in /tmp"""
+        """Copy the yaml files back to the local path."""
         if not os.path.exists(self.backup_path):
             return
 
@@ -3,19 +3,22 @@ from __future__ import annotations
 
 import asyncio
 from datetime import datetime
+import json
+import zlib
 from typing import Any
 
 from homeassistant.core import callback
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.util import json as json_util
 
-from ..base import HacsBase
+from ..base import HacsBase, HacsRepositoryRecord
 from ..const import HACS_REPOSITORY_ID
 from ..enums import HacsDisabledReason, HacsDispatchEvent
+from ..repositories import RERPOSITORY_CLASSES
 from ..repositories.base import TOPIC_FILTER, HacsManifest, HacsRepository
 from .logger import LOGGER
 from .path import is_safe
-from .store import async_load_from_store, async_save_to_store
+from .store import async_load_from_store, get_store_for_key, get_store_key
 
 EXPORTED_BASE_DATA = (
     ("new", False),
@@ -53,6 +56,24 @@ EXPORTED_DOWNLOADED_REPOSITORY_DATA = EXPORTED_REPOSITORY_DATA + (
     ("show_beta", False),
 )
 
+REPOSITORY_STORE_SHARDS = 16
+
+
+def repository_store_shard(repository_id: str) -> int:
+    """Return the shard of the repositories store that holds a repository."""
+    if repository_id.isdigit():
+        return int(repository_id) % REPOSITORY_STORE_SHARDS
+    return zlib.crc32(repository_id.encode("utf-8")) % REPOSITORY_STORE_SHARDS
+
+
+def _copy_value(value: Any) -> Any:
+    """Copy containers so stored entries do not share state with the repository."""
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
 
 class HacsData:
     """HacsData class."""
@@ -62,6 +83,11 @@ class HacsData:
         self.logger = LOGGER
         self.hacs = hacs
         self.content = {}
+        self._shards: dict[int, dict[str, dict[str, Any]]] = {
+            shard: {} for shard in range(REPOSITORY_STORE_SHARDS)
+        }
+        self._store_hashes: dict[str, int] = {}
+        self._legacy_repositories_store = False
 
     async def async_force_write(self, _=None):
         """Force write."""
@@ -75,8 +101,7 @@ class HacsData:
         self.logger.debug("<HacsData async_write> Saving data")
 
         # Hacs
-        await async_save_to_store(
-            self.hacs.hass,
+        await self._async_save_if_changed(
             "hacs",
             {
                 "archived_repositories": self.hacs.common.archived_repositories,
@@ -88,32 +113,89 @@ class HacsData:
             await self._async_store_experimental_content_and_repos()
         await self._async_store_content_and_repos()
 
+    async def _async_save_if_changed(self, key: str, data: Any) -> None:
+        """Save data to the store if it differs from what was last loaded or saved."""
+        data_hash = hash(json.dumps(data, sort_keys=True, default=str))
+        if self._store_hashes.get(key) == data_hash:
+            self.logger.debug(
+                "<HacsData async_write> Did not store data for '%s'. Content did not change",
+                get_store_key(key),
+            )
+            return
+        await get_store_for_key(self.hacs.hass, key).async_save(data)
+        self._store_hashes[key] = data_hash
+
+    def _restore_store_hash(self, key: str, data: Any) -> None:
+        """Remember the hash of data loaded from the store."""
+        self._store_hashes[key] = hash(json.dumps(data, sort_keys=True, default=str))
+
     async def _async_store_content_and_repos(self, _=None):  # bb: ignore
-        """Store the main repos file and each repo that is out of date."""
+        """Store the shards of the repositories store that are out of date."""
         # Repositories
+        previous = self.content
         self.content = {}
-        for repository in self.hacs.repositories.list_all:
-            if repository.data.category in self.hacs.common.categories:
-                self.async_store_repository_data(repository)
-
-        await async_save_to_store(self.hacs.hass, "repositories", self.content)
+        dirty = set()
+        categories = self.hacs.common.categories
+        for repository in self.hacs.repositories.list_loaded_by_category(categories):
+            repository_id = str(repository.data.id)
+            data = self.async_store_repository_data(repository)
+            if previous.get(repository_id) != data:
+                dirty.add(repository_store_shard(repository_id))
+                self._shards[repository_store_shard(repository_id)][repository_id] = data
+
+        for record in self.hacs.repositories.list_records_by_category(categories):
+            self.content[record.id] = record.data
+            if previous.get(record.id) != record.data:
+                dirty.add(repository_store_shard(record.id))
+                self._shards[repository_store_shard(record.id)][record.id] = record.data
+
+        for repository_id in previous.keys() - self.content.keys():
+            dirty.add(repository_store_shard(repository_id))
+            self._shards[repository_store_shard(repository_id)].pop(repository_id, None)
+
+        self.logger.debug("<HacsData async_write> Saving %s repository shards", len(dirty))
+        await asyncio.gather(
+            *(
+                get_store_for_key(self.hacs.hass, f"repositories.{shard}").async_save(
+                    dict(self._shards[shard])
+                )
+                for shard in dirty
+            )
+        )
+        if self._legacy_repositories_store:
+            self.logger.debug("<HacsData async_write> Removing the unsharded repositories store")
+            await get_store_for_key(self.hacs.hass, "repositories").async_remove()
+            self._legacy_repositories_store = False
         for event in (HacsDispatchEvent.REPOSITORY, HacsDispatchEvent.CONFIG):
             self.hacs.async_dispatch(event, {})
 
     async def _async_store_experimental_content_and_repos(self, _=None):  # bb: ignore
         """Store the main repos file and each repo that is out of date."""
         # Repositories
-        self.content = {}
-        for repository in self.hacs.repositories.list_all:
-            if repository.data.category in self.hacs.common.categories:
-                self.async_store_experimental_repository_data(repository)
+        content, self.content = self.content, {}
+        categories = self.hacs.common.categories
+        for repository in self.hacs.repositories.list_loaded_by_category(categories):
+            self.async_store_experimental_repository_data(repository)
+
+        for record in self.hacs.repositories.list_records_by_category(categories):
+            self.content.setdefault(record.category, []).append(
+                {
+                    "id": record.id,
+                    **{
+                        key: record.data[key]
+                        for key, default in EXPORTED_BASE_DATA
+                        if record.data.get(key, default) != default
+                    },
+                }
+            )
 
-        await async_save_to_store(self.hacs.hass, "data", {"repositories": self.content})
+        content, self.content = self.content, content
+        await self._async_save_if_changed("data", {"repositories": content})
 
     @callback
     def async_store_repository_data(self, repository: HacsRepository) -> dict:
         """Store the repository data."""
-        data = {"repository_manifest": repository.repository_manifest.manifest}
+        data = {"repository_manifest": _copy_value(repository.repository_manifest.manifest)}
 
         for key, default in (
             EXPORTED_DOWNLOADED_REPOSITORY_DATA
@@ -121,7 +203,7 @@ class HacsData:
             else EXPORTED_REPOSITORY_DATA
         ):
             if (value := getattr(repository.data, key, default)) != default:
-                data[key] = value
+                data[key] = _copy_value(value)
 
         if repository.data.installed_version:
             data["version_installed"] = repository.data.installed_version
@@ -129,6 +211,7 @@ class HacsData:
             data["last_fetched"] = repository.data.last_fetched.timestamp()
 
         self.content[str(repository.data.id)] = data
+        return data
 
     @callback
     def async_store_experimental_repository_data(self, repository: HacsRepository) -> None:
@@ -161,32 +244,28 @@ class HacsData:
 
         try:
             hacs = await async_load_from_store(self.hacs.hass, "hacs") or {}
+            self._restore_store_hash("hacs", hacs)
         except HomeAssistantError:
             pass
 
         try:
-            data = (
-                await async_load_from_store(
-                    self.hacs.hass,
-                    "data" if self.hacs.configuration.experimental else "repositories",
-                )
-                or {}
-            )
-            if data and self.hacs.configuration.experimental:
+            data = {}
+            if self.hacs.configuration.experimental:
+                data = await async_load_from_store(self.hacs.hass, "data") or {}
+                self._restore_store_hash("data", data)
+            if data:
                 for category, entries in data.get("repositories", {}).items():
                     for repository in entries:
                         repositories[repository["id"]] = {"category": category, **repository}
             else:
-                repositories = (
-                    data or await async_load_from_store(self.hacs.hass, "repositories") or {}
-                )
+                repositories = await self.async_restore_repositories_store()
         except HomeAssistantError as exception:
             self.hacs.log.error(
                 "Could not read %s, restore the file from a backup - %s",
                 self.hacs.hass.config.path(
                     ".storage/hacs.data"
                     if self.hacs.configuration.experimental
-                    else ".storage/hacs.repositories"
+                    else ".storage/hacs.repositories.*"
                 ),
                 exception,
             )
@@ -238,6 +317,9 @@ class HacsData:
                         "<HacsData restore> Found repository with ID %s - %s", entry, repo_data
                     )
                     continue
+                if self.hacs.repositories.get_record(entry) is not None:
+                    # Catalogue records are restored when they are first accessed
+                    continue
                 self.async_restore_repository(entry, repo_data)
 
             self.logger.info("<HacsData restore> Restore done")
@@ -248,23 +330,101 @@ class HacsData:
             return False
         return True
 
+    async def async_restore_repositories_store(self) -> dict[str, dict[str, Any]]:
+        """Load the repositories store shards, falling back to the unsharded store."""
+        shards = await asyncio.gather(
+            *(
+                async_load_from_store(self.hacs.hass, f"repositories.{shard}")
+                for shard in range(REPOSITORY_STORE_SHARDS)
+            )
+        )
+        repositories = {}
+        for shard, entries in enumerate(shards):
+            self._shards[shard] = dict(entries or {})
+            repositories.update(self._shards[shard])
+
+        if repositories:
+            self.content = dict(repositories)
+            return repositories
+
+        # Migrate from the unsharded store, every shard is written on the next write
+        # and the unsharded store is removed once that write succeeded
+        repositories = await async_load_from_store(self.hacs.hass, "repositories") or {}
+        self._legacy_repositories_store = bool(repositories)
+        return repositories
+
     async def register_unknown_repositories(self, repositories, category: str | None = None):
         """Registry any unknown repositories."""
-        register_tasks = [
-            self.hacs.async_register_repository(
-                repository_full_name=repo_data["full_name"],
-                category=repo_data.get("category", category),
-                check=False,
-                repository_id=entry,
-            )
-            for entry, repo_data in repositories.items()
-            if entry != "0"
-            and not self.hacs.repositories.is_registered(repository_id=entry)
-            and repo_data.get("category", category) is not None
-        ]
+        register_tasks = []
+        for entry, repo_data in repositories.items():
+            if (
+                entry == "0"
+                or self.hacs.repositories.is_registered(repository_id=entry)
+                or (repository_category := repo_data.get("category", category)) is None
+            ):
+                continue
+            if repo_data.get("installed") or entry == HACS_REPOSITORY_ID:
+                register_tasks.append(
+                    self.hacs.async_register_repository(
+                        repository_full_name=repo_data["full_name"],
+                        category=repository_category,
+                        check=False,
+                        repository_id=entry,
+                    )
+                )
+            elif category is not None:
+                # Found in a category fetch, new like repositories registered at runtime
+                self.async_register_repository_record(
+                    entry,
+                    repository_category,
+                    {"new": not self.hacs.status.new, **repo_data},
+                )
+            else:
+                self.async_register_repository_record(entry, repository_category, repo_data)
         if register_tasks:
             await asyncio.gather(*register_tasks)
 
+    @callback
+    def async_register_repository_record(
+        self,
+        entry: str,
+        category: str,
+        repository_data: dict[str, Any],
+    ) -> None:
+        """Register a catalogue record that is loaded when it is first accessed."""
+        full_name = repository_data["full_name"]
+        if (renamed := self.hacs.common.renamed_repositories.get(full_name)) is not None:
+            full_name = renamed
+        self.hacs.repositories.register_record(
+            HacsRepositoryRecord(
+                entry,
+                full_name,
+                category,
+                {**repository_data, "category": category, "full_name": full_name},
+            )
+        )
+
+    @callback
+    def async_load_repository_record(self, record: HacsRepositoryRecord) -> HacsRepository | None:
+        """Create the repository object for a catalogue record without registering it."""
+        if record.category not in RERPOSITORY_CLASSES:
+            return None
+        repository: HacsRepository = RERPOSITORY_CLASSES[record.category](
+            self.hacs, record.full_name
+        )
+        repository.data.id = record.id
+        if self.hacs.status.new:
+            repository.data.new = False
+        self.async_restore_repository_data(repository, record.id, record.data)
+        return repository
+
+    @callback
+    def async_hydrate_repository(self, record: HacsRepositoryRecord) -> HacsRepository | None:
+        """Create and register the repository object for a catalogue record."""
+        if (repository := self.async_load_repository_record(record)) is not None:
+            self.hacs.repositories.register(repository)
+        return repository
+
     @callback
     def async_restore_repository(self, entry: str, repository_data: dict[str, Any]):
         """Restore repository."""
@@ -276,8 +436,17 @@ class HacsData:
         if not repository:
             return
 
-        # Restore repository attributes
         self.hacs.repositories.set_repository_id(repository, entry)
+        self.async_restore_repository_data(repository, entry, repository_data)
+
+    @callback
+    def async_restore_repository_data(
+        self,
+        repository: HacsRepository,
+        entry: str,
+        repository_data: dict[str, Any],
+    ) -> None:
+        """Restore repository attributes from stored data."""
         repository.data.authors = repository_data.get("authors", [])
         repository.data.description = repository_data.get("description", "")
         repository.data.downloads = repository_data.get("downloads", 0)
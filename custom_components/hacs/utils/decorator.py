@@ -5,17 +5,26 @@ import asyncio
 from functools import wraps
 from typing import TYPE_CHECKING, Any, Coroutine
 
-from ..const import DEFAULT_CONCURRENT_BACKOFF_TIME, DEFAULT_CONCURRENT_TASKS
+from ..const import DEFAULT_CONCURRENT_TASKS
+from .logger import LOGGER
+from .queue_manager import RATE_LIMIT_TOKEN_HELD
 
 if TYPE_CHECKING:
     from ..base import HacsBase
 
+_LOGGER = LOGGER
+
 
 def concurrent(
     concurrenttasks: int = DEFAULT_CONCURRENT_TASKS,
-    backoff_time: int = DEFAULT_CONCURRENT_BACKOFF_TIME,
+    rate_limited: bool = False,
 ) -> Coroutine[Any, Any, None]:
-    """Return a modified function."""
+    """Return a modified function.
+
+    At most concurrenttasks calls run at the same time, and a slot is released as soon as
+    the call returns. Rate limited calls first take a token from the rate limiter of the
+    HACS queue, unless the caller already holds one.
+    """
 
     max_concurrent = asyncio.Semaphore(concurrenttasks)
 
@@ -24,17 +33,27 @@ def concurrent(
         async def wrapper(*args, **kwargs) -> None:
             hacs: HacsBase = getattr(args[0], "hacs", None)
 
-            async with max_concurrent:
-                result = await function(*args, **kwargs)
-                if (
-                    hacs is None
-                    or hacs.queue is None
-                    or hacs.queue.has_pending_tasks
-                    or "update" not in function.__name__
-                ):
-                    await asyncio.sleep(backoff_time)
-
-                return result
+            token = None
+            if (
+                rate_limited
+                and not RATE_LIMIT_TOKEN_HELD.get()
+                and hacs is not None
+                and hacs.queue is not None
+                and hacs.queue.rate_limiter is not None
+            ):
+                if not await hacs.queue.rate_limiter.acquire():
+                    _LOGGER.debug(
+                        "<concurrent> No rate limit token available for %s, running it anyway",
+                        function.__name__,
+                    )
+                token = RATE_LIMIT_TOKEN_HELD.set(True)
+
+            try:
+                async with max_concurrent:
+                    return await function(*args, **kwargs)
+            finally:
+                if token is not None:
+                    RATE_LIMIT_TOKEN_HELD.reset(token)
 
         return wrapper
 
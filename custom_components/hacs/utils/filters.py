@@ -44,3 +44,15 @@ def get_first_directory_in_directory(content: list[str | Any], dirname: str) ->
                 directory = path.filename
                 break
     return directory
+
+
+def ignored_by_country(configuration: str, countries: list[str] | str | None) -> bool:
+    """Return True if the configured country is not one of countries."""
+    configuration = configuration.lower()
+    if configuration == "all":
+        return False
+
+    manifest = [entry.lower() for entry in countries or []]
+    if not manifest:
+        return False
+    return configuration not in manifest
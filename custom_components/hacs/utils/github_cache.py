@@ -0,0 +1,238 @@
+"""Conditional request cache in front of the GitHub clients."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from typing import Any
+
+from aiohttp import ClientResponse, ClientSession, hdrs
+from homeassistant.core import HomeAssistant, callback
+from multidict import CIMultiDict, CIMultiDictProxy, MultiDict, MultiDictProxy
+from yarl import URL
+
+from ..exceptions import HacsException
+from .json import json_loads
+from .logger import LOGGER
+from .store import async_load_from_store, async_remove_store, get_store_for_key
+
+_LOGGER = LOGGER
+
+CACHE_INDEX_KEY = "github_cache"
+CACHE_INDEX_SAVE_DELAY = 30
+CACHE_MAX_AGE = 30 * 24 * 60 * 60
+CACHE_MAX_ENTRIES = 2500
+CACHE_KEY_HEADERS = (hdrs.ACCEPT,)
+CONDITIONAL_HEADERS = (hdrs.IF_NONE_MATCH, hdrs.IF_MODIFIED_SINCE)
+ENCODING_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+FRESH_HEADERS = (
+    hdrs.DATE,
+    "X-RateLimit-Limit",
+    "X-RateLimit-Remaining",
+    "X-RateLimit-Reset",
+    "X-RateLimit-Used",
+    "X-RateLimit-Resource",
+)
+
+
+class HacsCachedResponse:
+    """A stored GitHub response that is replayed after a 304."""
+
+    def __init__(self, entry: dict[str, Any], response: ClientResponse) -> None:
+        headers = CIMultiDict(entry["headers"])
+        for header in FRESH_HEADERS:
+            if header in response.headers:
+                headers[header] = response.headers[header]
+        self.method = response.method
+        self.url = response.url
+        self.status = entry["status"]
+        self.reason = "OK"
+        self.headers = CIMultiDictProxy(headers)
+        self.content_type = headers.get(hdrs.CONTENT_TYPE, "").split(";")[0]
+        self.links = MultiDictProxy(MultiDict())
+        self._body: str = entry["body"]
+
+    @property
+    def ok(self) -> bool:  # pylint: disable=invalid-name
+        """Return True, only successful responses are stored."""
+        return True
+
+    async def read(self) -> bytes:
+        """Return the stored body."""
+        return self._body.encode("utf-8")
+
+    async def text(self, *_, **__) -> str:
+        """Return the stored body."""
+        return self._body
+
+    async def json(self, *_, **__) -> Any:
+        """Return the stored body decoded as JSON."""
+        return json_loads(self._body)
+
+    def raise_for_status(self) -> None:
+        """Stored responses are always successful."""
+
+    def release(self) -> None:
+        """Nothing to release."""
+
+    def close(self) -> None:
+        """Nothing to close."""
+
+
+class HacsGitHubSession:
+    """Client session that makes GitHub GET requests conditional and serves 304s from disk."""
+
+    def __init__(self, hass: HomeAssistant, session: ClientSession) -> None:
+        self.hass = hass
+        self.session = session
+        self.index: dict[str, dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self._index_store = get_store_for_key(hass, CACHE_INDEX_KEY)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.session, name)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Return cache counters."""
+        return {
+            "entries": len(self.index),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stored": self.stored,
+        }
+
+    async def async_load(self) -> None:
+        """Load the cache index and drop entries that were not used for a long time."""
+        self.index = await async_load_from_store(self.hass, CACHE_INDEX_KEY) or {}
+        expired = time.time() - CACHE_MAX_AGE
+        await self._async_evict(
+            [key for key, cached in self.index.items() if cached.get("used", 0) < expired]
+        )
+        _LOGGER.debug("<HacsGitHubSession> Loaded %s cached GitHub responses", len(self.index))
+
+    @callback
+    def async_prune_repository(self, full_name: str) -> None:
+        """Drop cached responses for a repository that is no longer tracked."""
+        prefix = f"/repos/{full_name.lower()}"
+        if keys := [
+            key
+            for key, cached in self.index.items()
+            if (path := cached.get("path", "").lower()) == prefix or path.startswith(f"{prefix}/")
+        ]:
+            self.hass.async_create_task(self._async_evict(keys))
+
+    async def get(self, url: str | URL, **kwargs) -> ClientResponse | HacsCachedResponse:
+        """Perform a GET request."""
+        return await self.request(hdrs.METH_GET, url, **kwargs)
+
+    async def post(self, url: str | URL, **kwargs) -> ClientResponse:
+        """Perform a POST request."""
+        return await self.session.request(hdrs.METH_POST, url, **kwargs)
+
+    async def request(
+        self,
+        method: str,
+        url: str | URL,
+        **kwargs,
+    ) -> ClientResponse | HacsCachedResponse:
+        """Perform a request, GET requests are made conditional when possible."""
+        headers = CIMultiDict(kwargs.pop("headers", None) or {})
+        if method.upper() != hdrs.METH_GET or any(
+            header in headers for header in CONDITIONAL_HEADERS
+        ):
+            return await self.session.request(method, url, headers=headers, **kwargs)
+
+        key = self._cache_key(url, kwargs.get("params"), headers)
+        if (cached := self.index.get(key)) is not None:
+            if cached.get("etag"):
+                headers[hdrs.IF_NONE_MATCH] = cached["etag"]
+            if cached.get("last_modified"):
+                headers[hdrs.IF_MODIFIED_SINCE] = cached["last_modified"]
+
+        response = await self.session.request(method, url, headers=headers, **kwargs)
+
+        if response.status == 304 and cached is not None:
+            if entry := await self._async_load_entry(key):
+                self.hits += 1
+                response.release()
+                cached["used"] = int(time.time())
+                self._async_schedule_index_save()
+                return HacsCachedResponse(entry, response)
+            # The body is gone, drop the validators and fetch it again
+            self.index.pop(key, None)
+            response.release()
+            headers.popall(hdrs.IF_NONE_MATCH, None)
+            headers.popall(hdrs.IF_MODIFIED_SINCE, None)
+            response = await self.session.request(method, url, headers=headers, **kwargs)
+
+        self.misses += 1
+        if response.status == 200 and "json" in response.content_type:
+            await self._async_store(key, URL(url).path, response)
+        return response
+
+    async def _async_load_entry(self, key: str) -> dict[str, Any] | None:
+        try:
+            return await async_load_from_store(self.hass, self._entry_store_key(key))
+        except HacsException:
+            return None
+
+    async def _async_store(self, key: str, path: str, response: ClientResponse) -> None:
+        etag = response.headers.get(hdrs.ETAG)
+        last_modified = response.headers.get(hdrs.LAST_MODIFIED)
+        if etag is None and last_modified is None:
+            return
+        await get_store_for_key(self.hass, self._entry_store_key(key)).async_save(
+            {
+                "status": response.status,
+                "headers": {
+                    header: value
+                    for header, value in response.headers.items()
+                    if header.lower() not in ENCODING_HEADERS
+                },
+                "body": await response.text(encoding="utf-8"),
+            }
+        )
+        self.index[key] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "path": path,
+            "used": int(time.time()),
+        }
+        self.stored += 1
+        if len(self.index) > CACHE_MAX_ENTRIES:
+            await self._async_evict(
+                sorted(self.index, key=lambda item: self.index[item].get("used", 0))[
+                    : len(self.index) - CACHE_MAX_ENTRIES
+                ]
+            )
+        self._async_schedule_index_save()
+
+    async def _async_evict(self, keys: list[str]) -> None:
+        """Remove entries from the index and delete their stored responses."""
+        if not keys:
+            return
+        for key in keys:
+            self.index.pop(key, None)
+        await asyncio.gather(
+            *[async_remove_store(self.hass, self._entry_store_key(key)) for key in keys]
+        )
+        self._async_schedule_index_save()
+        _LOGGER.debug("<HacsGitHubSession> Evicted %s cached GitHub responses", len(keys))
+
+    @callback
+    def _async_schedule_index_save(self) -> None:
+        self._index_store.async_delay_save(lambda: self.index, CACHE_INDEX_SAVE_DELAY)
+
+    @staticmethod
+    def _cache_key(url: str | URL, params: Any, headers: CIMultiDict) -> str:
+        key = str(URL(url).update_query(params or {}))
+        for header in CACHE_KEY_HEADERS:
+            key += f"\n{header}: {headers.get(header, '')}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _entry_store_key(key: str) -> str:
+        return f"hacs/github_cache/{key}"
@@ -2,80 +2,268 @@
 from __future__ import annotations
 
 import asyncio
+from collections import deque
+from collections.abc import Mapping
+from contextvars import ContextVar
+import math
 import time
-from typing import Coroutine
+from typing import Any, Coroutine
 
 from homeassistant.core import HomeAssistant
 
+from ..const import (
+    DEFAULT_CONCURRENT_TASKS,
+    QUEUE_RATE_LIMIT_BURST,
+    QUEUE_RATE_LIMIT_MAX_WAIT,
+    QUEUE_RATE_LIMIT_RESERVE,
+    QUEUE_RATE_LIMIT_TASK_COST,
+    QUEUE_RATE_LIMIT_WINDOW,
+)
+from ..enums import HacsQueuePriority
 from ..exceptions import HacsExecutionStillInProgress
 from .logger import LOGGER
 
 _LOGGER = LOGGER
 
+RATE_LIMIT_HEADERS = (
+    ("x_ratelimit_remaining", "X-RateLimit-Remaining"),
+    ("x_ratelimit_limit", "X-RateLimit-Limit"),
+    ("x_ratelimit_reset", "X-RateLimit-Reset"),
+)
+
+# Set while the current task holds a rate limiter token, so nested calls do not take another
+RATE_LIMIT_TOKEN_HELD: ContextVar[bool] = ContextVar("hacs_rate_limit_token_held", default=False)
+
+
+class QueueRateLimiter:
+    """Token bucket that spreads queued tasks over the GitHub rate limit window."""
+
+    def __init__(
+        self,
+        *,
+        burst: int = QUEUE_RATE_LIMIT_BURST,
+        max_wait: float = QUEUE_RATE_LIMIT_MAX_WAIT,
+        reserve: int = QUEUE_RATE_LIMIT_RESERVE,
+        task_cost: int = QUEUE_RATE_LIMIT_TASK_COST,
+        window: int = QUEUE_RATE_LIMIT_WINDOW,
+    ) -> None:
+        self.burst = burst
+        self.max_wait = max_wait
+        self.reserve = reserve
+        self.task_cost = task_cost
+        self.window = window
+        self.limit: int | None = None
+        self.reset: float | None = None
+        self.rate: float | None = None
+        self.budget = 0.0
+        self.tokens = 0.0
+        self._refilled = time.time()
+
+    def update(self, remaining: int, limit: int, reset: float) -> None:
+        """Update the bucket from the rate limit reported by GitHub."""
+        synced = self.rate is not None
+        self._refill()
+        now = time.time()
+        self.limit = limit
+        self.reset = reset
+        self.budget = max(0.0, (remaining - self.reserve) / self.task_cost)
+        self.rate = self.budget / max(1.0, reset - now)
+        self.tokens = min(self.tokens if synced else self.burst, self.budget)
+
+    def update_from_headers(self, headers: Any) -> None:
+        """Update the bucket from the rate limit headers of a GitHub response."""
+        if headers is None:
+            return
+        values = []
+        for attribute, header in RATE_LIMIT_HEADERS:
+            value = getattr(headers, attribute, None)
+            if value is None and isinstance(headers, Mapping):
+                value = headers.get(header)
+            if value is None:
+                return
+            values.append(int(value))
+        self.update(*values)
+
+    def exhaust(self) -> None:
+        """Stop handing out tokens until the rate limit resets."""
+        self._refill()
+        if self.reset is None or self.reset <= time.time():
+            self.reset = time.time() + self.window
+        self.budget = 0.0
+        self.tokens = 0.0
+        self.rate = 0.0
+
+    async def acquire(self) -> bool:
+        """Wait for a token, return False if none is available within max_wait."""
+        while True:
+            if self.rate is None:
+                return True
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.budget -= 1
+                return True
+            wait = (1 - self.tokens) / self.rate if self.rate > 0 else math.inf
+            if self.reset is not None:
+                wait = min(wait, max(0.0, self.reset - time.time()))
+            if wait > self.max_wait:
+                return False
+            await asyncio.sleep(wait)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the current state of the bucket."""
+        self._refill()
+        return {
+            "tokens": self.tokens,
+            "budget": self.budget,
+            "rate": self.rate,
+            "reset": self.reset,
+        }
+
+    def _refill(self) -> None:
+        now = time.time()
+        if self.rate is None:
+            self._refilled = now
+            return
+        if self.reset is not None and now >= self.reset:
+            self.budget = max(0.0, ((self.limit or 0) - self.reserve) / self.task_cost)
+            self.reset += self.window * math.ceil((now - self.reset + 1) / self.window)
+            self.rate = self.budget / max(1.0, self.reset - now)
+            self.tokens = min(self.tokens, self.burst)
+        self.tokens = min(self.burst, self.budget, self.tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
 
 class QueueManager:
     """The QueueManager class."""
 
-    def __init__(self, hass: HomeAssistant) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        *,
+        workers: int = DEFAULT_CONCURRENT_TASKS,
+        rate_limiter: QueueRateLimiter | None = None,
+    ) -> None:
         self.hass = hass
-        self.queue: list[Coroutine] = []
+        self.workers = workers
+        self.rate_limiter = rate_limiter
+        self.lanes: dict[HacsQueuePriority, deque[tuple[float, Coroutine]]] = {
+            priority: deque() for priority in sorted(HacsQueuePriority)
+        }
         self.running = False
+        self.active_tasks = 0
+        self.completed_tasks = 0
+        self.failed_tasks = 0
+        self.wait_time = 0.0
+        self.run_time = 0.0
+        self.max_run_time = 0.0
 
     @property
     def pending_tasks(self) -> int:
         """Return a count of pending tasks in the queue."""
-        return len(self.queue)
+        return sum(len(lane) for lane in self.lanes.values())
 
     @property
     def has_pending_tasks(self) -> bool:
         """Return a count of pending tasks in the queue."""
         return self.pending_tasks != 0
 
+    @property
+    def metrics(self) -> dict[str, Any]:
+        """Return queue depth and task latency metrics."""
+        finished = self.completed_tasks + self.failed_tasks
+        return {
+            "running": self.running,
+            "pending": {priority.name.lower(): len(lane) for priority, lane in self.lanes.items()},
+            "active": self.active_tasks,
+            "completed": self.completed_tasks,
+            "failed": self.failed_tasks,
+            "average_wait_time": self.wait_time / finished if finished else 0.0,
+            "average_run_time": self.run_time / finished if finished else 0.0,
+            "max_run_time": self.max_run_time,
+            "rate_limit": self.rate_limiter.as_dict() if self.rate_limiter else None,
+        }
+
     def clear(self) -> None:
         """Clear the queue."""
-        self.queue = []
+        for lane in self.lanes.values():
+            while lane:
+                lane.popleft()[1].close()
 
-    def add(self, task: Coroutine) -> None:
+    def add(self, task: Coroutine, priority: HacsQueuePriority = HacsQueuePriority.DEFAULT) -> None:
         """Add a task to the queue."""
-        self.queue.append(task)
+        self.lanes[priority].append((time.monotonic(), task))
 
     async def execute(self, number_of_tasks: int | None = None) -> None:
         """Execute the tasks in the queue."""
         if self.running:
             _LOGGER.debug("<QueueManager> Execution is already running")
             raise HacsExecutionStillInProgress
-        if len(self.queue) == 0:
+        if not self.has_pending_tasks:
             _LOGGER.debug("<QueueManager> The queue is empty")
             return
 
         self.running = True
+        limit = number_of_tasks or math.inf
+        checked_out = 0
 
-        _LOGGER.debug("<QueueManager> Checking out tasks to execute")
-        local_queue = []
-
-        if number_of_tasks:
-            for task in self.queue[:number_of_tasks]:
-                local_queue.append(task)
-        else:
-            for task in self.queue:
-                local_queue.append(task)
-
-        for task in local_queue:
-            self.queue.remove(task)
+        async def _worker() -> None:
+            nonlocal checked_out
+            while checked_out < limit:
+                if (entry := self._checkout()) is None:
+                    return
+                priority, (queued, task) = entry
+                checked_out += 1
+                if self.rate_limiter is not None and not await self.rate_limiter.acquire():
+                    _LOGGER.debug("<QueueManager> Rate limit reached, pausing execution")
+                    self.lanes[priority].appendleft((queued, task))
+                    checked_out = limit
+                    return
+                await self._run(queued, task, self.rate_limiter is not None)
 
-        _LOGGER.debug("<QueueManager> Starting queue execution for %s tasks", len(local_queue))
+        _LOGGER.debug(
+            "<QueueManager> Starting queue execution for %s tasks with %s workers",
+            min(limit, self.pending_tasks),
+            self.workers,
+        )
         start = time.time()
-        result = await asyncio.gather(*local_queue, return_exceptions=True)
-        for entry in result:
-            if isinstance(entry, Exception):
-                _LOGGER.error("<QueueManager> %s", entry)
-        end = time.time() - start
+        completed = self.completed_tasks + self.failed_tasks
+        try:
+            await asyncio.gather(
+                *(_worker() for _ in range(max(1, min(self.workers, limit, self.pending_tasks))))
+            )
+        finally:
+            self.running = False
 
         _LOGGER.debug(
             "<QueueManager> Queue execution finished for %s tasks finished in %.2f seconds",
-            len(local_queue),
-            end,
+            self.completed_tasks + self.failed_tasks - completed,
+            time.time() - start,
         )
         if self.has_pending_tasks:
-            _LOGGER.debug("<QueueManager> %s tasks remaining in the queue", len(self.queue))
-        self.running = False
+            _LOGGER.debug("<QueueManager> %s tasks remaining in the queue", self.pending_tasks)
+
+    def _checkout(self) -> tuple[HacsQueuePriority, tuple[float, Coroutine]] | None:
+        for priority, lane in self.lanes.items():
+            if lane:
+                return priority, lane.popleft()
+        return None
+
+    async def _run(self, queued: float, task: Coroutine, token_held: bool) -> None:
+        start = time.monotonic()
+        self.wait_time += start - queued
+        self.active_tasks += 1
+        token = RATE_LIMIT_TOKEN_HELD.set(token_held)
+        try:
+            await task
+        except Exception as exception:  # pylint: disable=broad-except
+            self.failed_tasks += 1
+            _LOGGER.error("<QueueManager> %s", exception)
+        else:
+            self.completed_tasks += 1
+        finally:
+            RATE_LIMIT_TOKEN_HELD.reset(token)
+            self.active_tasks -= 1
+            run_time = time.monotonic() - start
+            self.run_time += run_time
+            self.max_run_time = max(self.max_run_time, run_time)
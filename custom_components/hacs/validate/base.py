@@ -1,19 +1,79 @@
 """Base class for validation."""
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
 
 from ..enums import HacsCategory
 from ..exceptions import HacsException
 
 if TYPE_CHECKING:
+    from ..base import HacsBase
     from ..repositories.base import HacsRepository
 
+BRANDS_URL = "https://brands.home-assistant.io/domains.json"
+
 
 class ValidationException(HacsException):
     """Raise when there is a validation issue."""
 
 
+class ValidationCache:
+    """Content fetched during a validation run, shared by all validators in the run."""
+
+    def __init__(self, hacs: HacsBase) -> None:
+        self.hacs = hacs
+        self._tasks: dict[tuple[str, ...], asyncio.Task] = {}
+        self._tree_filenames: dict[str, set[str]] = {}
+
+    async def async_get(self, key: tuple[str, ...], fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the value for key, concurrent callers share a single fetch."""
+        if (task := self._tasks.get(key)) is None:
+            task = self._tasks[key] = asyncio.get_running_loop().create_task(fetch())
+        return await asyncio.shield(task)
+
+    def tree_filenames(self, repository: HacsRepository) -> set[str]:
+        """Return the filenames in the tree of the repository."""
+        if (filenames := self._tree_filenames.get(repository.data.full_name)) is None:
+            filenames = self._tree_filenames[repository.data.full_name] = {
+                entry.filename for entry in repository.tree
+            }
+        return filenames
+
+    async def async_get_brands(self) -> dict[str, Any]:
+        """Return the domains registered in the brands repository."""
+
+        async def _fetch() -> dict[str, Any]:
+            response = await self.hacs.session.get(BRANDS_URL)
+            return await response.json()
+
+        return await self.async_get(("brands",), _fetch)
+
+    async def async_get_info_file_contents(self, repository: HacsRepository) -> str:
+        """Return the content of the info file of the repository."""
+        return await self.async_get(
+            ("info", repository.data.full_name, str(repository.ref)),
+            repository.async_get_info_file_contents,
+        )
+
+    async def async_get_hacs_json(self, repository: HacsRepository) -> dict[str, Any] | None:
+        """Return the content of the hacs.json file of the repository."""
+        return await self.async_get(
+            ("hacs_json", repository.data.full_name, str(repository.ref)),
+            lambda: repository.async_get_hacs_json(repository.ref),
+        )
+
+    async def async_get_integration_manifest(
+        self, repository: HacsRepository
+    ) -> dict[str, Any] | None:
+        """Return the content of the integration manifest of the repository."""
+        return await self.async_get(
+            ("integration_manifest", repository.data.full_name, str(repository.ref)),
+            lambda: repository.async_get_integration_manifest(repository.ref),
+        )
+
+
 class ActionValidationBase:
     """Base class for action validation."""
 
@@ -24,6 +84,8 @@ class ActionValidationBase:
     def __init__(self, repository: HacsRepository) -> None:
         self.hacs = repository.hacs
         self.repository = repository
+        self.cache: ValidationCache | None = None
+        self.duration = 0.0
         self.failed = False
 
     @property
@@ -37,6 +99,9 @@ class ActionValidationBase:
     async def execute_validation(self, *_, **__) -> None:
         """Execute the task defined in subclass."""
         self.failed = False
+        if self.cache is None:
+            self.cache = ValidationCache(self.hacs)
+        start = time.monotonic()
 
         try:
             await self.async_validate()
@@ -51,3 +116,5 @@ class ActionValidationBase:
 
         else:
             self.hacs.log.info("<Validation %s> completed", self.slug)
+        finally:
+            self.duration = time.monotonic() - start
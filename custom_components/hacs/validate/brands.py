@@ -5,8 +5,6 @@ from custom_components.hacs.enums import HacsCategory
 from ..repositories.base import HacsRepository
 from .base import ActionValidationBase, ValidationException
 
-URL = "https://brands.home-assistant.io/domains.json"
-
 
 async def async_setup_validator(repository: HacsRepository) -> Validator:
     """Set up this validator."""
@@ -22,8 +20,7 @@ class Validator(ActionValidationBase):
     async def async_validate(self):
         """Validate the repository."""
 
-        response = await self.hacs.session.get(URL)
-        content = await response.json()
+        content = await self.cache.async_get_brands()
 
         if self.repository.data.domain not in content["custom"]:
             raise ValidationException(
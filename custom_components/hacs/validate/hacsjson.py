@@ -20,10 +20,10 @@ class Validator(ActionValidationBase):
 
     async def async_validate(self):
         """Validate the repository."""
-        if RepositoryFile.HACS_JSON not in [x.filename for x in self.repository.tree]:
+        if RepositoryFile.HACS_JSON not in self.cache.tree_filenames(self.repository):
             raise ValidationException(f"The repository has no '{RepositoryFile.HACS_JSON}' file")
 
-        content = await self.repository.async_get_hacs_json(self.repository.ref)
+        content = await self.cache.async_get_hacs_json(self.repository)
         try:
             HACS_MANIFEST_JSON_SCHEMA(content)
         except Invalid as exception:
@@ -16,7 +16,7 @@ class Validator(ActionValidationBase):
 
     async def async_validate(self):
         """Validate the repository."""
-        filenames = [x.filename.lower() for x in self.repository.tree]
+        filenames = [x.lower() for x in self.cache.tree_filenames(self.repository)]
         if "readme" in filenames:
             pass
         elif "readme.md" in filenames:
@@ -23,12 +23,12 @@ class Validator(ActionValidationBase):
 
     async def async_validate(self):
         """Validate the repository."""
-        if RepositoryFile.MAINIFEST_JSON not in [x.filename for x in self.repository.tree]:
+        if RepositoryFile.MAINIFEST_JSON not in self.cache.tree_filenames(self.repository):
             raise ValidationException(
                 f"The repository has no '{RepositoryFile.MAINIFEST_JSON}' file"
             )
 
-        content = await self.repository.async_get_integration_manifest(self.repository.ref)
+        content = await self.cache.async_get_integration_manifest(self.repository)
         try:
             INTEGRATION_MANIFEST_JSON_SCHEMA(content)
         except Invalid as exception:
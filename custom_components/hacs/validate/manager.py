@@ -5,12 +5,14 @@ import asyncio
 from importlib import import_module
 import os
 from pathlib import Path
-from typing import TYPE_CHECKING
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Iterable
 
 from homeassistant.core import HomeAssistant
 
+from ..const import DEFAULT_CONCURRENT_TASKS
 from ..repositories.base import HacsRepository
-from .base import ActionValidationBase
+from .base import ActionValidationBase, ValidationCache
 
 if TYPE_CHECKING:
     from ..base import HacsBase
@@ -23,6 +25,7 @@ class ValidationManager:
         """Initialize the setup manager class."""
         self.hacs = hacs
         self.hass = hass
+        self._modules: list[ModuleType] | None = None
         self._validatiors: dict[str, ActionValidationBase] = {}
 
     @property
@@ -30,46 +33,87 @@ class ValidationManager:
         """Return all list of all tasks."""
         return list(self._validatiors.values())
 
-    async def async_load(self, repository: HacsRepository) -> None:
-        """Load all tasks."""
-        self._validatiors = {}
-        validator_files = Path(__file__).parent
-        validator_modules = (
-            module.stem
-            for module in validator_files.glob("*.py")
-            if module.name not in ("base.py", "__init__.py", "manager.py")
-        )
+    async def async_load(self, repository: HacsRepository | None = None) -> None:
+        """Load all tasks, the validator modules are only imported once."""
+        if self._modules is None:
+            validator_files = Path(__file__).parent
+            self._modules = [
+                import_module(f"{__package__}.{module.stem}")
+                for module in sorted(validator_files.glob("*.py"))
+                if module.name not in ("base.py", "__init__.py", "manager.py")
+            ]
+
+        if repository is not None:
+            self._validatiors = {
+                task.slug: task for task in await self.async_setup_validators(repository)
+            }
+
+    async def async_setup_validators(
+        self,
+        repository: HacsRepository,
+        cache: ValidationCache | None = None,
+    ) -> list[ActionValidationBase]:
+        """Return validators for a repository that share the same content cache."""
+        await self.async_load()
+        cache = cache or ValidationCache(self.hacs)
+        validators = []
+        for module in self._modules:
+            if task := await module.async_setup_validator(repository=repository):
+                task.cache = cache
+                validators.append(task)
+        return validators
+
+    async def async_validate_repository(
+        self,
+        repository: HacsRepository,
+        cache: ValidationCache | None = None,
+        is_pull_from_fork: bool = False,
+        timings: dict[str, dict[str, Any]] | None = None,
+    ) -> list[ActionValidationBase]:
+        """Run the validators that apply to a repository and return them.
+
+        When timings is passed the duration of each validator is added to it.
+        """
+        validatiors = [
+            validator
+            for validator in await self.async_setup_validators(repository, cache)
+            if (
+                (not validator.categories or repository.data.category in validator.categories)
+                and validator.slug not in os.getenv("INPUT_IGNORE", "").split(" ")
+                and (not is_pull_from_fork or validator.allow_fork)
+            )
+        ]
 
-        async def _load_module(module: str):
-            task_module = import_module(f"{__package__}.{module}")
-            if task := await task_module.async_setup_validator(repository=repository):
-                self._validatiors[task.slug] = task
+        await asyncio.gather(*[validator.execute_validation() for validator in validatiors])
 
-        await asyncio.gather(*[_load_module(task) for task in validator_modules])
+        if timings is None:
+            return validatiors
+
+        for validator in validatiors:
+            timing = timings.setdefault(
+                validator.slug, {"runs": 0, "failed": 0, "total": 0.0, "max": 0.0}
+            )
+            timing["runs"] += 1
+            timing["failed"] += validator.failed
+            timing["total"] += validator.duration
+            timing["max"] = max(timing["max"], validator.duration)
+
+        return validatiors
 
     async def async_run_repository_checks(self, repository: HacsRepository) -> None:
         """Run all validators for a repository."""
         if not self.hacs.system.action:
             return
 
-        await self.async_load(repository)
-
         is_pull_from_fork = (
             not os.getenv("INPUT_REPOSITORY")
             and os.getenv("GITHUB_REPOSITORY") != repository.data.full_name
         )
 
-        validatiors = [
-            validator
-            for validator in self.validatiors or []
-            if (
-                (not validator.categories or repository.data.category in validator.categories)
-                and validator.slug not in os.getenv("INPUT_IGNORE", "").split(" ")
-                and (not is_pull_from_fork or validator.allow_fork)
-            )
-        ]
-
-        await asyncio.gather(*[validator.execute_validation() for validator in validatiors])
+        validatiors = await self.async_validate_repository(
+            repository, is_pull_from_fork=is_pull_from_fork
+        )
+        self._validatiors = {validator.slug: validator for validator in validatiors}
 
         total = len(validatiors)
         failed = len([x for x in validatiors if x.failed])
@@ -79,3 +123,49 @@ class ValidationManager:
             exit(1)
         else:
             repository.logger.info("%s All (%s) checks passed", repository.string, total)
+
+    async def async_run_batch(
+        self,
+        repositories: Iterable[HacsRepository],
+        concurrency: int = DEFAULT_CONCURRENT_TASKS,
+    ) -> dict[str, dict[str, Any]]:
+        """Validate many repositories concurrently.
+
+        Return the failed checks per repository, and the error for repositories that
+        could not be validated.
+        """
+        cache = ValidationCache(self.hacs)
+        semaphore = asyncio.Semaphore(concurrency)
+        timings: dict[str, dict[str, Any]] = {}
+        results: dict[str, dict[str, Any]] = {}
+
+        async def _validate(repository: HacsRepository) -> None:
+            try:
+                async with semaphore:
+                    if not repository.tree:
+                        # Not fetched since startup, the validators need the tree
+                        await repository.update_repository(ignore_issues=True, force=True)
+                    validatiors = await self.async_validate_repository(
+                        repository, cache, timings=timings
+                    )
+            except Exception as exception:  # pylint: disable=broad-except
+                repository.logger.error("%s Validation failed %s", repository.string, exception)
+                results[repository.data.full_name] = {"failed": [], "error": str(exception)}
+                return
+            results[repository.data.full_name] = {
+                "failed": [x.slug for x in validatiors if x.failed],
+                "error": None,
+            }
+
+        await asyncio.gather(*[_validate(repository) for repository in repositories])
+
+        for slug, timing in sorted(timings.items()):
+            self.hacs.log.info(
+                "<Validation %s> %s runs, %s failed, %.3fs average, %.3fs max",
+                slug,
+                timing["runs"],
+                timing["failed"],
+                timing["total"] / timing["runs"],
+                timing["max"],
+            )
+        return results
@@ -16,6 +16,7 @@ from .repositories import (
     hacs_repositories_list,
     hacs_repositories_remove,
     hacs_repositories_removed,
+    hacs_repositories_validate,
 )
 from .repository import (
     hacs_repository_beta,
@@ -57,6 +58,7 @@ def async_register_websocket_commands(hass: HomeAssistant) -> None:
     websocket_api.async_register_command(hass, hacs_repositories_clear_new)
     websocket_api.async_register_command(hass, hacs_repositories_removed)
     websocket_api.async_register_command(hass, hacs_repositories_remove)
+    websocket_api.async_register_command(hass, hacs_repositories_validate)
 
 
 @websocket_api.websocket_command(
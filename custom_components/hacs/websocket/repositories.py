@@ -11,17 +11,26 @@ import voluptuous as vol
 
 from custom_components.hacs.utils import regex
 
-from ..const import DOMAIN
+from ..base import HacsRepositoryRecord
+from ..const import DEFAULT_CONCURRENT_TASKS, DOMAIN
 from ..enums import HacsDispatchEvent
+from ..utils.filters import ignored_by_country
+from ..validate.manager import ValidationManager
 
 if TYPE_CHECKING:
     from ..base import HacsBase
+    from ..repositories.base import HacsRepository
 
 
 @websocket_api.websocket_command(
     {
         vol.Required("type"): "hacs/repositories/list",
         vol.Optional("categories"): [str],
+        vol.Optional("fields"): [str],
+        vol.Optional("offset"): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        vol.Optional("limit"): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional("since"): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        vol.Optional("epoch"): str,
     }
 )
 @websocket_api.require_admin
@@ -31,45 +40,94 @@ async def hacs_repositories_list(
     connection: websocket_api.ActiveConnection,
     msg: dict[str, Any],
 ):
-    """List repositories."""
+    """List repositories.
+
+    Without any of fields, offset, limit or since the full list is returned as before.
+    Otherwise the result holds the current epoch and revision, and with since only the
+    repositories that changed after that revision and the ids of those that are gone.
+    """
     hacs: HacsBase = hass.data.get(DOMAIN)
+    categories = msg.get("categories", hacs.common.categories)
+
+    def _listed_entry(repo: HacsRepository | HacsRepositoryRecord) -> dict[str, Any] | None:
+        """Return the list entry, or None if the repository is not listed."""
+        if isinstance(repo, HacsRepositoryRecord):
+            # Catalogue records are listed from their stored data without loading them
+            entry = hacs.repositories.record_list_entry(repo)
+            last_fetched = repo.data.get("last_fetched")
+        else:
+            entry = repo.list_entry()
+            last_fetched = repo.data.last_fetched
+        if (
+            entry is None
+            or entry["category"] not in categories
+            or (
+                not entry["installed"]
+                and ignored_by_country(hacs.configuration.country, entry["country"])
+            )
+            or (hacs.configuration.experimental and not last_fetched)
+        ):
+            return None
+        return entry
+
+    def _listed_entries() -> list[dict[str, Any]]:
+        return [
+            entry
+            for repo in (
+                *hacs.repositories.list_loaded_by_category(categories),
+                *hacs.repositories.list_records_by_category(categories),
+            )
+            if (entry := _listed_entry(repo)) is not None
+        ]
+
+    if not any(key in msg for key in ("fields", "offset", "limit", "since")):
+        connection.send_message(websocket_api.result_message(msg["id"], _listed_entries()))
+        return
+
+    # A revision from another epoch (HACS was restarted) can not be compared
+    full = (
+        "since" not in msg
+        or msg.get("epoch") != hacs.repositories.epoch
+        or msg["since"] > hacs.repositories.revision
+    )
+    removed = []
+    if full:
+        # Keep pages stable when catalogue records are loaded between requests
+        entries = sorted(_listed_entries(), key=lambda entry: str(entry["id"]))
+    else:
+        entries = []
+        for repo in hacs.repositories.list_changed(msg["since"]):
+            if (entry := _listed_entry(repo)) is not None:
+                entries.append(entry)
+            elif isinstance(repo, HacsRepositoryRecord):
+                removed.append(repo.id)
+            else:
+                # Also covers repositories that moved out of the requested categories
+                removed.append(str(repo.data.id))
+        removed.extend(hacs.repositories.list_unregistered(msg["since"]))
+
+    total = len(entries)
+    offset = msg.get("offset", 0)
+    if (limit := msg.get("limit")) is not None:
+        entries = entries[offset : offset + limit]
+    else:
+        entries = entries[offset:]
+
+    if fields := msg.get("fields"):
+        keys = ("id", *fields)
+        entries = [{key: entry[key] for key in keys if key in entry} for entry in entries]
+
     connection.send_message(
         websocket_api.result_message(
             msg["id"],
-            [
-                {
-                    "authors": repo.data.authors,
-                    "available_version": repo.display_available_version,
-                    "installed_version": repo.display_installed_version,
-                    "config_flow": repo.data.config_flow,
-                    "can_download": repo.can_download,
-                    "category": repo.data.category,
-                    "country": repo.repository_manifest.country,
-                    "custom": not hacs.repositories.is_default(str(repo.data.id)),
-                    "description": repo.data.description,
-                    "domain": repo.data.domain,
-                    "downloads": repo.data.downloads,
-                    "file_name": repo.data.file_name,
-                    "full_name": repo.data.full_name,
-                    "hide": repo.data.hide,
-                    "homeassistant": repo.repository_manifest.homeassistant,
-                    "id": repo.data.id,
-                    "installed": repo.data.installed,
-                    "last_updated": repo.data.last_updated,
-                    "local_path": repo.content.path.local,
-                    "name": repo.display_name,
-                    "new": repo.data.new,
-                    "pending_upgrade": repo.pending_update,
-                    "stars": repo.data.stargazers_count,
-                    "state": repo.state,
-                    "status": repo.display_status,
-                    "topics": repo.data.topics,
-                }
-                for repo in hacs.repositories.list_all
-                if repo.data.category in msg.get("categories", hacs.common.categories)
-                and not repo.ignored_by_country_configuration
-                and (not hacs.configuration.experimental or repo.data.last_fetched)
-            ],
+            {
+                "epoch": hacs.repositories.epoch,
+                "revision": hacs.repositories.revision,
+                "full": full,
+                "total": total,
+                "repositories": entries,
+                "removed": removed,
+            },
         )
     )
 
@@ -96,8 +154,13 @@ async def hacs_repositories_clear_new(
         repository.data.new = False
 
     else:
-        for repo in hacs.repositories.list_all:
-            if repo.data.new and repo.data.category in msg.get("categories", []):
+        categories = msg.get("categories", [])
+        for record in hacs.repositories.list_records_by_category(categories):
+            if record.data.get("new"):
+                hacs.log.debug("Clearing new flag from '%s'", record.full_name)
+                hacs.repositories.set_record_data(record, {**record.data, "new": False})
+        for repo in hacs.repositories.list_loaded_by_category(categories):
+            if repo.data.new:
                 hacs.log.debug(
                     "Clearing new flag from '%s'",
                     repo.data.full_name,
@@ -208,3 +271,34 @@ async def hacs_repositories_remove(
     await hacs.data.async_write()
 
     connection.send_message(websocket_api.result_message(msg["id"], {}))
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "hacs/repositories/validate",
+        vol.Required("repositories"): [cv.string],
+        vol.Optional("concurrency", default=DEFAULT_CONCURRENT_TASKS): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+    }
+)
+@websocket_api.require_admin
+@websocket_api.async_response
+async def hacs_repositories_validate(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+):
+    """Validate repositories, and return the failed checks or the error per repository."""
+    hacs: HacsBase = hass.data.get(DOMAIN)
+    if hacs.validation is None:
+        hacs.validation = ValidationManager(hacs=hacs, hass=hass)
+
+    repositories = [
+        repository
+        for repository_id in msg["repositories"]
+        if (repository := hacs.repositories.get_by_id(repository_id)) is not None
+    ]
+    results = await hacs.validation.async_run_batch(repositories, msg["concurrency"])
+
+    connection.send_message(websocket_api.result_message(msg["id"], results))
@@ -0,0 +1,403 @@
+"""Rendering benchmarks for the map extractor.
+
+Run from the Home Assistant configuration directory:
+    python -m custom_components.xiaomi_cloud_map_extractor.benchmark overlay
+    python -m custom_components.xiaomi_cloud_map_extractor.benchmark parse [stored raw maps]
+    python -m custom_components.xiaomi_cloud_map_extractor.benchmark replay <directory with stored raw maps>
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import re
+import struct
+import sys
+import time
+import tracemalloc
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+from custom_components.xiaomi_cloud_map_extractor.common.image_handler import ImageHandler
+from custom_components.xiaomi_cloud_map_extractor.common.map_data import Area, ImageData, MapData, Obstacle, Path, \
+    Point, Zone
+from custom_components.xiaomi_cloud_map_extractor.common.map_data_parser import MapDataParser
+from custom_components.xiaomi_cloud_map_extractor.common.vacuum import XiaomiCloudVacuum
+from custom_components.xiaomi_cloud_map_extractor.const import *
+from custom_components.xiaomi_cloud_map_extractor.map_renderer import MapRenderer
+from custom_components.xiaomi_cloud_map_extractor.xiaomi.map_data_parser import MapDataParserXiaomi
+
+REPLAY_SIZES = {
+    CONF_SIZE_VACUUM_RADIUS: 6,
+    CONF_SIZE_PATH_WIDTH: 1,
+    CONF_SIZE_IGNORED_OBSTACLE_RADIUS: 3,
+    CONF_SIZE_IGNORED_OBSTACLE_WITH_PHOTO_RADIUS: 3,
+    CONF_SIZE_OBSTACLE_RADIUS: 3,
+    CONF_SIZE_OBSTACLE_WITH_PHOTO_RADIUS: 3,
+    CONF_SIZE_CHARGER_RADIUS: 6
+}
+RAW_MAP_FILE_NAME = re.compile(r"map_data_(?P<model>.+)\.(?P<extension>[^.]+)$")
+
+
+def legacy_draw_on_new_layer(image: ImageData, draw_function: Callable, scale: float = 1, use_transparency=False):
+    if scale == 1 and not use_transparency:
+        draw = ImageDraw.Draw(image.data, "RGBA")
+        draw_function(draw)
+    else:
+        size = [int(image.data.size[0] * scale), int(image.data.size[1] * scale)]
+        layer = Image.new("RGBA", size, (255, 255, 255, 0))
+        draw = ImageDraw.Draw(layer, "RGBA")
+        draw_function(draw)
+        if scale != 1:
+            layer = layer.resize(image.data.size, resample=Image.BOX)
+        image.data = Image.alpha_composite(image.data, layer)
+
+
+def create_synthetic_map(size: int, areas: int, seed: int = 0) -> MapData:
+    rnd = random.Random(seed)
+    image_config = {CONF_SCALE: 1, CONF_ROTATE: 0, CONF_TRIM: {CONF_LEFT: 0, CONF_RIGHT: 0, CONF_TOP: 0, CONF_BOTTOM: 0}}
+    map_data = MapData(0, 1)
+    data = Image.new("RGBA", (size, size), ImageHandler.COLORS[COLOR_MAP_INSIDE] + (255,))
+    map_data.image = ImageData(size * size, 0, 0, size, size, image_config, data, lambda p: p)
+
+    def point() -> Point:
+        return Point(rnd.uniform(0, size), rnd.uniform(0, size))
+
+    def area() -> Area:
+        x, y = rnd.uniform(0, size - 80), rnd.uniform(0, size - 80)
+        w, h = rnd.uniform(10, 80), rnd.uniform(10, 80)
+        return Area(x, y, x + w, y, x + w, y + h, x, y + h)
+
+    map_data.no_go_areas = [area() for _ in range(areas)]
+    map_data.no_mopping_areas = [area() for _ in range(areas)]
+    map_data.zones = [Zone(a.x0, a.y0, a.x2, a.y2) for a in (area() for _ in range(areas))]
+    map_data.obstacles = [Obstacle(p.x, p.y, {}) for p in (point() for _ in range(areas))]
+    map_data.path = Path(None, None, None, [[point() for _ in range(500)]])
+    map_data.charger = Point(size / 2, size / 2, 0)
+    map_data.vacuum_position = Point(size / 3, size / 3, 45)
+    return map_data
+
+
+def legacy_get_bytes(data: bytes, start_index: int, size: int) -> bytes:
+    return bytes(data[start_index: start_index + size])
+
+
+def legacy_parse_path(block_start_position: int, header: bytes, raw: bytes) -> Path:
+    path_points = []
+    end_pos = MapDataParserXiaomi.get_int32(header, 0x04)
+    point_length = MapDataParserXiaomi.get_int32(header, 0x08)
+    point_size = MapDataParserXiaomi.get_int32(header, 0x0C)
+    angle = MapDataParserXiaomi.get_int32(header, 0x10)
+    start_pos = block_start_position + 0x14
+    for pos in range(start_pos, start_pos + end_pos, 4):
+        x = MapDataParserXiaomi.get_int16(raw, pos)
+        y = MapDataParserXiaomi.get_int16(raw, pos + 2)
+        path_points.append(Point(x, y))
+    return Path(point_length, point_size, angle, [path_points])
+
+
+def create_synthetic_xiaomi_map(size: int, path_points: int, seed: int = 0) -> bytes:
+    rnd = random.Random(seed)
+    top, left = 100, 100
+
+    def block(block_type: int, header: bytes, data: bytes) -> bytes:
+        return struct.pack("<HHI", block_type, 8 + len(header), len(data)) + header + data
+
+    def point() -> tuple:
+        return (left + rnd.randrange(size)) * MM, (top + rnd.randrange(size)) * MM
+
+    margin = size // 8
+    pixels = bytearray(b"\x00" * size * size)
+    for y in range(margin, size - margin):
+        row = y * size + margin
+        pixels[row: row + size - 2 * margin] = bytes([(1 + y * 4 // size) << 3 | 7]) * (size - 2 * margin)
+    blocks = [
+        block(MapDataParserXiaomi.CHARGER, b"", struct.pack("<II", *point())),
+        block(MapDataParserXiaomi.IMAGE, bytes(4) + struct.pack("<IIII", top, left, size, size), bytes(pixels)),
+        block(MapDataParserXiaomi.PATH, struct.pack("<III", path_points, 1, 0),
+              b"".join(struct.pack("<HH", *point()) for _ in range(path_points))),
+        block(MapDataParserXiaomi.ROBOT_POSITION, b"", struct.pack("<III", *point(), 90)),
+        block(MapDataParserXiaomi.NO_GO_AREAS, struct.pack("<HH", 20, 0),
+              b"".join(struct.pack("<8H", *point(), *point(), *point(), *point()) for _ in range(20))),
+        block(MapDataParserXiaomi.VIRTUAL_WALLS, struct.pack("<HH", 20, 0),
+              b"".join(struct.pack("<4H", *point(), *point()) for _ in range(20))),
+        block(MapDataParserXiaomi.OBSTACLES, struct.pack("<HH", 20, 0),
+              b"".join(struct.pack("<5H", *point(), 2, 50, 100) for _ in range(20))),
+        block(MapDataParserXiaomi.DIGEST, b"", bytes(20))
+    ]
+    header = struct.pack("<HHIHHII", 1, MapDataParserXiaomi.MAP_HEADER_SIZE, 0, 1, 0, 1, seed)
+    return gzip.compress(header + b"".join(blocks))
+
+
+class ImageAllocationTracker:
+    def __init__(self):
+        self.allocated = 0
+        self.live = 0
+        self.peak = 0
+        self._original_new = None
+
+    def __enter__(self):
+        self._original_new = Image.Image._new
+        tracker = self
+
+        def tracked_new(image, core):
+            result = tracker._original_new(image, core)
+            size = core.size[0] * core.size[1] * core.bands
+            tracker.allocated += size
+            tracker.live += size
+            tracker.peak = max(tracker.peak, tracker.live)
+            weakref.finalize(result, tracker.release, size)
+            return result
+
+        Image.Image._new = tracked_new
+        return self
+
+    def __exit__(self, *args):
+        Image.Image._new = self._original_new
+
+    def release(self, size: int):
+        self.live -= size
+
+
+def measure(function: Callable[[], Any], repeats: int) -> Dict[str, float]:
+    with ImageAllocationTracker() as tracker:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            function()
+        elapsed = time.perf_counter() - start
+    return {
+        "frame_ms": elapsed / repeats * 1000,
+        "allocated_mb_per_frame": tracker.allocated / repeats / 2 ** 20,
+        "peak_live_mb": tracker.peak / 2 ** 20
+    }
+
+
+def run_overlay_mode(mode: str, size: int, areas: int, scale: float, repeats: int, queue: multiprocessing.Queue):
+    if mode == "per_element":
+        ImageHandler.__draw_on_new_layer__ = staticmethod(legacy_draw_on_new_layer)
+    drawables = [DRAWABLE_NO_GO_AREAS, DRAWABLE_NO_MOPPING_AREAS, DRAWABLE_ZONES, DRAWABLE_OBSTACLES, DRAWABLE_PATH,
+                 DRAWABLE_CHARGER, DRAWABLE_VACUUM_POSITION]
+    colors = {COLOR_PATH: (147, 194, 238, 200), COLOR_OBSTACLE: (0, 0, 0, 128)}
+    sizes = {CONF_SIZE_PATH_WIDTH: 1, CONF_SIZE_OBSTACLE_RADIUS: 3, CONF_SIZE_CHARGER_RADIUS: 6,
+             CONF_SIZE_VACUUM_RADIUS: 6}
+    image_config = {CONF_SCALE: scale}
+    template = create_synthetic_map(size, areas)
+    base = template.image.data
+
+    def render():
+        template.image.data = base.copy()
+        MapDataParser.draw_elements(colors, drawables, sizes, template, image_config)
+
+    queue.put((mode, measure(render, repeats)))
+
+
+def run_parse_mode(mode: str, raw_maps: List[bytes], repeats: int, queue: multiprocessing.Queue):
+    if mode == "copying":
+        MapDataParserXiaomi.get_bytes = staticmethod(legacy_get_bytes)
+        MapDataParserXiaomi.parse_path = staticmethod(legacy_parse_path)
+    image_config = {CONF_SCALE: 1, CONF_ROTATE: 0, CONF_TRIM: {CONF_LEFT: 0, CONF_RIGHT: 0, CONF_TOP: 0, CONF_BOTTOM: 0}}
+    unzipped = [gzip.decompress(raw_map) for raw_map in raw_maps]
+    for raw in unzipped:
+        MapDataParserXiaomi.parse(raw, {}, [], [], {}, image_config)
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        results = [MapDataParserXiaomi.parse(raw, {}, [], [], {}, image_config) for raw in unzipped]
+        del results
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    queue.put((mode, {
+        "parse_ms": elapsed / repeats / len(unzipped) * 1000,
+        "peak_mb": peak / 2 ** 20
+    }))
+
+
+def benchmark_parse(args: argparse.Namespace):
+    files = sorted(f for pattern in args.files for f in glob.glob(pattern))
+    if len(files) > 0:
+        raw_maps = []
+        for file in files:
+            with open(file, "rb") as raw_map_file:
+                raw_maps.append(raw_map_file.read())
+        print(f"{len(raw_maps)} stored map files")
+    else:
+        raw_maps = [create_synthetic_xiaomi_map(args.size, args.path_points, seed) for seed in range(4)]
+        print(f"4 synthetic maps {args.size}x{args.size}, {args.path_points} path points")
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    for mode in ["copying", "memoryview"]:
+        process = context.Process(target=run_parse_mode, args=(mode, raw_maps, args.repeats, queue))
+        process.start()
+        name, result = queue.get()
+        process.join()
+        print(f"{name:>15}: {result['parse_ms']:8.2f} ms/map, {result['peak_mb']:8.2f} MB peak traced allocations")
+
+
+def detect_api(path: str, forced_api: Optional[str]) -> Tuple[Optional[str], str]:
+    match = RAW_MAP_FILE_NAME.search(os.path.basename(path))
+    model = match.group("model") if match is not None else os.path.splitext(os.path.basename(path))[0]
+    if forced_api is not None:
+        return forced_api, model
+    if model in API_EXCEPTIONS:
+        return API_EXCEPTIONS[model], model
+    for api, prefixes in AVAILABLE_APIS.items():
+        if any(model.startswith(prefix) for prefix in prefixes):
+            return api, model
+    directory = os.path.basename(os.path.dirname(path))
+    return (directory if directory in MapRenderer.VACUUMS else None), model
+
+
+def find_raw_maps(paths: List[str], forced_api: Optional[str]) -> List[Tuple[str, str, str, str]]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted((os.path.join(root, name), os.path.relpath(os.path.join(root, name), path))
+                                for root, _, names in os.walk(path) for name in names))
+        else:
+            files.extend(sorted((file, os.path.basename(file)) for file in glob.glob(path)))
+    raw_maps = []
+    for file, name in files:
+        api, model = detect_api(file, forced_api)
+        if api is None:
+            print(f"skipping {file}: unable to detect api")
+            continue
+        raw_maps.append((file, name, api, model))
+    return raw_maps
+
+
+def replay_raw_map(vacuum: XiaomiCloudVacuum, raw_map: bytes, image_format: str) -> Dict[str, Any]:
+    drawing = {"time": 0.0}
+    draw_elements = MapDataParser.draw_elements
+
+    def timed_draw_elements(*args, **kwargs):
+        start = time.perf_counter()
+        draw_elements(*args, **kwargs)
+        drawing["time"] += time.perf_counter() - start
+
+    drawables = CONF_AVAILABLE_DRAWABLES[1:]
+    image_config = {CONF_SCALE: 1, CONF_ROTATE: 0, CONF_TRIM: {CONF_LEFT: 0, CONF_RIGHT: 0, CONF_TOP: 0, CONF_BOTTOM: 0}}
+    MapDataParser.draw_elements = staticmethod(timed_draw_elements)
+    try:
+        with ImageAllocationTracker() as tracker:
+            tracemalloc.start()
+            start = time.perf_counter()
+            map_data = vacuum.decode_map(raw_map, {}, drawables, [], REPLAY_SIZES, image_config)
+            decoded = time.perf_counter()
+            encoded = None
+            if map_data is not None:
+                encoded = ImageHandler.encode(map_data.image.data, image_format)
+            end = time.perf_counter()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        MapDataParser.draw_elements = staticmethod(draw_elements)
+    result = {
+        "decode_ms": (decoded - start - drawing["time"]) * 1000,
+        "draw_ms": drawing["time"] * 1000,
+        "encode_ms": (end - decoded) * 1000,
+        "peak_heap_mb": peak / 2 ** 20,
+        "peak_image_mb": tracker.peak / 2 ** 20,
+        "image_hash": None,
+        "encoded_bytes": 0
+    }
+    if map_data is not None:
+        image = map_data.image.data
+        image_hash = hashlib.sha1(image.tobytes())
+        image_hash.update(repr((image.mode, image.size)).encode())
+        result["image_hash"] = image_hash.hexdigest()
+        result["encoded_bytes"] = len(encoded)
+    return result
+
+
+def benchmark_replay(args: argparse.Namespace):
+    raw_maps = find_raw_maps(args.paths, args.api)
+    if len(raw_maps) == 0:
+        print("no stored raw maps found")
+        sys.exit(1)
+    ImageHandler.RAW_IMAGE_CACHE_SIZE = 0
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    for _ in range(args.repeats):
+        vacuums = {}
+        for file, _, api, model in raw_maps:
+            if (api, model) not in vacuums:
+                vacuums[(api, model)] = MapRenderer.VACUUMS[api](None, None, None, None, model)
+            with open(file, "rb") as raw_map_file:
+                raw_map = raw_map_file.read()
+            results.setdefault(file, []).append(replay_raw_map(vacuums[(api, model)], raw_map, args.format))
+    stages = ["decode_ms", "draw_ms", "encode_ms", "peak_heap_mb", "peak_image_mb"]
+    report = {}
+    print(f"{'file':<40} {'api':>7} {'decode':>9} {'draw':>9} {'encode':>9} {'heap':>8} {'image':>8}  hash")
+    for file, name, api, _ in raw_maps:
+        runs = results[file]
+        summary = {stage: min(run[stage] for run in runs) for stage in stages}
+        summary["api"] = api
+        summary["image_hash"] = runs[-1]["image_hash"]
+        summary["encoded_bytes"] = runs[-1]["encoded_bytes"]
+        report[name] = summary
+        print(f"{name[-40:]:<40} {api:>7} "
+              f"{summary['decode_ms']:7.1f}ms {summary['draw_ms']:7.1f}ms {summary['encode_ms']:7.1f}ms "
+              f"{summary['peak_heap_mb']:6.1f}MB {summary['peak_image_mb']:6.1f}MB  {summary['image_hash']}")
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2, sort_keys=True)
+    if args.baseline is not None:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        mismatches = [file for file, summary in report.items()
+                      if file in baseline and baseline[file]["image_hash"] != summary["image_hash"]]
+        for file in mismatches:
+            print(f"image hash changed: {file}")
+        if len(mismatches) > 0:
+            sys.exit(1)
+
+
+def benchmark_overlay(args: argparse.Namespace):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    print(f"synthetic map {args.size}x{args.size}, {args.areas} areas per type, path scale {args.scale}")
+    for mode in ["per_element", "shared_overlay"]:
+        process = context.Process(target=run_overlay_mode,
+                                  args=(mode, args.size, args.areas, args.scale, args.repeats, queue))
+        process.start()
+        name, result = queue.get()
+        process.join()
+        print(f"{name:>15}: {result['frame_ms']:8.1f} ms/frame, "
+              f"{result['allocated_mb_per_frame']:8.1f} MB allocated/frame, "
+              f"{result['peak_live_mb']:6.1f} MB peak live image data")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Xiaomi Cloud Map Extractor benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    overlay = subparsers.add_parser("overlay", help="compare overlay compositing strategies")
+    overlay.add_argument("--size", type=int, default=1024)
+    overlay.add_argument("--areas", type=int, default=20)
+    overlay.add_argument("--scale", type=float, default=2)
+    overlay.add_argument("--repeats", type=int, default=5)
+    overlay.set_defaults(function=benchmark_overlay)
+    parse = subparsers.add_parser("parse", help="compare Xiaomi map parsing strategies")
+    parse.add_argument("files", nargs="*", help="stored raw maps (map_data_<model>.gz), synthetic maps if omitted")
+    parse.add_argument("--size", type=int, default=800)
+    parse.add_argument("--path-points", type=int, default=50000)
+    parse.add_argument("--repeats", type=int, default=10)
+    parse.set_defaults(function=benchmark_parse)
+    replay = subparsers.add_parser("replay", help="replay stored raw maps through decode, draw and encode")
+    replay.add_argument("paths", nargs="+", help="directories or files with stored raw maps (map_data_<model>.<ext>)")
+    replay.add_argument("--api", choices=CONF_AVAILABLE_APIS, help="force api instead of detecting it from the model")
+    replay.add_argument("--format", choices=CONF_AVAILABLE_IMAGE_FORMATS, default=IMAGE_FORMAT_PNG)
+    replay.add_argument("--repeats", type=int, default=3)
+    replay.add_argument("--output", help="write per-file results as JSON")
+    replay.add_argument("--baseline", help="JSON written by --output; exit with 1 if any image hash differs")
+    replay.set_defaults(function=benchmark_replay)
+    args = parser.parse_args()
+    args.function(args)
+
+
+if __name__ == "__main__":
+    main()
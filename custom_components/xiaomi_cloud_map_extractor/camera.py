@@ -1,23 +1,33 @@
+import asyncio
+import functools
+import hashlib
 import io
 import logging
-import time
+import threading
+from collections import OrderedDict
 from datetime import timedelta
 from enum import Enum
+from http import HTTPStatus
 from typing import Any, Dict, List, Optional
 
+from custom_components.xiaomi_cloud_map_extractor.common.image_handler import ImageHandler
 from custom_components.xiaomi_cloud_map_extractor.common.map_data import MapData
 from custom_components.xiaomi_cloud_map_extractor.common.vacuum import XiaomiCloudVacuum
+from custom_components.xiaomi_cloud_map_extractor.map_renderer import MapRenderer, RenderedMap
 from custom_components.xiaomi_cloud_map_extractor.types import Colors, Drawables, ImageConfig, Sizes, Texts
 
 try:
     from miio import RoborockVacuum, DeviceException
 except ImportError:
     from miio import Vacuum as RoborockVacuum, DeviceException
-import PIL.Image as Image
 import voluptuous as vol
+from PIL import Image
+from homeassistant.components.http import HomeAssistantView
 from homeassistant.components.camera import Camera, ENTITY_ID_FORMAT, PLATFORM_SCHEMA, SUPPORT_ON_OFF
-from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PASSWORD, CONF_TOKEN, CONF_USERNAME
+from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PASSWORD, CONF_TOKEN, CONF_USERNAME, \
+    EVENT_HOMEASSISTANT_STOP
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.entity import generate_entity_id
 from homeassistant.helpers.reload import async_setup_reload_service
 
@@ -34,6 +44,17 @@ _LOGGER = logging.getLogger(__name__)
 
 SCAN_INTERVAL = timedelta(seconds=5)
 
+RESIZED_IMAGES_CACHE_SIZE = 4
+
+LOGIN_TIMEOUT = 30
+DEVICE_TIMEOUT = 30
+MAP_NAME_TIMEOUT = 5
+MAP_NAME_RETRY_DELAY = 0.1
+MAP_NAME_MAX_RETRY_DELAY = 1
+MAP_URL_TIMEOUT = 10
+MAP_DOWNLOAD_TIMEOUT = 10
+RENDER_TIMEOUT = 30
+
 DEFAULT_TRIMS = {
     CONF_LEFT: 0,
     CONF_RIGHT: 0,
@@ -41,6 +62,12 @@ DEFAULT_TRIMS = {
     CONF_BOTTOM: 0
 }
 
+DEFAULT_IMAGE_ENCODING = {
+    CONF_IMAGE_FORMAT: IMAGE_FORMAT_PNG,
+    CONF_IMAGE_COMPRESS_LEVEL: 6,
+    CONF_IMAGE_QUALITY: 80
+}
+
 DEFAULT_SIZES = {
     CONF_SIZE_VACUUM_RADIUS: 6,
     CONF_SIZE_PATH_WIDTH: 1,
@@ -88,6 +115,8 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
                 }),
             }),
         vol.Optional(CONF_ATTRIBUTES, default=[]): vol.All(cv.ensure_list, [vol.In(CONF_AVAILABLE_ATTRIBUTES)]),
+        vol.Optional(CONF_LAZY_ATTRIBUTES, default=[]):
+            vol.All(cv.ensure_list, [vol.In(CONF_AVAILABLE_ATTRIBUTES)]),
         vol.Optional(CONF_TEXTS, default=[]):
             vol.All(cv.ensure_list, [vol.Schema({
                 vol.Required(CONF_TEXT): cv.string,
@@ -113,15 +142,27 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
             vol.Optional(CONF_SIZE_CHARGER_RADIUS,
                          default=DEFAULT_SIZES[CONF_SIZE_CHARGER_RADIUS]): POSITIVE_FLOAT_SCHEMA
         }),
+        vol.Optional(CONF_IMAGE_ENCODING, default=DEFAULT_IMAGE_ENCODING): vol.Schema({
+            vol.Optional(CONF_IMAGE_FORMAT,
+                         default=DEFAULT_IMAGE_ENCODING[CONF_IMAGE_FORMAT]): vol.In(CONF_AVAILABLE_IMAGE_FORMATS),
+            vol.Optional(CONF_IMAGE_COMPRESS_LEVEL, default=DEFAULT_IMAGE_ENCODING[CONF_IMAGE_COMPRESS_LEVEL]):
+                vol.All(vol.Coerce(int), vol.Range(min=0, max=9)),
+            vol.Optional(CONF_IMAGE_QUALITY, default=DEFAULT_IMAGE_ENCODING[CONF_IMAGE_QUALITY]):
+                vol.All(vol.Coerce(int), vol.Range(min=1, max=100))
+        }),
         vol.Optional(CONF_STORE_MAP_RAW, default=False): cv.boolean,
         vol.Optional(CONF_STORE_MAP_IMAGE, default=False): cv.boolean,
         vol.Optional(CONF_STORE_MAP_PATH, default="/tmp"): cv.string,
-        vol.Optional(CONF_FORCE_API, default=None): vol.Or(vol.In(CONF_AVAILABLE_APIS), vol.Equal(None))
+        vol.Optional(CONF_FORCE_API, default=None): vol.Or(vol.In(CONF_AVAILABLE_APIS), vol.Equal(None)),
+        vol.Optional(CONF_RENDER_IN_PROCESS, default=False): cv.boolean
     })
 
 
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     await async_setup_reload_service(hass, DOMAIN, PLATFORMS)
+    if DOMAIN not in hass.data:
+        hass.data[DOMAIN] = {}
+        hass.http.register_view(MapAttributesView(hass, hass.data[DOMAIN]))
 
     host = config[CONF_HOST]
     token = config[CONF_TOKEN]
@@ -140,25 +181,46 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
     texts = config[CONF_TEXTS]
     if DRAWABLE_ALL in drawables:
         drawables = CONF_AVAILABLE_DRAWABLES[1:]
-    attributes = config[CONF_ATTRIBUTES]
+    lazy_attributes = config[CONF_LAZY_ATTRIBUTES]
+    attributes = [attribute for attribute in config[CONF_ATTRIBUTES] if attribute not in lazy_attributes]
     store_map_raw = config[CONF_STORE_MAP_RAW]
     store_map_image = config[CONF_STORE_MAP_IMAGE]
     store_map_path = config[CONF_STORE_MAP_PATH]
     force_api = config[CONF_FORCE_API]
+    image_encoding = config[CONF_IMAGE_ENCODING]
+    render_in_process = config[CONF_RENDER_IN_PROCESS]
     entity_id = generate_entity_id(ENTITY_ID_FORMAT, name, hass=hass)
     async_add_entities([VacuumCamera(entity_id, host, token, username, password, country, name, should_poll,
                                      image_config, colors, drawables, sizes, texts, attributes, store_map_raw,
-                                     store_map_image, store_map_path, force_api)])
+                                     store_map_image, store_map_path, force_api, image_encoding, render_in_process,
+                                     lazy_attributes)])
+
+
+class MapAttributesView(HomeAssistantView):
+    url = "/api/xiaomi_cloud_map_extractor/{entity_id}/attributes"
+    name = "api:xiaomi_cloud_map_extractor:attributes"
+    requires_auth = True
+
+    def __init__(self, hass, cameras: Dict[str, "VacuumCamera"]):
+        self._hass = hass
+        self._cameras = cameras
+
+    async def get(self, request, entity_id: str):
+        camera = self._cameras.get(entity_id)
+        if camera is None:
+            return self.json_message("Entity not found", HTTPStatus.NOT_FOUND)
+        return self.json(await self._hass.async_add_executor_job(camera.get_lazy_attributes))
 
 
 class VacuumCamera(Camera):
     def __init__(self, entity_id: str, host: str, token: str, username: str, password: str, country: str, name: str,
                  should_poll: bool, image_config: ImageConfig, colors: Colors, drawables: Drawables, sizes: Sizes,
                  texts: Texts, attributes: List[str], store_map_raw: bool, store_map_image: bool, store_map_path: str,
-                 force_api: str):
+                 force_api: str, image_encoding: Dict[str, Any], render_in_process: bool = False,
+                 lazy_attributes: Optional[List[str]] = None):
         super().__init__()
         self.entity_id = entity_id
-        self.content_type = CONTENT_TYPE
+        self.content_type = IMAGE_FORMAT_CONTENT_TYPES[image_encoding[CONF_IMAGE_FORMAT]]
         self._vacuum = RoborockVacuum(host, token)
         self._connector = XiaomiCloudConnector(username, password)
         self._status = CameraStatus.INITIALIZING
@@ -171,28 +233,59 @@ class VacuumCamera(Camera):
         self._sizes = sizes
         self._texts = texts
         self._attributes = attributes
+        self._lazy_attributes = lazy_attributes or []
+        self._map_attributes: Dict[str, Any] = {}
+        self._lazy_map_attributes: Optional[Dict[str, Any]] = None
         self._store_map_raw = store_map_raw
         self._store_map_image = store_map_image
         self._store_map_path = store_map_path
         self._forced_api = force_api
+        self._image_encoding = image_encoding
+        self._render_in_process = render_in_process
+        self._render_executor = None
+        self._rendered_map: Optional[RenderedMap] = None
         self._used_api = None
         self._map_saved = None
         self._image = None
+        self._rendered_image = None
+        self._resized_images = OrderedDict()
+        self._resized_images_lock = threading.Lock()
         self._map_data = None
+        self._map_version = None
+        self._map_version_status = CameraStatus.OK
+        self._pending_stages: Dict[str, asyncio.Future] = {}
         self._logged_in = False
         self._logged_in_previously = True
         self._received_map_name_previously = True
         self._country = country
 
     async def async_added_to_hass(self) -> None:
+        self.hass.data.setdefault(DOMAIN, {})[self.entity_id] = self
+        if self._render_in_process:
+            self._render_executor = MapRenderer.create_executor()
+            self.async_on_remove(
+                self.hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._async_shutdown_render_executor))
         self.async_schedule_update_ha_state(True)
 
+    async def async_will_remove_from_hass(self) -> None:
+        if self.hass.data.get(DOMAIN, {}).get(self.entity_id) is self:
+            self.hass.data[DOMAIN].pop(self.entity_id)
+        await self._async_shutdown_render_executor()
+
+    async def _async_shutdown_render_executor(self, *args):
+        if self._render_executor is not None:
+            executor = self._render_executor
+            self._render_executor = None
+            await self.hass.async_add_executor_job(executor.shutdown)
+
     @property
     def frame_interval(self) -> float:
         return 1
 
     def camera_image(self, width: Optional[int] = None, height: Optional[int] = None) -> Optional[bytes]:
-        return self._image
+        if (width is None and height is None) or self._rendered_image is None:
+            return self._image
+        return self._get_resized_image(width, height)
 
     @property
     def name(self) -> str:
@@ -210,9 +303,7 @@ class VacuumCamera(Camera):
 
     @property
     def extra_state_attributes(self) -> Dict[str, Any]:
-        attributes = {}
-        if self._map_data is not None:
-            attributes.update(self.extract_attributes(self._map_data, self._attributes, self._country))
+        attributes = dict(self._map_attributes)
         if self._store_map_raw:
             attributes[ATTRIBUTE_MAP_SAVED] = self._map_saved
         if self._device is not None:
@@ -228,63 +319,78 @@ class VacuumCamera(Camera):
 
     @staticmethod
     def extract_attributes(map_data: MapData, attributes_to_return: List[str], country) -> Dict[str, Any]:
-        attributes = {}
-        rooms = []
-        if map_data.rooms is not None:
-            rooms = dict(filter(lambda x: x[0] is not None, ((x[0], x[1].name) for x in map_data.rooms.items())))
-            if len(rooms) == 0:
-                rooms = list(map_data.rooms.keys())
-        for name, value in {
-            ATTRIBUTE_CALIBRATION: map_data.calibration(),
-            ATTRIBUTE_CHARGER: map_data.charger,
-            ATTRIBUTE_CLEANED_ROOMS: map_data.cleaned_rooms,
-            ATTRIBUTE_COUNTRY: country,
-            ATTRIBUTE_GOTO: map_data.goto,
-            ATTRIBUTE_GOTO_PATH: map_data.goto_path,
-            ATTRIBUTE_GOTO_PREDICTED_PATH: map_data.predicted_path,
-            ATTRIBUTE_IGNORED_OBSTACLES: map_data.ignored_obstacles,
-            ATTRIBUTE_IGNORED_OBSTACLES_WITH_PHOTO: map_data.ignored_obstacles_with_photo,
-            ATTRIBUTE_IMAGE: map_data.image,
-            ATTRIBUTE_IS_EMPTY: map_data.image.is_empty,
-            ATTRIBUTE_MAP_NAME: map_data.map_name,
-            ATTRIBUTE_NO_GO_AREAS: map_data.no_go_areas,
-            ATTRIBUTE_NO_MOPPING_AREAS: map_data.no_mopping_areas,
-            ATTRIBUTE_OBSTACLES: map_data.obstacles,
-            ATTRIBUTE_OBSTACLES_WITH_PHOTO: map_data.obstacles_with_photo,
-            ATTRIBUTE_PATH: map_data.path,
-            ATTRIBUTE_ROOM_NUMBERS: rooms,
-            ATTRIBUTE_ROOMS: map_data.rooms,
-            ATTRIBUTE_VACUUM_POSITION: map_data.vacuum_position,
-            ATTRIBUTE_VACUUM_ROOM: map_data.vacuum_room,
-            ATTRIBUTE_VACUUM_ROOM_NAME: map_data.vacuum_room_name,
-            ATTRIBUTE_WALLS: map_data.walls,
-            ATTRIBUTE_ZONES: map_data.zones
-        }.items():
-            if name in attributes_to_return:
-                attributes[name] = value
-        return attributes
-
-    def update(self):
+        return MapRenderer.extract_attributes(map_data, attributes_to_return, country)
+
+    def get_lazy_attributes(self) -> Dict[str, Any]:
+        map_data = self._map_data
+        lazy_map_attributes = self._lazy_map_attributes
+        if lazy_map_attributes is None and map_data is not None:
+            lazy_map_attributes = MapRenderer.to_payload(
+                self.extract_attributes(map_data, self._lazy_attributes, self._country))
+            if map_data is self._map_data:
+                self._lazy_map_attributes = lazy_map_attributes
+        return lazy_map_attributes or {}
+
+    async def async_update(self):
         counter = 10
         if self._status != CameraStatus.TWO_FACTOR_AUTH_REQUIRED and not self._logged_in:
-            self._handle_login()
+            _LOGGER.debug("Logging in...")
+            try:
+                self._handle_login(await self._async_run_in_executor("login", LOGIN_TIMEOUT, self._connector.login))
+            except asyncio.TimeoutError:
+                _LOGGER.warning("Timed out while logging in")
+                self._status = CameraStatus.FAILED_LOGIN
         if self._device is None and self._logged_in:
-            self._handle_device()
-        map_name = self._handle_map_name(counter)
+            _LOGGER.debug("Retrieving device info, country: %s", self._country)
+            try:
+                self._handle_device(*await self._async_run_in_executor("device", DEVICE_TIMEOUT,
+                                                                       self._connector.get_device_details,
+                                                                       self._vacuum.token, self._country))
+            except asyncio.TimeoutError:
+                _LOGGER.warning("Timed out while retrieving device info")
+                self._status = CameraStatus.FAILED_TO_RETRIEVE_DEVICE
+        map_name = await self._async_handle_map_name(counter)
         if map_name == "retry" and self._device is not None:
             self._status = CameraStatus.FAILED_TO_RETRIEVE_MAP_FROM_VACUUM
         self._received_map_name_previously = map_name != "retry"
         if self._logged_in and map_name != "retry" and self._device is not None:
-            self._handle_map_data(map_name)
+            await self._async_handle_map_data(map_name)
         else:
             _LOGGER.debug("Unable to retrieve map, reasons: Logged in - %s, map name - %s, device retrieved - %s",
                           self._logged_in, map_name, self._device is not None)
-            self._set_map_data(MapDataParser.create_empty(self._colors, str(self._status)))
+            try:
+                await self._async_set_empty_map_data()
+            except asyncio.TimeoutError:
+                _LOGGER.warning("Timed out while encoding empty map")
         self._logged_in_previously = self._logged_in
-
-    def _handle_login(self):
-        _LOGGER.debug("Logging in...")
-        self._logged_in = self._connector.login()
+        _LOGGER.debug("Cloud connector stats: %s", self._connector.stats)
+
+    async def _async_run_in_executor(self, stage: str, timeout: float, target, *args, executor=None):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        pending = self._pending_stages.get(stage)
+        if pending is not None:
+            # A timed out job keeps running in the executor, wait for it instead of starting another one
+            _LOGGER.debug("Waiting for previous %s job to finish", stage)
+            await asyncio.wait({pending}, timeout=timeout)
+            if not pending.done():
+                raise asyncio.TimeoutError
+        if executor is None:
+            future = self.hass.async_add_executor_job(target, *args)
+        else:
+            future = loop.run_in_executor(executor, target, *args)
+        self._pending_stages[stage] = future
+        future.add_done_callback(functools.partial(self._stage_done, stage))
+        return await asyncio.wait_for(asyncio.shield(future), max(deadline - loop.time(), 0))
+
+    def _stage_done(self, stage: str, future: asyncio.Future):
+        if self._pending_stages.get(stage) is future:
+            self._pending_stages.pop(stage)
+        if not future.cancelled() and future.exception() is not None:
+            _LOGGER.debug("Executor job %s failed: %s", stage, future.exception())
+
+    def _handle_login(self, logged_in: Optional[bool]):
+        self._logged_in = logged_in
         if self._logged_in is None:
             _LOGGER.debug("2FA required")
             self._status = CameraStatus.TWO_FACTOR_AUTH_REQUIRED
@@ -297,9 +403,8 @@ class VacuumCamera(Camera):
             if self._logged_in_previously:
                 _LOGGER.error("Unable to log in, check credentials")
 
-    def _handle_device(self):
-        _LOGGER.debug("Retrieving device info, country: %s", self._country)
-        country, user_id, device_id, model = self._connector.get_device_details(self._vacuum.token, self._country)
+    def _handle_device(self, country: Optional[str], user_id: Optional[str], device_id: Optional[str],
+                       model: Optional[str]):
         if model is not None:
             self._country = country
             _LOGGER.debug("Retrieved device model: %s", model)
@@ -309,16 +414,22 @@ class VacuumCamera(Camera):
             _LOGGER.error("Failed to retrieve model")
             self._status = CameraStatus.FAILED_TO_RETRIEVE_DEVICE
 
-    def _handle_map_name(self, counter: int) -> str:
+    async def _async_handle_map_name(self, counter: int) -> str:
         map_name = "retry"
         if self._device is not None and not self._device.should_get_map_from_vacuum():
             map_name = "0"
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + MAP_NAME_TIMEOUT
+        delay = MAP_NAME_RETRY_DELAY
         while map_name == "retry" and counter > 0:
             _LOGGER.debug("Retrieving map name from device")
-            time.sleep(0.1)
             try:
-                map_name = self._vacuum.map()[0]
+                map_name = (await self._async_run_in_executor("map_name", max(deadline - loop.time(), 0),
+                                                              self._vacuum.map))[0]
                 _LOGGER.debug("Map name %s", map_name)
+            except asyncio.TimeoutError:
+                _LOGGER.debug("Timed out while fetching the map name")
+                break
             except OSError as exc:
                 _LOGGER.error("Got OSError while fetching the state: %s", exc)
             except DeviceException as exc:
@@ -327,13 +438,118 @@ class VacuumCamera(Camera):
                 self._received_map_name_previously = False
             finally:
                 counter = counter - 1
+            if map_name == "retry" and counter > 0:
+                if loop.time() + delay >= deadline:
+                    break
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAP_NAME_MAX_RETRY_DELAY)
         return map_name
 
-    def _handle_map_data(self, map_name: str):
+    async def _async_handle_map_data(self, map_name: str):
         _LOGGER.debug("Retrieving map from Xiaomi cloud")
         store_map_path = self._store_map_path if self._store_map_raw else None
-        map_data, map_stored = self._device.get_map(map_name, self._colors, self._drawables, self._texts,
-                                                    self._sizes, self._image_config, store_map_path)
+        try:
+            map_url = await self._async_run_in_executor("map_url", MAP_URL_TIMEOUT, self._device.get_cached_map_url,
+                                                        map_name)
+        except asyncio.TimeoutError:
+            _LOGGER.warning("Timed out while retrieving map url")
+            self._status = CameraStatus.UNABLE_TO_RETRIEVE_MAP
+            return
+        if map_url is None:
+            await self._async_handle_map_data_result(None, False)
+            return
+        session = async_get_clientsession(self.hass)
+        raw_map, modified = await self._connector.async_get_raw_map_data(session, map_url, MAP_DOWNLOAD_TIMEOUT)
+        if not modified and self._map_version is None:
+            _LOGGER.debug("Map file not modified, but there is no previous map to keep, downloading it again")
+            raw_map, modified = await self._connector.async_get_raw_map_data(session, map_url, MAP_DOWNLOAD_TIMEOUT,
+                                                                             use_validators=False)
+        if not modified and self._map_version is not None:
+            _LOGGER.debug("Map file not modified, keeping previous map")
+            self._status = self._map_version_status
+            return
+        if raw_map is None:
+            self._connector.invalidate_map_validators()
+            self._device.invalidate_map_url(map_name)
+            _LOGGER.warning("Unable to download map data")
+            self._status = CameraStatus.UNABLE_TO_RETRIEVE_MAP
+            return
+        map_version = (map_name, self._device.get_map_version(raw_map))
+        if map_version == self._map_version:
+            _LOGGER.debug("Map version unchanged, keeping previous map")
+            self._status = self._map_version_status
+            return
+        if self._render_executor is not None:
+            await self._async_render_in_process(map_name, raw_map, store_map_path, map_version)
+            return
+        try:
+            map_data, map_stored = await self._async_run_in_executor("render", RENDER_TIMEOUT,
+                                                                     self._device.parse_raw_map,
+                                                                     map_name, raw_map, self._colors,
+                                                                     self._drawables, self._texts, self._sizes,
+                                                                     self._image_config, store_map_path)
+            await self._async_handle_map_data_result(map_data, map_stored)
+            self._set_map_version(map_version)
+        except asyncio.TimeoutError:
+            _LOGGER.warning("Timed out while rendering map")
+            self._status = CameraStatus.UNABLE_TO_PARSE_MAP
+
+    def _set_map_version(self, map_version: Any):
+        if self._status in (CameraStatus.OK, CameraStatus.EMPTY_MAP):
+            self._map_version = map_version
+            self._map_version_status = self._status
+        else:
+            self._map_version = None
+
+    async def _async_render_in_process(self, map_name: str, raw_map: bytes, store_map_path: Optional[str],
+                                       map_version: Any):
+        try:
+            rendered = await self._async_run_in_executor(
+                "render", RENDER_TIMEOUT, MapRenderer.render, self._used_api, self._device.model, map_name, raw_map,
+                self._colors, self._drawables, self._texts, self._sizes, self._image_config, self._image_encoding,
+                self._attributes + self._lazy_attributes, self._country, store_map_path,
+                executor=self._render_executor)
+        except asyncio.TimeoutError:
+            _LOGGER.warning("Timed out while rendering map")
+            self._status = CameraStatus.UNABLE_TO_PARSE_MAP
+            return
+        except Exception as exc:
+            _LOGGER.warning("Unable to parse map data: %s", exc)
+            self._status = CameraStatus.UNABLE_TO_PARSE_MAP
+            return
+        await self._async_handle_rendered_map(rendered)
+        self._set_map_version(map_version)
+
+    async def _async_handle_rendered_map(self, rendered: Optional[RenderedMap]):
+        if rendered is None:
+            await self._async_handle_map_data_result(None, False)
+            return
+        _LOGGER.debug("Map rendered")
+        self._map_saved = rendered.map_stored
+        if rendered.is_empty:
+            _LOGGER.debug("Map is empty")
+            self._status = CameraStatus.EMPTY_MAP
+            if self._rendered_map is None or self._rendered_map.is_empty:
+                await self._async_set_rendered_map(rendered)
+        else:
+            _LOGGER.debug("Map is ok")
+            await self._async_set_rendered_map(rendered)
+            self._status = CameraStatus.OK
+
+    async def _async_set_rendered_map(self, rendered: RenderedMap):
+        if self._rendered_image is None or self._rendered_image[0] != rendered.image_hash:
+            self._image = rendered.image
+            self._rendered_image = (rendered.image_hash, None, rendered.image)
+            if self._store_map_image:
+                await self.hass.async_add_executor_job(self._store_image, rendered.image)
+        else:
+            _LOGGER.debug("Map image unchanged, reusing encoded image")
+        self._map_data = None
+        self._rendered_map = rendered
+        self._map_attributes = {k: v for k, v in rendered.attributes.items() if k not in self._lazy_attributes}
+        self._lazy_map_attributes = {k: v for k, v in rendered.attributes.items() if k in self._lazy_attributes}
+
+    async def _async_handle_map_data_result(self, map_data: Optional[MapData], map_stored: bool):
         if map_data is not None:
             # noinspection PyBroadException
             try:
@@ -343,25 +559,76 @@ class VacuumCamera(Camera):
                     _LOGGER.debug("Map is empty")
                     self._status = CameraStatus.EMPTY_MAP
                     if self._map_data is None or self._map_data.image.is_empty:
-                        self._set_map_data(map_data)
+                        await self._async_set_map_data(map_data)
                 else:
                     _LOGGER.debug("Map is ok")
-                    self._set_map_data(map_data)
+                    await self._async_set_map_data(map_data)
                     self._status = CameraStatus.OK
+            except asyncio.TimeoutError:
+                raise
             except:
                 _LOGGER.warning("Unable to parse map data")
                 self._status = CameraStatus.UNABLE_TO_PARSE_MAP
         else:
             self._logged_in = False
+            self._connector.invalidate_service_token()
             _LOGGER.warning("Unable to retrieve map data")
             self._status = CameraStatus.UNABLE_TO_RETRIEVE_MAP
 
-    def _set_map_data(self, map_data: MapData):
-        img_byte_arr = io.BytesIO()
-        map_data.image.data.save(img_byte_arr, format='PNG')
-        self._image = img_byte_arr.getvalue()
+    async def _async_set_empty_map_data(self):
+        self._map_version = None
+        await self._async_set_map_data(MapDataParser.create_empty(self._colors, str(self._status)))
+
+    async def _async_set_map_data(self, map_data: MapData):
+        image_hash, image, encoded, attributes = await self._async_run_in_executor(
+            "encode", RENDER_TIMEOUT, self._prepare_map_data, map_data, self._rendered_image)
+        if encoded is not None:
+            self._image = encoded
+            self._rendered_image = (image_hash, image, encoded)
+        else:
+            _LOGGER.debug("Map image unchanged, reusing encoded image")
+        self._map_attributes = attributes
+        self._lazy_map_attributes = None
         self._map_data = map_data
-        self._store_image()
+        self._rendered_map = None
+
+    def _prepare_map_data(self, map_data: MapData, rendered_image: Optional[tuple]) -> tuple:
+        image = map_data.image.data
+        image_hash = hashlib.sha1(image.tobytes())
+        image_hash.update(repr((image.mode, image.size)).encode())
+        image_hash = image_hash.digest()
+        encoded = None
+        if rendered_image is None or rendered_image[0] != image_hash:
+            _LOGGER.debug("Encoding map image")
+            encoded = self._encode_image(image)
+            self._store_image(encoded)
+        attributes = MapRenderer.to_payload(self.extract_attributes(map_data, self._attributes, self._country))
+        return image_hash, image, encoded, attributes
+
+    def _encode_image(self, image) -> bytes:
+        return ImageHandler.encode(image,
+                                   self._image_encoding[CONF_IMAGE_FORMAT],
+                                   self._image_encoding[CONF_IMAGE_COMPRESS_LEVEL],
+                                   self._image_encoding[CONF_IMAGE_QUALITY])
+
+    def _get_resized_image(self, width: Optional[int], height: Optional[int]) -> bytes:
+        image_hash, image, encoded = self._rendered_image
+        key = (image_hash, width, height)
+        with self._resized_images_lock:
+            if key in self._resized_images:
+                self._resized_images.move_to_end(key)
+                return self._resized_images[key]
+        if image is None:
+            image = Image.open(io.BytesIO(encoded))
+        resized = image.copy()
+        resized.thumbnail((width or image.size[0], height or image.size[1]))
+        if resized.size != image.size:
+            encoded = self._encode_image(resized)
+        with self._resized_images_lock:
+            self._resized_images[key] = encoded
+            while len(self._resized_images) > RESIZED_IMAGES_CACHE_SIZE:
+                self._resized_images.popitem(last=False)
+        return encoded
 
     def _create_device(self, user_id: str, device_id: str, model: str) -> XiaomiCloudVacuum:
         self._used_api = self._detect_api(model)
@@ -389,11 +656,12 @@ class VacuumCamera(Camera):
             return filtered[0][0]
         return None
 
-    def _store_image(self):
+    def _store_image(self, image: bytes):
         if self._store_map_image:
             try:
-                image = Image.open(io.BytesIO(self._image))
-                image.save(f"{self._store_map_path}/map_image_{self._device.model}.png")
+                extension = self._image_encoding[CONF_IMAGE_FORMAT]
+                with open(f"{self._store_map_path}/map_image_{self._device.model}.{extension}", "wb") as image_file:
+                    image_file.write(image)
             except:
                 _LOGGER.warning("Error while saving image")
 
@@ -1,6 +1,10 @@
+import hashlib
+import io
 import logging
 import math
-from typing import Callable, Dict, List
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 from PIL import Image, ImageDraw, ImageFont
 from PIL.Image import Image as ImageType
@@ -8,7 +12,7 @@ from PIL.Image import Image as ImageType
 from custom_components.xiaomi_cloud_map_extractor.common.map_data import Area, ImageData, Obstacle, Path, Point, Room, \
     Wall, Zone
 from custom_components.xiaomi_cloud_map_extractor.const import *
-from custom_components.xiaomi_cloud_map_extractor.types import Color, Colors, Sizes, Texts
+from custom_components.xiaomi_cloud_map_extractor.types import Color, Colors, ImageConfig, Palette, Sizes, Texts
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -60,9 +64,12 @@ class ImageHandler:
         COLOR_ROOM_15: (72, 201, 176),
         COLOR_ROOM_16: (165, 105, 189)
     }
+    RAW_IMAGE_CACHE_SIZE = 4
     ROOM_COLORS = [COLOR_ROOM_1, COLOR_ROOM_2, COLOR_ROOM_3, COLOR_ROOM_4, COLOR_ROOM_5, COLOR_ROOM_6, COLOR_ROOM_7,
                    COLOR_ROOM_8, COLOR_ROOM_9, COLOR_ROOM_10, COLOR_ROOM_11, COLOR_ROOM_12, COLOR_ROOM_13,
                    COLOR_ROOM_14, COLOR_ROOM_15, COLOR_ROOM_16]
+    _raw_image_cache = OrderedDict()
+    _raw_image_cache_lock = threading.Lock()
 
     @staticmethod
     def create_empty_map_image(colors: Colors, text: str = "NO MAP") -> ImageType:
@@ -77,6 +84,46 @@ class ImageHandler:
         draw.text(((image.size[0] - w) / 2, (image.size[1] - h) / 2), text, fill=text_color)
         return image
 
+    @staticmethod
+    def encode(image: ImageType, image_format: str = IMAGE_FORMAT_PNG, compress_level: int = 6,
+               quality: int = 80) -> bytes:
+        img_byte_arr = io.BytesIO()
+        if image_format == IMAGE_FORMAT_JPEG:
+            image.convert("RGB").save(img_byte_arr, format="JPEG", quality=quality)
+        elif image_format == IMAGE_FORMAT_WEBP:
+            image.save(img_byte_arr, format="WEBP", quality=quality)
+        else:
+            image.save(img_byte_arr, format="PNG", compress_level=compress_level, optimize=False)
+        return img_byte_arr.getvalue()
+
+    @staticmethod
+    def create_palette(color: Color) -> Palette:
+        return [color] * 256
+
+    @staticmethod
+    def parse_raw_image(raw_data: bytes, width: int, height: int, palette: Palette, room_numbers: Dict[int, int],
+                        image_config: ImageConfig, layer_palettes: Optional[Dict[str, Palette]] = None) \
+            -> Tuple[ImageType, Dict[int, Tuple[int, int, int, int]], Set[int], Dict[str, ImageType]]:
+        digest = hashlib.sha1(raw_data)
+        digest.update(repr((width, height, palette, room_numbers, image_config[CONF_SCALE], image_config[CONF_TRIM],
+                            layer_palettes)).encode())
+        key = digest.digest()
+        with ImageHandler._raw_image_cache_lock:
+            cached = ImageHandler._raw_image_cache.get(key)
+            if cached is not None:
+                ImageHandler._raw_image_cache.move_to_end(key)
+        if cached is None:
+            _LOGGER.debug("Rasterizing map image")
+            cached = ImageHandler.__render_raw_image__(raw_data, width, height, palette, room_numbers, image_config,
+                                                       layer_palettes)
+            with ImageHandler._raw_image_cache_lock:
+                ImageHandler._raw_image_cache[key] = cached
+                while len(ImageHandler._raw_image_cache) > ImageHandler.RAW_IMAGE_CACHE_SIZE:
+                    ImageHandler._raw_image_cache.popitem(last=False)
+        image, rooms, pixel_types, layers = cached
+        # drawing on the returned images must not alter the cached base layer
+        return image.copy(), dict(rooms), set(pixel_types), {name: layer.copy() for name, layer in layers.items()}
+
     @staticmethod
     def draw_path(image: ImageData, path: Path, sizes: Sizes, colors: Colors, scale: float):
         ImageHandler.__draw_path__(image, path, sizes, ImageHandler.__get_color__(COLOR_PATH, colors), scale)
@@ -183,6 +230,11 @@ class ImageHandler:
             y = text_config[CONF_Y] * image.data.size[1] / 100
             ImageHandler.__draw_text__(image, text_config[CONF_TEXT], x, y, text_config[CONF_COLOR],
                                        text_config[CONF_FONT], text_config[CONF_FONT_SIZE])
+        ImageHandler.release_overlays(image)
+
+    @staticmethod
+    def release_overlays(image: ImageData):
+        image.overlays.clear()
 
     @staticmethod
     def draw_layer(image: ImageData, layer_name: str):
@@ -274,20 +326,18 @@ class ImageHandler:
 
     @staticmethod
     def __draw_path__(image: ImageData, path: Path, sizes: Sizes, color: Color, scale: float):
-        if len(path.path) < 1:
+        coordinates = path.coordinates()
+        if len(coordinates) < 1:
             return
 
         path_width = sizes[CONF_SIZE_PATH_WIDTH]
 
         def draw_func(draw: ImageDraw):
-            for current_path in path.path:
-                if len(current_path) > 1:
-                    s = current_path[0].to_img(image.dimensions)
-                    for point in current_path[1:]:
-                        e = point.to_img(image.dimensions)
-                        draw.line([s.x * scale, s.y * scale, e.x * scale, e.y * scale],
-                                  width=int(scale * path_width), fill=color)
-                        s = e
+            for current_path in coordinates:
+                if len(current_path) > 3:
+                    c = image.dimensions.to_img_coordinates(current_path, scale)
+                    for i in range(0, len(c) - 3, 2):
+                        draw.line(c[i:i + 4], width=int(scale * path_width), fill=color)
 
         ImageHandler.__draw_on_new_layer__(image, draw_func, scale, ImageHandler.__use_transparency__(color))
 
@@ -308,6 +358,52 @@ class ImageHandler:
 
         ImageHandler.__draw_on_new_layer__(image, draw_func, 1, ImageHandler.__use_transparency__(color))
 
+    @staticmethod
+    def __render_raw_image__(raw_data: bytes, width: int, height: int, palette: Palette, room_numbers: Dict[int, int],
+                             image_config: ImageConfig, layer_palettes: Optional[Dict[str, Palette]]) \
+            -> Tuple[ImageType, Dict[int, Tuple[int, int, int, int]], Set[int], Dict[str, ImageType]]:
+        scale = image_config[CONF_SCALE]
+        trim_left = int(image_config[CONF_TRIM][CONF_LEFT] * width / 100)
+        trim_right = int(image_config[CONF_TRIM][CONF_RIGHT] * width / 100)
+        trim_top = int(image_config[CONF_TRIM][CONF_TOP] * height / 100)
+        trim_bottom = int(image_config[CONF_TRIM][CONF_BOTTOM] * height / 100)
+        trimmed_height = height - trim_top - trim_bottom
+        trimmed_width = width - trim_left - trim_right
+        pixels = Image.frombuffer('L', (width, height), raw_data, 'raw', 'L', 0, 1) \
+            .crop((trim_left, trim_bottom, trim_left + trimmed_width, trim_bottom + trimmed_height))
+        pixel_types = {pixel_type for pixel_type, count in enumerate(pixels.histogram()) if count > 0}
+        image = ImageHandler.__apply_palette__(pixels, palette)
+        layers = {}
+        if layer_palettes is not None:
+            for name, layer_palette in layer_palettes.items():
+                layers[name] = ImageHandler.__apply_palette__(pixels, layer_palette)
+        present_room_numbers = {t: n for t, n in room_numbers.items() if t in pixel_types}
+        rooms = ImageHandler.__find_rooms__(pixels, present_room_numbers, trim_left, trim_bottom)
+        if scale != 1:
+            size = (int(trimmed_width * scale), int(trimmed_height * scale))
+            image = image.resize(size, resample=Image.NEAREST)
+            layers = {name: layer.resize(size, resample=Image.NEAREST) for name, layer in layers.items()}
+        return image, rooms, pixel_types, layers
+
+    @staticmethod
+    def __apply_palette__(pixels: ImageType, palette: Palette) -> ImageType:
+        rgba_palette = [color if len(color) > 3 else (*color, 255) for color in palette]
+        bands = [pixels.point([color[band] for color in rgba_palette]) for band in range(4)]
+        return Image.merge('RGBA', bands).transpose(Image.FLIP_TOP_BOTTOM)
+
+    @staticmethod
+    def __find_rooms__(pixels: ImageType, room_numbers: Dict[int, int], offset_x: int, offset_y: int) \
+            -> Dict[int, Tuple[int, int, int, int]]:
+        found = []
+        for room_number in set(room_numbers.values()):
+            mask = pixels.point([255 if room_numbers.get(value) == room_number else 0 for value in range(256)])
+            left, top, right, bottom = mask.getbbox()
+            first_x = mask.crop((0, top, pixels.size[0], top + 1)).getbbox()[0]
+            bounds = (left + offset_x, top + offset_y, right - 1 + offset_x, bottom - 1 + offset_y)
+            found.append(((top, first_x), room_number, bounds))
+        # keep the order in which rooms appear when scanning the map row by row
+        return {room_number: bounds for _, room_number, bounds in sorted(found)}
+
     @staticmethod
     def __get_color__(name, colors: Colors, default_name: str = None) -> Color:
         if name in colors:
@@ -321,15 +417,85 @@ class ImageHandler:
         if scale == 1 and not use_transparency:
             draw = ImageDraw.Draw(image.data, "RGBA")
             draw_function(draw)
+            return
+        layer = ImageHandler.__get_overlay__(image, scale)
+        draw = BoundsTrackingDraw(ImageDraw.Draw(layer, "RGBA"), layer.size)
+        draw_function(draw)
+        bbox = draw.bounds
+        if bbox is None:
+            return
+        if scale == 1:
+            region = layer.crop(bbox)
+            dest = bbox[0:2]
         else:
-            size = [int(image.data.size[0] * scale), int(image.data.size[1] * scale)]
-            layer = Image.new("RGBA", size, (255, 255, 255, 0))
-            draw = ImageDraw.Draw(layer, "RGBA")
-            draw_function(draw)
-            if scale != 1:
-                layer = layer.resize(image.data.size, resample=Image.BOX)
-            ImageHandler.__draw_layer__(image, layer)
+            width, height = image.data.size
+            scale_x = layer.size[0] / width
+            scale_y = layer.size[1] / height
+            left = math.floor(bbox[0] / scale_x)
+            top = math.floor(bbox[1] / scale_y)
+            right = min(math.ceil(bbox[2] / scale_x), width)
+            bottom = min(math.ceil(bbox[3] / scale_y), height)
+            region = layer.resize((right - left, bottom - top), resample=Image.BOX,
+                                  box=(left * scale_x, top * scale_y, right * scale_x, bottom * scale_y))
+            dest = (left, top)
+        image.data.alpha_composite(region, dest)
+        layer.paste((255, 255, 255, 0), bbox)
+
+    @staticmethod
+    def __get_overlay__(image: ImageData, scale: float) -> ImageType:
+        size = (int(image.data.size[0] * scale), int(image.data.size[1] * scale))
+        key = (image.data.size, scale)
+        if key not in image.overlays:
+            image.overlays[key] = Image.new("RGBA", size, (255, 255, 255, 0))
+        return image.overlays[key]
 
     @staticmethod
     def __draw_layer__(image: ImageData, layer: ImageType):
         image.data = Image.alpha_composite(image.data, layer)
+
+
+class BoundsTrackingDraw:
+    SHAPES = ["ellipse", "line", "pieslice", "polygon", "rectangle"]
+
+    def __init__(self, draw: ImageDraw.ImageDraw, size: Tuple[int, int]):
+        self._draw = draw
+        self._size = size
+        self.bounds: Optional[Tuple[int, int, int, int]] = None
+
+    def __getattr__(self, name: str):
+        method = getattr(self._draw, name)
+        if name == "text":
+            def tracked_text(*args, **kwargs):
+                self.__include__([0, 0, self._size[0], self._size[1]], 0)
+                return method(*args, **kwargs)
+
+            return tracked_text
+        if name not in BoundsTrackingDraw.SHAPES:
+            return method
+
+        def tracked_shape(xy, *args, **kwargs):
+            self.__include__(xy, kwargs.get("width", 1))
+            return method(xy, *args, **kwargs)
+
+        return tracked_shape
+
+    def __include__(self, xy, width: float):
+        coordinates = []
+        for value in xy:
+            if isinstance(value, (list, tuple)):
+                coordinates.extend(value)
+            else:
+                coordinates.append(value)
+        xs = coordinates[0::2]
+        ys = coordinates[1::2]
+        margin = math.ceil(width) + 1
+        bounds = (max(math.floor(min(xs)) - margin, 0),
+                  max(math.floor(min(ys)) - margin, 0),
+                  min(math.ceil(max(xs)) + margin + 1, self._size[0]),
+                  min(math.ceil(max(ys)) + margin + 1, self._size[1]))
+        if bounds[0] >= bounds[2] or bounds[1] >= bounds[3]:
+            return
+        if self.bounds is not None:
+            bounds = (min(bounds[0], self.bounds[0]), min(bounds[1], self.bounds[1]),
+                      max(bounds[2], self.bounds[2]), max(bounds[3], self.bounds[3]))
+        self.bounds = bounds
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Dict, List, Optional, Set
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
 
 from PIL.Image import Image as ImageType
 
@@ -9,6 +10,8 @@ from custom_components.xiaomi_cloud_map_extractor.types import CalibrationPoints
 
 
 class Point:
+    __slots__ = ("x", "y", "a")
+
     def __init__(self, x: float, y: float, a=None):
         self.x = x
         self.y = y
@@ -64,6 +67,8 @@ class Point:
 
 
 class Obstacle(Point):
+    __slots__ = ("details",)
+
     def __init__(self, x: float, y: float, details: Dict[str, Any]):
         super().__init__(x, y)
         self.details = details
@@ -90,6 +95,18 @@ class ImageDimensions:
         p = self.img_transformation(point)
         return Point((p.x - self.left) * self.scale, (self.height - (p.y - self.top) - 1) * self.scale)
 
+    def to_img_coordinates(self, coordinates: Sequence[float], scale: float = 1) -> List[float]:
+        origin = self.img_transformation(Point(0, 0))
+        unit = self.img_transformation(Point(1, 1))
+        ax = (unit.x - origin.x) * self.scale * scale
+        bx = (origin.x - self.left) * self.scale * scale
+        ay = -(unit.y - origin.y) * self.scale * scale
+        by = (self.height - (origin.y - self.top) - 1) * self.scale * scale
+        result = [0.0] * len(coordinates)
+        result[0::2] = [x * ax + bx for x in coordinates[0::2]]
+        result[1::2] = [y * ay + by for y in coordinates[1::2]]
+        return result
+
 
 class ImageData:
     def __init__(self, size: int, top: int, left: int, height: int, width: int, image_config: ImageConfig,
@@ -109,6 +126,7 @@ class ImageData:
                                           rotation, img_transformation)
         self.is_empty = height == 0 or width == 0
         self.data = data
+        self.overlays: Dict[Tuple[Tuple[int, int], float], ImageType] = {}
         if additional_layers is None:
             self.additional_layers = {}
         else:
@@ -141,12 +159,23 @@ class ImageData:
 
 
 class Path:
+    __slots__ = ("point_length", "point_size", "angle", "_coordinates")
+
     def __init__(self, point_length: Optional[int], point_size: Optional[int], angle: Optional[int],
-                 path: List[List[Point]]):
+                 path: Optional[List[List[Point]]] = None, coordinates: Optional[List[Sequence[float]]] = None):
         self.point_length = point_length
         self.point_size = point_size
         self.angle = angle
-        self.path = path
+        if coordinates is None:
+            coordinates = [array("d", [c for point in points for c in (point.x, point.y)]) for points in path]
+        self._coordinates = coordinates
+
+    @property
+    def path(self) -> List[List[Point]]:
+        return [[Point(c[i], c[i + 1]) for i in range(0, len(c) - 1, 2)] for c in self._coordinates]
+
+    def coordinates(self) -> List[Sequence[float]]:
+        return self._coordinates
 
     def as_dict(self) -> Dict[str, Any]:
         return {
@@ -158,6 +187,8 @@ class Path:
 
 
 class Zone:
+    __slots__ = ("x0", "y0", "x1", "y1")
+
     def __init__(self, x0: float, y0: float, x1: float, y1: float):
         self.x0 = x0
         self.y0 = y0
@@ -183,6 +214,8 @@ class Zone:
 
 
 class Room(Zone):
+    __slots__ = ("number", "name", "pos_x", "pos_y")
+
     def __init__(self, number: int, x0: Optional[float], y0: Optional[float], x1: Optional[float], y1: Optional[float],
                  name: str = None, pos_x: float = None, pos_y: float = None):
         super().__init__(x0, y0, x1, y1)
@@ -214,6 +247,8 @@ class Room(Zone):
 
 
 class Wall:
+    __slots__ = ("x0", "y0", "x1", "y1")
+
     def __init__(self, x0: float, y0: float, x1: float, y1: float):
         self.x0 = x0
         self.y0 = y0
@@ -244,6 +279,8 @@ class Wall:
 
 
 class Area:
+    __slots__ = ("x0", "y0", "x1", "y1", "x2", "y2", "x3", "y3")
+
     def __init__(self, x0: float, y0: float, x1: float, y1: float, x2: float, y2: float, x3: float, y3: float):
         self.x0 = x0
         self.y0 = y0
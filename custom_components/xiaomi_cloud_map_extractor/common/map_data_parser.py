@@ -57,3 +57,4 @@ class MapDataParser:
                 ImageHandler.draw_layer(map_data.image, drawable)
             if DRAWABLE_ROOM_NAMES == drawable and map_data.rooms is not None:
                 ImageHandler.draw_room_names(map_data.image, map_data.rooms, colors)
+        ImageHandler.release_overlays(map_data.image)
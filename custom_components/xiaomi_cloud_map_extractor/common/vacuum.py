@@ -1,5 +1,6 @@
+import hashlib
 from abc import abstractmethod
-from typing import Optional, Tuple
+from typing import Any, Optional, Tuple
 
 from custom_components.xiaomi_cloud_map_extractor.common.map_data import MapData
 from custom_components.xiaomi_cloud_map_extractor.common.map_data_parser import MapDataParser
@@ -27,24 +28,53 @@ class XiaomiCloudVacuum:
         response = self.get_raw_map_data(map_name)
         if response is None:
             return None, False
+        return self.parse_raw_map(map_name, response, colors, drawables, texts, sizes, image_config, store_map_path)
+
+    def parse_raw_map(self,
+                      map_name: str,
+                      raw_map: bytes,
+                      colors: Colors,
+                      drawables: Drawables,
+                      texts: Texts,
+                      sizes: Sizes,
+                      image_config: ImageConfig,
+                      store_map_path: Optional[str] = None) -> Tuple[Optional[MapData], bool]:
         map_stored = False
         if store_map_path is not None:
             raw_map_file = open(f"{store_map_path}/map_data_{self.model}.{self.get_map_archive_extension()}", "wb")
-            raw_map_file.write(response)
+            raw_map_file.write(raw_map)
             raw_map_file.close()
             map_stored = True
-        map_data = self.decode_map(response, colors, drawables, texts, sizes, image_config)
+        map_data = self.decode_map(raw_map, colors, drawables, texts, sizes, image_config)
         if map_data is None:
             return None, map_stored
         map_data.map_name = map_name
         return map_data, map_stored
 
+    def get_map_version(self, raw_map: bytes) -> Any:
+        return hashlib.sha1(raw_map).digest()
+
     def get_raw_map_data(self, map_name: Optional[str]) -> Optional[bytes]:
         if map_name is None:
             return None
-        map_url = self.get_map_url(map_name)
+        map_url = self.get_cached_map_url(map_name)
         return self._connector.get_raw_map_data(map_url)
 
+    def get_cached_map_url(self, map_name: str) -> Optional[str]:
+        key = self.__map_url_key__(map_name)
+        map_url = self._connector.get_cached_map_url(key)
+        if map_url is None:
+            map_url = self.get_map_url(map_name)
+            if map_url is not None:
+                self._connector.cache_map_url(key, map_url)
+        return map_url
+
+    def invalidate_map_url(self, map_name: str):
+        self._connector.invalidate_map_url(self.__map_url_key__(map_name))
+
+    def __map_url_key__(self, map_name: str) -> str:
+        return f"{self._country}/{self._device_id}/{map_name}"
+
     def decode_map(self,
                    raw_map: bytes,
                    colors: Colors,
@@ -1,3 +1,4 @@
+import asyncio
 import base64
 import hashlib
 import hmac
@@ -7,9 +8,12 @@ import os
 import random
 import time
 from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
 from Crypto.Cipher import ARC4
 
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
 
 from custom_components.xiaomi_cloud_map_extractor.const import *
 
@@ -18,6 +22,12 @@ _LOGGER = logging.getLogger(__name__)
 
 # noinspection PyBroadException
 class XiaomiCloudConnector:
+    POOL_SIZE = 4
+    SERVICE_TOKEN_TTL = 12 * 60 * 60
+    DEVICES_TTL = 60 * 60
+    MAP_URL_TTL = 10 * 60
+    MAP_URL_EXPIRY_MARGIN = 30
+    REQUEST_TIMEOUT = 10
 
     def __init__(self, username: str, password: str):
         self.two_factor_auth_url = None
@@ -25,7 +35,16 @@ class XiaomiCloudConnector:
         self._password = password
         self._agent = self.generate_agent()
         self._device_id = self.generate_device_id()
-        self._session = requests.session()
+        self._session = self.create_session()
+        self._service_token_expiry = 0
+        self._devices: Dict[str, Tuple[float, Any]] = {}
+        self._map_urls: Dict[str, Tuple[float, str]] = {}
+        self._map_validators: Dict[str, Dict[str, str]] = {}
+        self._stats = {
+            "requests": 0,
+            "cache_hits": 0,
+            "relogins": 0
+        }
         self._sign = None
         self._ssecurity = None
         self._userId = None
@@ -45,7 +64,8 @@ class XiaomiCloudConnector:
             "userId": self._username
         }
         try:
-            response = self._session.get(url, headers=headers, cookies=cookies, timeout=10)
+            self._stats["requests"] += 1
+            response = self._session.get(url, headers=headers, cookies=cookies, timeout=self.REQUEST_TIMEOUT)
         except:
             response = None
         successful = response is not None and response.status_code == 200 and "_sign" in self.to_json(response.text)
@@ -69,7 +89,8 @@ class XiaomiCloudConnector:
             "_json": "true"
         }
         try:
-            response = self._session.post(url, headers=headers, params=fields, timeout=10)
+            self._stats["requests"] += 1
+            response = self._session.post(url, headers=headers, params=fields, timeout=self.REQUEST_TIMEOUT)
         except:
             response = None
         successful = response is not None and response.status_code == 200
@@ -102,7 +123,8 @@ class XiaomiCloudConnector:
             "Content-Type": "application/x-www-form-urlencoded"
         }
         try:
-            response = self._session.get(self._location, headers=headers, timeout=10)
+            self._stats["requests"] += 1
+            response = self._session.get(self._location, headers=headers, timeout=self.REQUEST_TIMEOUT)
         except:
             response = None
         successful = response is not None and response.status_code == 200 and "serviceToken" in response.cookies
@@ -111,26 +133,64 @@ class XiaomiCloudConnector:
         return successful
 
     def login(self) -> bool:
-        self._session.close()
-        self._session = requests.session()
+        if self._serviceToken is not None and time.monotonic() < self._service_token_expiry:
+            self._stats["cache_hits"] += 1
+            return True
+        if self._serviceToken is not None:
+            self._stats["relogins"] += 1
+        self._serviceToken = None
+        self._session.cookies.clear()
         self._agent = self.generate_agent()
         self._device_id = self.generate_device_id()
         self._session.cookies.set("sdkVersion", "accountsdk-18.8.15", domain="mi.com")
         self._session.cookies.set("sdkVersion", "accountsdk-18.8.15", domain="xiaomi.com")
         self._session.cookies.set("deviceId", self._device_id, domain="mi.com")
         self._session.cookies.set("deviceId", self._device_id, domain="xiaomi.com")
-        return self.login_step_1() and self.login_step_2() and self.login_step_3()
+        successful = self.login_step_1() and self.login_step_2() and self.login_step_3()
+        if successful:
+            self._service_token_expiry = time.monotonic() + self.SERVICE_TOKEN_TTL
+        return successful
+
+    def invalidate_service_token(self):
+        self._service_token_expiry = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats)
 
     def get_raw_map_data(self, map_url) -> Optional[bytes]:
         if map_url is not None:
             try:
-                response = self._session.get(map_url, timeout=10)
+                self._stats["requests"] += 1
+                response = self._session.get(map_url, timeout=self.REQUEST_TIMEOUT)
             except:
                 response = None
             if response is not None and response.status_code == 200:
                 return response.content
         return None
 
+    async def async_get_raw_map_data(self, session: aiohttp.ClientSession, map_url: Optional[str],
+                                     timeout: float, use_validators: bool = True) -> Tuple[Optional[bytes], bool]:
+        if map_url is not None:
+            resource = urlparse(map_url)._replace(query="", fragment="").geturl()
+            headers = self._map_validators.get(resource, {}) if use_validators else {}
+            try:
+                self._stats["requests"] += 1
+                async with session.get(map_url, headers=headers,
+                                       timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    if response.status == 304:
+                        self._stats["cache_hits"] += 1
+                        return None, False
+                    if response.status == 200:
+                        self._map_validators[resource] = self.get_validators(response.headers)
+                        return await response.read(), True
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                _LOGGER.debug("Failed to download map: %s", exc)
+        return None, True
+
+    def invalidate_map_validators(self):
+        self._map_validators.clear()
+
     def get_device_details(self, token: str,
                            country: str) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
         countries_to_check = CONF_AVAILABLE_COUNTRIES
@@ -150,11 +210,38 @@ class XiaomiCloudConnector:
         return None, None, None, None
 
     def get_devices(self, country: str) -> Any:
+        if country in self._devices:
+            expiry, devices = self._devices[country]
+            if time.monotonic() < expiry:
+                self._stats["cache_hits"] += 1
+                return devices
         url = self.get_api_url(country) + "/home/device_list"
         params = {
             "data": '{"getVirtualModel":false,"getHuamiDevices":0}'
         }
-        return self.execute_api_call_encrypted(url, params)
+        devices = self.execute_api_call_encrypted(url, params)
+        if devices is not None:
+            self._devices[country] = (time.monotonic() + self.DEVICES_TTL, devices)
+        return devices
+
+    def get_cached_map_url(self, key: str) -> Optional[str]:
+        if key in self._map_urls:
+            expiry, map_url = self._map_urls[key]
+            if time.time() < expiry:
+                self._stats["cache_hits"] += 1
+                return map_url
+            del self._map_urls[key]
+        return None
+
+    def cache_map_url(self, key: str, map_url: str):
+        expiry = time.time() + self.MAP_URL_TTL
+        expires = parse_qs(urlparse(map_url).query).get("Expires")
+        if expires is not None and expires[0].isdigit():
+            expiry = min(expiry, int(expires[0]) - self.MAP_URL_EXPIRY_MARGIN)
+        self._map_urls[key] = (expiry, map_url)
+
+    def invalidate_map_url(self, key: str):
+        self._map_urls.pop(key, None)
 
     def execute_api_call_encrypted(self, url: str, params: Dict[str, str]) -> Any:
         headers = {
@@ -180,9 +267,13 @@ class XiaomiCloudConnector:
         fields = self.generate_enc_params(url, "POST", signed_nonce, nonce, params, self._ssecurity)
 
         try:
-            response = self._session.post(url, headers=headers, cookies=cookies, params=fields, timeout=10)
+            self._stats["requests"] += 1
+            response = self._session.post(url, headers=headers, cookies=cookies, params=fields,
+                                          timeout=self.REQUEST_TIMEOUT)
         except:
             response = None
+        if response is not None and response.status_code in [401, 403]:
+            self.invalidate_service_token()
         if response is not None and response.status_code == 200:
             decoded = self.decrypt_rc4(self.signed_nonce(fields["_nonce"]), response.text)
             return json.loads(decoded)
@@ -195,6 +286,24 @@ class XiaomiCloudConnector:
         hash_object = hashlib.sha256(base64.b64decode(self._ssecurity) + base64.b64decode(nonce))
         return base64.b64encode(hash_object.digest()).decode('utf-8')
 
+    @staticmethod
+    def get_validators(response_headers) -> Dict[str, str]:
+        validators = {}
+        if "ETag" in response_headers:
+            validators["If-None-Match"] = response_headers["ETag"]
+        if "Last-Modified" in response_headers:
+            validators["If-Modified-Since"] = response_headers["Last-Modified"]
+        return validators
+
+    @staticmethod
+    def create_session() -> requests.Session:
+        session = requests.session()
+        adapter = HTTPAdapter(pool_connections=XiaomiCloudConnector.POOL_SIZE,
+                              pool_maxsize=XiaomiCloudConnector.POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
     @staticmethod
     def generate_nonce(millis: int):
         nonce_bytes = os.urandom(8) + (int(millis / 60000)).to_bytes(4, byteorder='big')
@@ -16,8 +16,14 @@ CONF_DRAW = "draw"
 CONF_FORCE_API = "force_api"
 CONF_FONT = "font"
 CONF_FONT_SIZE = "font_size"
+CONF_IMAGE_COMPRESS_LEVEL = "compress_level"
+CONF_IMAGE_ENCODING = "image_encoding"
+CONF_IMAGE_FORMAT = "format"
+CONF_IMAGE_QUALITY = "quality"
+CONF_LAZY_ATTRIBUTES = "lazy_attributes"
 CONF_LEFT = "left"
 CONF_MAP_TRANSFORM = "map_transformation"
+CONF_RENDER_IN_PROCESS = "render_in_process"
 CONF_RIGHT = "right"
 CONF_ROOM_COLORS = "room_colors"
 CONF_ROTATE = "rotate"
@@ -47,6 +53,18 @@ CONF_AVAILABLE_SIZES = [CONF_SIZE_VACUUM_RADIUS, CONF_SIZE_PATH_WIDTH, CONF_SIZE
                         CONF_SIZE_IGNORED_OBSTACLE_WITH_PHOTO_RADIUS, CONF_SIZE_OBSTACLE_RADIUS,
                         CONF_SIZE_OBSTACLE_WITH_PHOTO_RADIUS, CONF_SIZE_CHARGER_RADIUS]
 
+IMAGE_FORMAT_JPEG = "jpeg"
+IMAGE_FORMAT_PNG = "png"
+IMAGE_FORMAT_WEBP = "webp"
+
+CONF_AVAILABLE_IMAGE_FORMATS = [IMAGE_FORMAT_PNG, IMAGE_FORMAT_WEBP, IMAGE_FORMAT_JPEG]
+
+IMAGE_FORMAT_CONTENT_TYPES = {
+    IMAGE_FORMAT_JPEG: "image/jpeg",
+    IMAGE_FORMAT_PNG: "image/png",
+    IMAGE_FORMAT_WEBP: "image/webp"
+}
+
 MINIMAL_IMAGE_WIDTH = 20
 MINIMAL_IMAGE_HEIGHT = 20
 CONTENT_TYPE = "image/png"
@@ -4,7 +4,9 @@ import logging
 import re
 import zlib
 from enum import Enum, IntEnum
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageChops
 
 from custom_components.xiaomi_cloud_map_extractor.common.map_data import Area, ImageData, MapData, Path, Point, Room, \
     Wall
@@ -17,6 +19,7 @@ _LOGGER = logging.getLogger(__name__)
 class MapDataHeader:
     def __init__(self):
         self.map_index: Optional[int] = None
+        self.frame_id: Optional[int] = None
         self.frame_type: Optional[int] = None
         self.vacuum_position: Optional[Point] = None
         self.charger_position: Optional[Point] = None
@@ -27,6 +30,18 @@ class MapDataHeader:
         self.image_top: Optional[int] = None
 
 
+class MapDataFrame:
+    def __init__(self, header: MapDataHeader, image_raw: bytes, additional_data_json: Dict[str, Any]):
+        self.header = header
+        self.image_raw = image_raw
+        self.additional_data_json = additional_data_json
+
+
+class MapDataFrameCache:
+    def __init__(self):
+        self.frame: Optional[MapDataFrame] = None
+
+
 class MapDataParserDreame(MapDataParser):
     HEADER_SIZE = 27
     PATH_REGEX = r'(?P<operator>[SL])(?P<x>-?\d+),(?P<y>-?\d+)'
@@ -45,20 +60,22 @@ class MapDataParserDreame(MapDataParser):
 
     @staticmethod
     def decode_map(raw_map: str, colors, drawables, texts, sizes, image_config,
-                   map_data_type=MapDataTypes.REGULAR) -> MapData:
+                   map_data_type=MapDataTypes.REGULAR, frame_cache: Optional[MapDataFrameCache] = None) -> MapData:
         _LOGGER.debug(f'decoding {map_data_type} type map')
         raw_map_string = raw_map.replace('_', '/').replace('-', '+')
         unzipped = zlib.decompress(base64.decodebytes(raw_map_string.encode("utf8")))
-        return MapDataParserDreame.parse(unzipped, colors, drawables, texts, sizes, image_config, map_data_type)
+        return MapDataParserDreame.parse(unzipped, colors, drawables, texts, sizes, image_config, map_data_type,
+                                         frame_cache)
 
     @staticmethod
     def parse(raw: bytes, colors, drawables, texts, sizes, image_config,
-              map_data_type: MapDataTypes = MapDataTypes.REGULAR, *args, **kwargs) -> Optional[MapData]:
+              map_data_type: MapDataTypes = MapDataTypes.REGULAR, frame_cache: Optional[MapDataFrameCache] = None,
+              *args, **kwargs) -> Optional[MapData]:
         map_data = MapData(0, 1000)
 
         header = MapDataParserDreame.parse_header(raw)
 
-        if header.frame_type != MapDataParserDreame.FrameTypes.I_FRAME:
+        if header.frame_type not in [MapDataParserDreame.FrameTypes.I_FRAME, MapDataParserDreame.FrameTypes.P_FRAME]:
             _LOGGER.error("unsupported map frame type")
             return
 
@@ -66,9 +83,18 @@ class MapDataParserDreame(MapDataParser):
             image_raw = raw[MapDataParserDreame.HEADER_SIZE:
                             MapDataParserDreame.HEADER_SIZE + header.image_width * header.image_height]
             additional_data_raw = raw[MapDataParserDreame.HEADER_SIZE + header.image_width * header.image_height:]
-            additional_data_json = json.loads(additional_data_raw.decode("utf8"))
+            additional_data_json = json.loads(additional_data_raw.decode("utf8")) if additional_data_raw else {}
             _LOGGER.debug(f'map additional_data: {additional_data_json}')
 
+            frame = MapDataFrame(header, image_raw, additional_data_json)
+            if header.frame_type == MapDataParserDreame.FrameTypes.P_FRAME:
+                frame = MapDataParserDreame.apply_p_frame(frame, frame_cache)
+                if frame is None:
+                    return
+            if frame_cache is not None:
+                frame_cache.frame = frame
+            header, image_raw, additional_data_json = frame.header, frame.image_raw, frame.additional_data_json
+
             map_data.charger = header.charger_position
             map_data.vacuum_position = header.vacuum_position
 
@@ -116,6 +142,43 @@ class MapDataParserDreame(MapDataParser):
 
         return map_data
 
+    @staticmethod
+    def apply_p_frame(p_frame: MapDataFrame, frame_cache: Optional[MapDataFrameCache]) -> Optional[MapDataFrame]:
+        if frame_cache is None or frame_cache.frame is None:
+            _LOGGER.debug("received P-frame without preceding I-frame")
+            return None
+        previous = frame_cache.frame
+        if previous.header.map_index != p_frame.header.map_index or \
+                previous.header.frame_id + 1 != p_frame.header.frame_id or \
+                previous.header.image_pixel_size != p_frame.header.image_pixel_size:
+            _LOGGER.debug("P-frame %s does not follow cached frame %s", p_frame.header.frame_id,
+                          previous.header.frame_id)
+            frame_cache.frame = None
+            return None
+        offset_x = p_frame.header.image_left - previous.header.image_left
+        offset_y = p_frame.header.image_top - previous.header.image_top
+        if offset_x < 0 or offset_y < 0 or \
+                offset_x + p_frame.header.image_width > previous.header.image_width or \
+                offset_y + p_frame.header.image_height > previous.header.image_height:
+            _LOGGER.debug("P-frame exceeds cached I-frame bounds")
+            frame_cache.frame = None
+            return None
+        size = (previous.header.image_width, previous.header.image_height)
+        image = Image.frombytes("L", size, previous.image_raw)
+        if p_frame.header.image_width > 0 and p_frame.header.image_height > 0:
+            delta_size = (p_frame.header.image_width, p_frame.header.image_height)
+            delta = Image.frombytes("L", delta_size, p_frame.image_raw)
+            box = (offset_x, offset_y, offset_x + delta_size[0], offset_y + delta_size[1])
+            image.paste(ImageChops.add_modulo(image.crop(box), delta), box)
+        header = MapDataHeader()
+        header.__dict__.update(previous.header.__dict__)
+        header.frame_id = p_frame.header.frame_id
+        header.frame_type = p_frame.header.frame_type
+        header.vacuum_position = p_frame.header.vacuum_position
+        header.charger_position = p_frame.header.charger_position
+        return MapDataFrame(header, image.tobytes(), {**previous.additional_data_json,
+                                                      **p_frame.additional_data_json})
+
     @staticmethod
     def parse_header(raw: bytes) -> Optional[MapDataHeader]:
         header = MapDataHeader()
@@ -125,6 +188,7 @@ class MapDataParserDreame(MapDataParser):
             return
 
         header.map_index = MapDataParserDreame.read_int_16_le(raw)
+        header.frame_id = MapDataParserDreame.read_int_16_le(raw, 2)
         header.frame_type = MapDataParserDreame.read_int_8(raw, 4)
         header.vacuum_position = Point(
             MapDataParserDreame.read_int_16_le(raw, 5),
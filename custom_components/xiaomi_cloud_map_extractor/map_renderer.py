@@ -0,0 +1,115 @@
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from custom_components.xiaomi_cloud_map_extractor.common.image_handler import ImageHandler
+from custom_components.xiaomi_cloud_map_extractor.common.map_data import MapData
+from custom_components.xiaomi_cloud_map_extractor.common.vacuum import XiaomiCloudVacuum
+from custom_components.xiaomi_cloud_map_extractor.const import *
+from custom_components.xiaomi_cloud_map_extractor.dreame.vacuum import DreameVacuum
+from custom_components.xiaomi_cloud_map_extractor.roidmi.vacuum import RoidmiVacuum
+from custom_components.xiaomi_cloud_map_extractor.types import Colors, Drawables, ImageConfig, Sizes, Texts
+from custom_components.xiaomi_cloud_map_extractor.unsupported.vacuum import UnsupportedVacuum
+from custom_components.xiaomi_cloud_map_extractor.viomi.vacuum import ViomiVacuum
+from custom_components.xiaomi_cloud_map_extractor.xiaomi.vacuum import XiaomiVacuum
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RenderedMap:
+    def __init__(self, map_name: str, map_stored: bool, is_empty: bool, image_hash: bytes, image: bytes,
+                 attributes: Dict[str, Any]):
+        self.map_name = map_name
+        self.map_stored = map_stored
+        self.is_empty = is_empty
+        self.image_hash = image_hash
+        self.image = image
+        self.attributes = attributes
+
+
+class MapRenderer:
+    VACUUMS = {
+        CONF_AVAILABLE_API_XIAOMI: XiaomiVacuum,
+        CONF_AVAILABLE_API_VIOMI: ViomiVacuum,
+        CONF_AVAILABLE_API_ROIDMI: RoidmiVacuum,
+        CONF_AVAILABLE_API_DREAME: DreameVacuum
+    }
+    _vacuums: Dict[Tuple[Optional[str], str], XiaomiCloudVacuum] = {}
+
+    @staticmethod
+    def create_executor() -> ProcessPoolExecutor:
+        # a single worker per camera keeps stateful decoders (e.g. Dreame I-frames) and image caches together
+        return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    @staticmethod
+    def render(api: Optional[str], model: str, map_name: str, raw_map: bytes, colors: Colors, drawables: Drawables,
+               texts: Texts, sizes: Sizes, image_config: ImageConfig, image_encoding: Dict[str, Any],
+               attributes: List[str], country: Optional[str],
+               store_map_path: Optional[str] = None) -> Optional[RenderedMap]:
+        key = (api, model)
+        if key not in MapRenderer._vacuums:
+            vacuum_class = MapRenderer.VACUUMS.get(api, UnsupportedVacuum)
+            MapRenderer._vacuums[key] = vacuum_class(None, None, None, None, model)
+        map_data, map_stored = MapRenderer._vacuums[key].parse_raw_map(map_name, raw_map, colors, drawables, texts,
+                                                                       sizes, image_config, store_map_path)
+        if map_data is None:
+            return None
+        image = map_data.image.data
+        image_hash = hashlib.sha1(image.tobytes())
+        image_hash.update(repr((image.mode, image.size)).encode())
+        encoded = ImageHandler.encode(image,
+                                      image_encoding[CONF_IMAGE_FORMAT],
+                                      image_encoding[CONF_IMAGE_COMPRESS_LEVEL],
+                                      image_encoding[CONF_IMAGE_QUALITY])
+        extracted = MapRenderer.to_payload(MapRenderer.extract_attributes(map_data, attributes, country))
+        return RenderedMap(map_name, map_stored, map_data.image.is_empty, image_hash.digest(), encoded, extracted)
+
+    @staticmethod
+    def to_payload(value: Any) -> Any:
+        if hasattr(value, "as_dict"):
+            value = value.as_dict()
+        if isinstance(value, dict):
+            return {k: MapRenderer.to_payload(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [MapRenderer.to_payload(v) for v in value]
+        return value
+
+    @staticmethod
+    def extract_attributes(map_data: MapData, attributes_to_return: List[str], country) -> Dict[str, Any]:
+        attributes = {}
+        rooms = []
+        if map_data.rooms is not None:
+            rooms = dict(filter(lambda x: x[0] is not None, ((x[0], x[1].name) for x in map_data.rooms.items())))
+            if len(rooms) == 0:
+                rooms = list(map_data.rooms.keys())
+        for name, value in {
+            ATTRIBUTE_CALIBRATION: map_data.calibration(),
+            ATTRIBUTE_CHARGER: map_data.charger,
+            ATTRIBUTE_CLEANED_ROOMS: map_data.cleaned_rooms,
+            ATTRIBUTE_COUNTRY: country,
+            ATTRIBUTE_GOTO: map_data.goto,
+            ATTRIBUTE_GOTO_PATH: map_data.goto_path,
+            ATTRIBUTE_GOTO_PREDICTED_PATH: map_data.predicted_path,
+            ATTRIBUTE_IGNORED_OBSTACLES: map_data.ignored_obstacles,
+            ATTRIBUTE_IGNORED_OBSTACLES_WITH_PHOTO: map_data.ignored_obstacles_with_photo,
+            ATTRIBUTE_IMAGE: map_data.image,
+            ATTRIBUTE_IS_EMPTY: map_data.image.is_empty,
+            ATTRIBUTE_MAP_NAME: map_data.map_name,
+            ATTRIBUTE_NO_GO_AREAS: map_data.no_go_areas,
+            ATTRIBUTE_NO_MOPPING_AREAS: map_data.no_mopping_areas,
+            ATTRIBUTE_OBSTACLES: map_data.obstacles,
+            ATTRIBUTE_OBSTACLES_WITH_PHOTO: map_data.obstacles_with_photo,
+            ATTRIBUTE_PATH: map_data.path,
+            ATTRIBUTE_ROOM_NUMBERS: rooms,
+            ATTRIBUTE_ROOMS: map_data.rooms,
+            ATTRIBUTE_VACUUM_POSITION: map_data.vacuum_position,
+            ATTRIBUTE_VACUUM_ROOM: map_data.vacuum_room,
+            ATTRIBUTE_VACUUM_ROOM_NAME: map_data.vacuum_room_name,
+            ATTRIBUTE_WALLS: map_data.walls,
+            ATTRIBUTE_ZONES: map_data.zones
+        }.items():
+            if name in attributes_to_return:
+                attributes[name] = value
+        return attributes
@@ -2,6 +2,7 @@ from typing import Any, Dict, List, Tuple, Union
 
 Color = Union[Tuple[int, int, int], Tuple[int, int, int, int]]
 Colors = Dict[str, Color]
+Palette = List[Color]
 Drawables = List[str]
 Texts = List[Any]
 Sizes = Dict[str, float]
@@ -1,12 +1,11 @@
 import logging
 from typing import Dict, Optional, Set, Tuple
 
-from PIL import Image
 from PIL.Image import Image as ImageType
 
 from custom_components.xiaomi_cloud_map_extractor.common.image_handler import ImageHandler
 from custom_components.xiaomi_cloud_map_extractor.const import *
-from custom_components.xiaomi_cloud_map_extractor.types import Colors, ImageConfig
+from custom_components.xiaomi_cloud_map_extractor.types import Colors, ImageConfig, Palette
 from custom_components.xiaomi_cloud_map_extractor.viomi.parsing_buffer import ParsingBuffer
 
 _LOGGER = logging.getLogger(__name__)
@@ -26,9 +25,6 @@ class ImageHandlerViomi(ImageHandler):
     def parse(buf: ParsingBuffer, width: int, height: int, colors: Colors, image_config: ImageConfig,
               draw_cleaned_area: bool) \
             -> Tuple[ImageType, Dict[int, Tuple[int, int, int, int]], Set[int], Optional[ImageType]]:
-        rooms = {}
-        cleaned_areas = set()
-        scale = image_config[CONF_SCALE]
         trim_left = int(image_config[CONF_TRIM][CONF_LEFT] * width / 100)
         trim_right = int(image_config[CONF_TRIM][CONF_RIGHT] * width / 100)
         trim_top = int(image_config[CONF_TRIM][CONF_TOP] * height / 100)
@@ -36,59 +32,45 @@ class ImageHandlerViomi(ImageHandler):
         trimmed_height = height - trim_top - trim_bottom
         trimmed_width = width - trim_left - trim_right
         if trimmed_width == 0 or trimmed_height == 0:
-            return ImageHandler.create_empty_map_image(colors), rooms, cleaned_areas, None
-        image = Image.new('RGBA', (trimmed_width, trimmed_height))
-        pixels = image.load()
-        cleaned_areas_layer = None
-        cleaned_areas_pixels = None
+            return ImageHandler.create_empty_map_image(colors), {}, set(), None
+        raw_data = buf.get_bytes('pixels', width * height)
+        palette, room_numbers = ImageHandlerViomi.create_pixel_table(colors)
+        layer_palettes = {}
         if draw_cleaned_area:
-            cleaned_areas_layer = Image.new('RGBA', (trimmed_width, trimmed_height))
-            cleaned_areas_pixels = cleaned_areas_layer.load()
-        buf.skip('trim_bottom', trim_bottom * width)
-        unknown_pixels = set()
-        for img_y in range(trimmed_height):
-            buf.skip('trim_left', trim_left)
-            for img_x in range(trimmed_width):
-                pixel_type = buf.get_uint8('pixel')
-                x = img_x
-                y = trimmed_height - 1 - img_y
-                if pixel_type == ImageHandlerViomi.MAP_OUTSIDE:
-                    pixels[x, y] = ImageHandler.__get_color__(COLOR_MAP_OUTSIDE, colors)
-                elif pixel_type == ImageHandlerViomi.MAP_WALL:
-                    pixels[x, y] = ImageHandler.__get_color__(COLOR_MAP_WALL_V2, colors)
-                elif pixel_type == ImageHandlerViomi.MAP_SCAN:
-                    pixels[x, y] = ImageHandler.__get_color__(COLOR_SCAN, colors)
-                elif pixel_type == ImageHandlerViomi.MAP_NEW_DISCOVERED_AREA:
-                    pixels[x, y] = ImageHandler.__get_color__(COLOR_NEW_DISCOVERED_AREA, colors)
-                elif ImageHandlerViomi.MAP_ROOM_MIN <= pixel_type <= ImageHandlerViomi.MAP_SELECTED_ROOM_MAX:
-                    room_x = img_x + trim_left
-                    room_y = img_y + trim_bottom
-                    if pixel_type < ImageHandlerViomi.MAP_SELECTED_ROOM_MIN:
-                        room_number = pixel_type
-                    else:
-                        room_number = pixel_type - ImageHandlerViomi.MAP_SELECTED_ROOM_MIN + ImageHandlerViomi.MAP_ROOM_MIN
-                        cleaned_areas.add(room_number)
-                        if draw_cleaned_area:
-                            cleaned_areas_pixels[x, y] = ImageHandler.__get_color__(COLOR_CLEANED_AREA, colors)
-                    if room_number not in rooms:
-                        rooms[room_number] = (room_x, room_y, room_x, room_y)
-                    else:
-                        rooms[room_number] = (min(rooms[room_number][0], room_x),
-                                              min(rooms[room_number][1], room_y),
-                                              max(rooms[room_number][2], room_x),
-                                              max(rooms[room_number][3], room_y))
-                    default = ImageHandler.ROOM_COLORS[room_number % len(ImageHandler.ROOM_COLORS)]
-                    pixels[x, y] = ImageHandler.__get_color__(f"{COLOR_ROOM_PREFIX}{room_number}", colors, default)
-                else:
-                    pixels[x, y] = ImageHandler.__get_color__(COLOR_UNKNOWN, colors)
-                    unknown_pixels.add(pixel_type)
-            buf.skip('trim_right', trim_right)
-        buf.skip('trim_top', trim_top * width)
-        if image_config["scale"] != 1 and trimmed_width != 0 and trimmed_height != 0:
-            image = image.resize((int(trimmed_width * scale), int(trimmed_height * scale)), resample=Image.NEAREST)
-            if draw_cleaned_area:
-                cleaned_areas_layer = cleaned_areas_layer.resize(
-                    (int(trimmed_width * scale), int(trimmed_height * scale)), resample=Image.NEAREST)
+            layer_palettes[DRAWABLE_CLEANED_AREA] = ImageHandlerViomi.create_cleaned_area_palette(colors)
+        image, rooms, pixel_types, layers = ImageHandler.parse_raw_image(raw_data, width, height, palette,
+                                                                         room_numbers, image_config, layer_palettes)
+        cleaned_areas = {room_numbers[pixel_type] for pixel_type in pixel_types
+                         if ImageHandlerViomi.MAP_SELECTED_ROOM_MIN <= pixel_type
+                         <= ImageHandlerViomi.MAP_SELECTED_ROOM_MAX}
+        known_pixel_types = {ImageHandlerViomi.MAP_OUTSIDE, ImageHandlerViomi.MAP_WALL, ImageHandlerViomi.MAP_SCAN,
+                             ImageHandlerViomi.MAP_NEW_DISCOVERED_AREA, *room_numbers.keys()}
+        unknown_pixels = pixel_types - known_pixel_types
         if len(unknown_pixels) > 0:
             _LOGGER.warning('unknown pixel_types: %s', unknown_pixels)
-        return image, rooms, cleaned_areas, cleaned_areas_layer
+        return image, rooms, cleaned_areas, layers.get(DRAWABLE_CLEANED_AREA)
+
+    @staticmethod
+    def create_pixel_table(colors: Colors) -> Tuple[Palette, Dict[int, int]]:
+        palette = ImageHandler.create_palette(ImageHandler.__get_color__(COLOR_UNKNOWN, colors))
+        room_numbers = {}
+        for pixel_type in range(ImageHandlerViomi.MAP_ROOM_MIN, ImageHandlerViomi.MAP_SELECTED_ROOM_MAX + 1):
+            room_number = pixel_type
+            if pixel_type >= ImageHandlerViomi.MAP_SELECTED_ROOM_MIN:
+                room_number = pixel_type - ImageHandlerViomi.MAP_SELECTED_ROOM_MIN + ImageHandlerViomi.MAP_ROOM_MIN
+            room_numbers[pixel_type] = room_number
+            default = ImageHandler.ROOM_COLORS[room_number % len(ImageHandler.ROOM_COLORS)]
+            palette[pixel_type] = ImageHandler.__get_color__(f"{COLOR_ROOM_PREFIX}{room_number}", colors, default)
+        palette[ImageHandlerViomi.MAP_OUTSIDE] = ImageHandler.__get_color__(COLOR_MAP_OUTSIDE, colors)
+        palette[ImageHandlerViomi.MAP_WALL] = ImageHandler.__get_color__(COLOR_MAP_WALL_V2, colors)
+        palette[ImageHandlerViomi.MAP_SCAN] = ImageHandler.__get_color__(COLOR_SCAN, colors)
+        palette[ImageHandlerViomi.MAP_NEW_DISCOVERED_AREA] = \
+            ImageHandler.__get_color__(COLOR_NEW_DISCOVERED_AREA, colors)
+        return palette, room_numbers
+
+    @staticmethod
+    def create_cleaned_area_palette(colors: Colors) -> Palette:
+        palette = ImageHandler.create_palette((0, 0, 0, 0))
+        for pixel_type in range(ImageHandlerViomi.MAP_SELECTED_ROOM_MIN, ImageHandlerViomi.MAP_SELECTED_ROOM_MAX + 1):
+            palette[pixel_type] = ImageHandler.__get_color__(COLOR_CLEANED_AREA, colors)
+        return palette
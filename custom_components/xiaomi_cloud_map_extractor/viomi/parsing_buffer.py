@@ -57,6 +57,13 @@ class ParsingBuffer:
         self._length -= 4
         return unpack_from('<f', self._data, self._offs - 4)[0]
 
+    def get_bytes(self, field: str, n: int) -> bytes:
+        if self._length < n:
+            raise ValueError(f"error parsing {self._name}.{field} at offset {self._offs:#x}: buffer underrun")
+        self._offs += n
+        self._length -= n
+        return self._data[self._offs - n:self._offs]
+
     def get_string_len8(self, field: str) -> str:
         n = self.get_uint8(field + '.len')
         if self._length < n:
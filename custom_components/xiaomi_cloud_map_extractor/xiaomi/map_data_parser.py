@@ -1,5 +1,8 @@
 import logging
-from typing import Tuple
+import struct
+import sys
+from array import array
+from typing import Optional, Tuple
 
 from custom_components.xiaomi_cloud_map_extractor.common.map_data import *
 from custom_components.xiaomi_cloud_map_extractor.common.map_data_parser import MapDataParser
@@ -29,6 +32,7 @@ class MapDataParserXiaomi(MapDataParser):
     CARPET_MAP = 17
     DIGEST = 1024
     SIZE = 1024
+    MAP_HEADER_SIZE = 0x14
     KNOWN_OBSTACLE_TYPES = {
         0: 'cable',
         2: 'shoes',
@@ -41,12 +45,12 @@ class MapDataParserXiaomi(MapDataParser):
     @staticmethod
     def parse(raw: bytes, colors: Colors, drawables: Drawables, texts: Texts, sizes: Sizes,
               image_config: ImageConfig, *args, **kwargs) -> MapData:
+        raw = memoryview(raw)
         map_data = MapData(25500, 1000)
         map_header_length = MapDataParserXiaomi.get_int16(raw, 0x02)
         map_data.major_version = MapDataParserXiaomi.get_int16(raw, 0x08)
         map_data.minor_version = MapDataParserXiaomi.get_int16(raw, 0x0A)
-        map_data.map_index = MapDataParserXiaomi.get_int32(raw, 0x0C)
-        map_data.map_sequence = MapDataParserXiaomi.get_int32(raw, 0x10)
+        map_data.map_index, map_data.map_sequence = MapDataParserXiaomi.parse_map_version(raw)
         block_start_position = map_header_length
         img_start = None
         while block_start_position < len(raw):
@@ -94,7 +98,7 @@ class MapDataParserXiaomi(MapDataParser):
                 map_data.ignored_obstacles_with_photo = MapDataParserXiaomi.parse_obstacles(data, header)
             elif block_type == MapDataParserXiaomi.BLOCKS:
                 block_pairs = MapDataParserXiaomi.get_int16(header, 0x08)
-                map_data.blocks = MapDataParserXiaomi.get_bytes(data, 0, block_pairs)
+                map_data.blocks = bytes(MapDataParserXiaomi.get_bytes(data, 0, block_pairs))
             block_start_position = block_start_position + block_data_length + MapDataParserXiaomi.get_int8(header, 2)
         if not map_data.image.is_empty:
             MapDataParserXiaomi.draw_elements(colors, drawables, sizes, map_data, image_config)
@@ -105,6 +109,12 @@ class MapDataParserXiaomi(MapDataParser):
             ImageHandlerXiaomi.draw_texts(map_data.image, texts)
         return map_data
 
+    @staticmethod
+    def parse_map_version(raw: bytes) -> Optional[Tuple[int, int]]:
+        if len(raw) < MapDataParserXiaomi.MAP_HEADER_SIZE:
+            return None
+        return MapDataParserXiaomi.get_int32(raw, 0x0C), MapDataParserXiaomi.get_int32(raw, 0x10)
+
     @staticmethod
     def map_to_image(p: Point) -> Point:
         return Point(p.x / MM, p.y / MM)
@@ -114,7 +124,7 @@ class MapDataParserXiaomi(MapDataParser):
         return x * MM
 
     @staticmethod
-    def get_current_vacuum_room(block_start_position: int, raw: bytes, vacuum_position: Point) -> int:
+    def get_current_vacuum_room(block_start_position: int, raw: memoryview, vacuum_position: Point) -> int:
         block_header_length = MapDataParserXiaomi.get_int16(raw, block_start_position + 0x02)
         header = MapDataParserXiaomi.get_bytes(raw, block_start_position, block_header_length)
         block_data_length = MapDataParserXiaomi.get_int32(header, 0x04)
@@ -128,7 +138,8 @@ class MapDataParserXiaomi(MapDataParser):
         return room
 
     @staticmethod
-    def parse_image(block_data_length: int, block_header_length: int, data: bytes, header: bytes, colors: Colors,
+    def parse_image(block_data_length: int, block_header_length: int, data: memoryview, header: memoryview,
+                    colors: Colors,
                     image_config: ImageConfig) -> Tuple[ImageData, Dict[int, Room]]:
         image_size = block_data_length
         image_top = MapDataParserXiaomi.get_int32(header, block_header_length - 16)
@@ -161,15 +172,13 @@ class MapDataParserXiaomi(MapDataParser):
                          image, MapDataParserXiaomi.map_to_image), rooms
 
     @staticmethod
-    def parse_goto_target(data: bytes) -> Point:
-        x = MapDataParserXiaomi.get_int16(data, 0x00)
-        y = MapDataParserXiaomi.get_int16(data, 0x02)
+    def parse_goto_target(data: memoryview) -> Point:
+        x, y = struct.unpack_from("<HH", data, 0x00)
         return Point(x, y)
 
     @staticmethod
-    def parse_object_position(block_data_length: int, data: bytes) -> Point:
-        x = MapDataParserXiaomi.get_int32(data, 0x00)
-        y = MapDataParserXiaomi.get_int32(data, 0x04)
+    def parse_object_position(block_data_length: int, data: memoryview) -> Point:
+        x, y = struct.unpack_from("<II", data, 0x00)
         a = None
         if block_data_length > 8:
             a = MapDataParserXiaomi.get_int32(data, 0x08)
@@ -178,102 +187,66 @@ class MapDataParserXiaomi(MapDataParser):
         return Point(x, y, a)
 
     @staticmethod
-    def parse_walls(data: bytes, header: bytes) -> List[Wall]:
+    def parse_walls(data: memoryview, header: memoryview) -> List[Wall]:
         wall_pairs = MapDataParserXiaomi.get_int16(header, 0x08)
-        walls = []
-        for wall_start in range(0, wall_pairs * 8, 8):
-            x0 = MapDataParserXiaomi.get_int16(data, wall_start + 0)
-            y0 = MapDataParserXiaomi.get_int16(data, wall_start + 2)
-            x1 = MapDataParserXiaomi.get_int16(data, wall_start + 4)
-            y1 = MapDataParserXiaomi.get_int16(data, wall_start + 6)
-            walls.append(Wall(x0, y0, x1, y1))
-        return walls
+        return [Wall(x0, y0, x1, y1) for x0, y0, x1, y1 in struct.iter_unpack("<4H", data[:wall_pairs * 8])]
 
     @staticmethod
-    def parse_obstacles(data: bytes, header: bytes) -> List[Obstacle]:
+    def parse_obstacles(data: memoryview, header: memoryview) -> List[Obstacle]:
         obstacle_pairs = MapDataParserXiaomi.get_int16(header, 0x08)
         obstacles = []
         if obstacle_pairs == 0:
             return obstacles
         obstacle_size = int(len(data) / obstacle_pairs)
         for obstacle_start in range(0, obstacle_pairs * obstacle_size, obstacle_size):
-            x = MapDataParserXiaomi.get_int16(data, obstacle_start + 0)
-            y = MapDataParserXiaomi.get_int16(data, obstacle_start + 2)
+            x, y = struct.unpack_from("<HH", data, obstacle_start)
             details = {}
             if obstacle_size >= 6:
                 details[ATTR_TYPE] = MapDataParserXiaomi.get_int16(data, obstacle_start + 4)
                 if details[ATTR_TYPE] in MapDataParserXiaomi.KNOWN_OBSTACLE_TYPES:
                     details[ATTR_DESCRIPTION] = MapDataParserXiaomi.KNOWN_OBSTACLE_TYPES[details[ATTR_TYPE]]
                 if obstacle_size >= 10:
-                    u1 = MapDataParserXiaomi.get_int16(data, obstacle_start + 6)
-                    u2 = MapDataParserXiaomi.get_int16(data, obstacle_start + 8)
+                    u1, u2 = struct.unpack_from("<HH", data, obstacle_start + 6)
                     details[ATTR_CONFIDENCE_LEVEL] = 0 if u2 == 0 else u1 * 10.0 / u2
                     if obstacle_size == 28 and (data[obstacle_start + 12] & 0xFF) > 0:
                         txt = MapDataParserXiaomi.get_bytes(data, obstacle_start + 12, 16)
-                        details[ATTR_PHOTO_NAME] = txt.decode('ascii')
+                        details[ATTR_PHOTO_NAME] = bytes(txt).decode('ascii')
             obstacles.append(Obstacle(x, y, details))
         return obstacles
 
     @staticmethod
-    def parse_zones(data: bytes, header: bytes) -> List[Zone]:
+    def parse_zones(data: memoryview, header: memoryview) -> List[Zone]:
         zone_pairs = MapDataParserXiaomi.get_int16(header, 0x08)
-        zones = []
-        for zone_start in range(0, zone_pairs * 8, 8):
-            x0 = MapDataParserXiaomi.get_int16(data, zone_start + 0)
-            y0 = MapDataParserXiaomi.get_int16(data, zone_start + 2)
-            x1 = MapDataParserXiaomi.get_int16(data, zone_start + 4)
-            y1 = MapDataParserXiaomi.get_int16(data, zone_start + 6)
-            zones.append(Zone(x0, y0, x1, y1))
-        return zones
+        return [Zone(x0, y0, x1, y1) for x0, y0, x1, y1 in struct.iter_unpack("<4H", data[:zone_pairs * 8])]
 
     @staticmethod
-    def parse_path(block_start_position: int, header: bytes, raw: bytes) -> Path:
-        path_points = []
-        end_pos = MapDataParserXiaomi.get_int32(header, 0x04)
-        point_length = MapDataParserXiaomi.get_int32(header, 0x08)
-        point_size = MapDataParserXiaomi.get_int32(header, 0x0C)
-        angle = MapDataParserXiaomi.get_int32(header, 0x10)
+    def parse_path(block_start_position: int, header: memoryview, raw: memoryview) -> Path:
+        end_pos, point_length, point_size, angle = struct.unpack_from("<4I", header, 0x04)
         start_pos = block_start_position + 0x14
-        for pos in range(start_pos, start_pos + end_pos, 4):
-            x = MapDataParserXiaomi.get_int16(raw, pos)
-            y = MapDataParserXiaomi.get_int16(raw, pos + 2)
-            path_points.append(Point(x, y))
-        return Path(point_length, point_size, angle, [path_points])
+        points = (end_pos + 3) // 4
+        coordinates = array("H")
+        coordinates.frombytes(raw[start_pos: start_pos + points * 4])
+        if sys.byteorder != "little":
+            coordinates.byteswap()
+        return Path(point_length, point_size, angle, coordinates=[coordinates])
 
     @staticmethod
-    def parse_area(header: bytes, data: bytes) -> List[Area]:
+    def parse_area(header: memoryview, data: memoryview) -> List[Area]:
         area_pairs = MapDataParserXiaomi.get_int16(header, 0x08)
-        areas = []
-        for area_start in range(0, area_pairs * 16, 16):
-            x0 = MapDataParserXiaomi.get_int16(data, area_start + 0)
-            y0 = MapDataParserXiaomi.get_int16(data, area_start + 2)
-            x1 = MapDataParserXiaomi.get_int16(data, area_start + 4)
-            y1 = MapDataParserXiaomi.get_int16(data, area_start + 6)
-            x2 = MapDataParserXiaomi.get_int16(data, area_start + 8)
-            y2 = MapDataParserXiaomi.get_int16(data, area_start + 10)
-            x3 = MapDataParserXiaomi.get_int16(data, area_start + 12)
-            y3 = MapDataParserXiaomi.get_int16(data, area_start + 14)
-            areas.append(Area(x0, y0, x1, y1, x2, y2, x3, y3))
-        return areas
+        return [Area(*coordinates) for coordinates in struct.iter_unpack("<8H", data[:area_pairs * 16])]
 
     @staticmethod
-    def get_bytes(data: bytes, start_index: int, size: int) -> bytes:
+    def get_bytes(data: memoryview, start_index: int, size: int) -> memoryview:
         return data[start_index: start_index + size]
 
     @staticmethod
-    def get_int8(data: bytes, address: int) -> int:
+    def get_int8(data: memoryview, address: int) -> int:
         return data[address] & 0xFF
 
     @staticmethod
-    def get_int16(data: bytes, address: int) -> int:
-        return \
-            ((data[address + 0] << 0) & 0xFF) | \
-            ((data[address + 1] << 8) & 0xFFFF)
+    def get_int16(data: memoryview, address: int) -> int:
+        return struct.unpack_from("<H", data, address)[0]
 
     @staticmethod
-    def get_int32(data: bytes, address: int) -> int:
-        return \
-            ((data[address + 0] << 0) & 0xFF) | \
-            ((data[address + 1] << 8) & 0xFFFF) | \
-            ((data[address + 2] << 16) & 0xFFFFFF) | \
-            ((data[address + 3] << 24) & 0xFFFFFFFF)
+    def get_int32(data: memoryview, address: int) -> int:
+        return struct.unpack_from("<I", data, address)[0]
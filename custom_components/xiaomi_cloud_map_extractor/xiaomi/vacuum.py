@@ -1,5 +1,6 @@
 import gzip
-from typing import Optional
+import zlib
+from typing import Any, Optional
 
 from custom_components.xiaomi_cloud_map_extractor.common.map_data import MapData
 from custom_components.xiaomi_cloud_map_extractor.common.vacuum import XiaomiCloudVacuum
@@ -25,6 +26,13 @@ class XiaomiVacuum(XiaomiCloudVacuum):
             return None
         return api_response["result"]["url"]
 
+    def get_map_version(self, raw_map: bytes) -> Any:
+        try:
+            header = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(raw_map, MapDataParserXiaomi.MAP_HEADER_SIZE)
+        except zlib.error:
+            return None
+        return MapDataParserXiaomi.parse_map_version(header)
+
     def decode_map(self,
                    raw_map: bytes,
                    colors: Colors,